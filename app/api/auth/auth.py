@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from app.core.firebase_db import firebase_db
+from app.core.firebase_db import async_firebase_db
 from app.schemas.admin import AdminLogin
 from app.schemas.user import UserLogin
 from app.schemas.common import ResponseModel
@@ -20,7 +20,7 @@ router = APIRouter()
 async def admin_login(
     login_data: AdminLogin
 ):
-    admin = firebase_db.get_admin_by_email(login_data.email)
+    admin = await async_firebase_db.get_admin_by_email(login_data.email)
     if not admin or not verify_password(login_data.password, admin.get('password_hash', '')):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -41,7 +41,7 @@ async def admin_login(
 async def user_login(
     login_data: UserLogin
 ):
-    user = firebase_db.get_user_by_email(login_data.email)
+    user = await async_firebase_db.get_user_by_email(login_data.email)
     if not user or not verify_password(login_data.password, user.get('password_hash', '')):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -94,8 +94,8 @@ async def forgot_password(email: str = Query(...)):
     logger.info(f"🔍 Password reset requested for email: {email}")
     
     # Check if user exists (admin or regular user)
-    admin = firebase_db.get_admin_by_email(email)
-    user = firebase_db.get_user_by_email(email) if not admin else None
+    admin = await async_firebase_db.get_admin_by_email(email)
+    user = await async_firebase_db.get_user_by_email(email) if not admin else None
     
     if not admin and not user:
         logger.info(f"❌ Email {email} not found in database")
@@ -120,7 +120,7 @@ async def forgot_password(email: str = Query(...)):
     }
     
     reset_id = f"reset-{uuid.uuid4().hex[:8]}"
-    firebase_db.create('password_resets', reset_data, reset_id)
+    await async_firebase_db.create('password_resets', reset_data, reset_id)
     logger.info(f"💾 Reset token stored in Firebase with ID: {reset_id}")
     
     # Send email
@@ -183,7 +183,7 @@ async def reset_password(token: str = Query(...), new_password: str = Query(...)
     from datetime import datetime
     
     # Find reset token
-    resets = firebase_db.get_all('password_resets', [('reset_token', '==', token)])
+    resets = await async_firebase_db.get_all('password_resets', [('reset_token', '==', token)])
     if not resets:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -194,7 +194,7 @@ async def reset_password(token: str = Query(...), new_password: str = Query(...)
     
     # Check if token is expired
     if datetime.fromisoformat(reset_record['expires_at']) < datetime.utcnow():
-        firebase_db.delete('password_resets', reset_record['id'])
+        await async_firebase_db.delete('password_resets', reset_record['id'])
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Reset token has expired"
@@ -204,12 +204,12 @@ async def reset_password(token: str = Query(...), new_password: str = Query(...)
     password_hash = get_password_hash(new_password)
     
     if reset_record['user_type'] == 'admin':
-        firebase_db.update('admins', reset_record['user_id'], {'password_hash': password_hash})
+        await async_firebase_db.update('admins', reset_record['user_id'], {'password_hash': password_hash}, return_document=False)
     else:
-        firebase_db.update('users', reset_record['user_id'], {'password_hash': password_hash})
+        await async_firebase_db.update('users', reset_record['user_id'], {'password_hash': password_hash}, return_document=False)
     
     # Delete reset token
-    firebase_db.delete('password_resets', reset_record['id'])
+    await async_firebase_db.delete('password_resets', reset_record['id'])
     
     return ResponseModel(
         message="Password reset successfully"
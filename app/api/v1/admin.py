@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from app.core.database import get_db
 from app.services.admin_service import AdminService
 from app.services.client_service import ClientService
@@ -9,43 +8,12 @@ from app.services.invoice_service import InvoiceService
 from app.schemas.admin import AdminCreate, AdminUpdate, AdminResponse
 from app.schemas.common import ResponseModel
 from app.utils.dependencies import get_current_admin
-from app.models import Admin, Project, Client, Invoice
+from app.models import Admin, Project
 from typing import List
 
 router = APIRouter()
 
 
-@router.get("/dashboard/stats", response_model=ResponseModel)
-async def get_dashboard_stats(
-    current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-):
-    """Get dashboard statistics for admin"""
-    
-    # Get counts
-    total_projects = db.query(Project).count()
-    total_clients = db.query(Client).count()
-    pending_invoices = db.query(Invoice).filter(Invoice.status == "Pending").count()
-    
-    # Calculate total revenue from paid invoices
-    from app.models import InvoiceItem
-    total_revenue = db.query(func.sum(InvoiceItem.price * InvoiceItem.quantity)).join(Invoice).filter(
-        Invoice.status == "Paid"
-    ).scalar() or 0
-    
-    stats = {
-        "total_projects": total_projects,
-        "total_clients": total_clients,
-        "pending_invoices": pending_invoices,
-        "total_revenue": float(total_revenue)
-    }
-    
-    return ResponseModel(
-        data=stats,
-        message="Dashboard statistics retrieved successfully"
-    )
-
-
 @router.get("/dashboard/recent-projects", response_model=ResponseModel)
 async def get_recent_projects(
     limit: int = Query(5, ge=1, le=20),
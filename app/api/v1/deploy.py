@@ -1,53 +1,190 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Query
-from fastapi.responses import Response
-from app.core.firebase_db import firebase_db
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from app.core.firebase_db import async_firebase_db
 from app.schemas.common import ResponseModel
 from app.utils.dependencies import get_current_admin, get_current_admin_or_user
-from app.services.dashboard_deployment_service import DashboardDeploymentService
+from app.services.dashboard_deployment_service import (
+    DashboardDeploymentService, InvalidDashboardArchive,
+    BUILD_MODES, COMPRESSIBLE_CONTENT_TYPES, COMPRESSED_VARIANTS
+)
 from app.services.firebase_storage_service import firebase_storage_service
-from typing import Dict, Any, Optional
+from app.services.dashboard_file_cache import dashboard_file_cache
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import hashlib
 import mimetypes
+import re
 
 router = APIRouter()
 
-@router.post("/project", response_model=ResponseModel)
+# Build tools emit content-hashed file names under these directories
+# (Vite: assets/index-B3kP9xQe.js, CRA: static/js/main.4f2a9c1b.js)
+FINGERPRINTED_FILE_PATTERN = re.compile(r'^(assets|static)/(.+/)?[^/]+[.-][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+
+def _cache_control_for(build_path: str, content_type: str) -> str:
+    """Fingerprinted build assets never change; everything else must revalidate"""
+    if content_type != "text/html" and FINGERPRINTED_FILE_PATTERN.match(build_path):
+        return "private, max-age=31536000, immutable"
+    return "private, no-cache"
+
+STREAM_CHUNK_SIZE = 262144  # 256KB
+
+def _parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range 'bytes=' header into (start, end_exclusive).
+
+    Returns None when the header is absent or not a single byte range (the full
+    body is served), and raises 416 when the range cannot be satisfied.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_text, _, end_text = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) + 1 if end_text else size
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(end_text), 0)
+            end = size
+    except ValueError:
+        return None
+    end = min(end, size)
+    if start >= size or start >= end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+def _iter_disk_file(disk_file, start: int, end: int) -> Iterator[bytes]:
+    """Stream [start, end) of an open cache file, closing it when done"""
+    try:
+        disk_file.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = disk_file.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        disk_file.close()
+
+def _locate_file(instance_id: Optional[str], storage_path: str) -> Optional[Dict[str, Any]]:
+    """Find a file in the cache tiers or Storage metadata, without downloading its body"""
+    disk_entry = dashboard_file_cache.get_disk_entry(instance_id, storage_path)
+    etag = dashboard_file_cache.get_etag(instance_id, storage_path)
+    if disk_entry and etag and disk_entry[1] > dashboard_file_cache.memory_max_file_bytes:
+        return {'source': 'disk', 'disk_path': disk_entry[0], 'size': disk_entry[1], 'etag': etag}
+    
+    content = dashboard_file_cache.get(instance_id, storage_path)
+    if content is not None:
+        etag = dashboard_file_cache.get_etag(instance_id, storage_path) or hashlib.md5(content).hexdigest()
+        return {'source': 'memory', 'content': content, 'size': len(content), 'etag': etag}
+    
+    if dashboard_file_cache.is_missing(instance_id, storage_path):
+        return None
+    info = firebase_storage_service.get_file_info(storage_path)
+    if info is None:
+        dashboard_file_cache.mark_missing(instance_id, storage_path)
+        return None
+    return {'source': 'storage', 'size': info['size'], 'etag': info['etag'], 'generation': info.get('generation')}
+
+def _fetch_prepared_html(storage_path: str) -> Optional[bytes]:
+    """Download an HTML file, applying the mobile injection if the deploy predates it"""
+    content = firebase_storage_service.get_file(storage_path)
+    if content is None:
+        return None
+    return DashboardDeploymentService._prepare_html(content)
+
+def _locate_html_file(instance_id: Optional[str], storage_path: str) -> Optional[Dict[str, Any]]:
+    """HTML is always served from memory, prepared once per dashboard instance"""
+    content = dashboard_file_cache.get_or_fetch(instance_id, storage_path, _fetch_prepared_html)
+    if content is None:
+        return None
+    etag = dashboard_file_cache.get_etag(instance_id, storage_path) or hashlib.md5(content).hexdigest()
+    return {'source': 'memory', 'content': content, 'size': len(content), 'etag': etag}
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> List[str]:
+    """Precompressed encodings the client accepts, best first (br beats gzip at equal q)"""
+    if not accept_encoding:
+        return []
+    qualities = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[coding.strip().lower()] = q
+    
+    wildcard = qualities.get('*', 0.0)
+    accepted = [(qualities.get(encoding, wildcard), encoding) for encoding in COMPRESSED_VARIANTS]
+    return [encoding for q, encoding in sorted(accepted, key=lambda item: -item[0]) if q > 0]
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against a quoted entity tag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+@router.post("/project", response_model=ResponseModel, status_code=202)
 async def deploy_project_dashboard(
     project_id: str = Form(...),
     dashboard_file: UploadFile = File(...),
+    mode: Optional[str] = Form(None),
     current_admin: Dict[str, Any] = Depends(get_current_admin)
 ):
-    """Deploy dashboard ZIP file to project"""
+    """Queue a dashboard ZIP deployment for a project; poll /status/{deployment_id} for progress.
+    
+    mode is 'source' (build with npm) or 'prebuilt' (upload a built index.html + assets/);
+    when omitted it is detected from the archive.
+    """
     
     # Validate file type
     if not dashboard_file.filename.lower().endswith('.zip'):
         raise HTTPException(status_code=400, detail="Only ZIP files are allowed")
     
+    if mode is not None and mode not in BUILD_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(BUILD_MODES)}")
+    
     # Validate project exists
-    project = firebase_db.get_by_id('projects', project_id)
+    project = await async_firebase_db.get_by_id('projects', project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Get client info for URL generation
-    client = firebase_db.get_by_id('clients', project['client_id'])
+    client = await async_firebase_db.get_by_id('clients', project['client_id'])
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
     try:
-        # Deploy dashboard
+        # Queue the deployment; the build runs in the background
         deployment_result = await DashboardDeploymentService.deploy_project_dashboard(
             project_id=project_id,
             project_name=project['name'],
             client_name=client['company'],
             dashboard_file=dashboard_file,
-            deployed_by=current_admin['id']
+            deployed_by=current_admin['id'],
+            mode=mode
         )
         
         return ResponseModel(
             data=deployment_result,
-            message="Dashboard deployed successfully"
+            message="Dashboard deployment queued"
         )
+    except InvalidDashboardArchive as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Deployment failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue deployment: {str(e)}")
 
 @router.get("/status/{deployment_id}", response_model=ResponseModel)
 async def get_deployment_status(
@@ -56,7 +193,7 @@ async def get_deployment_status(
 ):
     """Get deployment status"""
     
-    deployment = firebase_db.get_by_id('dashboard_deployments', deployment_id)
+    deployment = await async_firebase_db.get_by_id('dashboard_deployments', deployment_id)
     if not deployment:
         raise HTTPException(status_code=404, detail="Deployment not found")
     
@@ -65,6 +202,25 @@ async def get_deployment_status(
         message="Deployment status retrieved successfully"
     )
 
+@router.post("/deployment/{deployment_id}/cancel", response_model=ResponseModel)
+async def cancel_deployment(
+    deployment_id: str,
+    current_admin: Dict[str, Any] = Depends(get_current_admin)
+):
+    """Cancel a queued or running deployment"""
+    
+    try:
+        result = await run_in_threadpool(DashboardDeploymentService.cancel_deployment, deployment_id)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Deployment not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return ResponseModel(
+        data=result,
+        message="Deployment cancelled" if result['status'] == 'cancelled' else "Deployment cancellation requested"
+    )
+
 @router.delete("/project/{project_id}", response_model=ResponseModel)
 async def delete_project_dashboard(
     project_id: str,
@@ -81,6 +237,72 @@ async def delete_project_dashboard(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete deployment: {str(e)}")
 
+@router.post("/project/{project_id}/prepare-html", response_model=ResponseModel)
+async def reprocess_project_html(
+    project_id: str,
+    current_admin: Dict[str, Any] = Depends(get_current_admin)
+):
+    """Re-run the mobile HTML injection for an already-deployed dashboard"""
+    
+    try:
+        result = await run_in_threadpool(DashboardDeploymentService.reprocess_html, project_id)
+        return ResponseModel(
+            data=result,
+            message="Dashboard HTML reprocessed successfully"
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to reprocess HTML: {str(e)}")
+
+@router.get("/project/{project_id}/releases", response_model=ResponseModel)
+async def list_project_releases(
+    project_id: str,
+    current_admin: Dict[str, Any] = Depends(get_current_admin)
+):
+    """List the retained releases of a project's dashboard"""
+    
+    try:
+        result = await run_in_threadpool(DashboardDeploymentService.list_releases, project_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    return ResponseModel(data=result, message="Dashboard releases retrieved successfully")
+
+@router.post("/project/{project_id}/rollback", response_model=ResponseModel)
+async def rollback_project_dashboard(
+    project_id: str,
+    instance_id: Optional[str] = Query(None),
+    current_admin: Dict[str, Any] = Depends(get_current_admin)
+):
+    """Make a retained release live again, by default the one before the active release"""
+    
+    try:
+        result = await run_in_threadpool(
+            DashboardDeploymentService.rollback_project_dashboard, project_id, instance_id
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    return ResponseModel(data=result, message="Dashboard rolled back successfully")
+
+@router.post("/storage/gc", response_model=ResponseModel)
+async def collect_dashboard_storage(
+    dry_run: bool = Query(True),
+    current_admin: Dict[str, Any] = Depends(get_current_admin)
+):
+    """Report (or with dry_run=false, delete) dashboard storage no deployment references"""
+    
+    try:
+        report = await run_in_threadpool(DashboardDeploymentService.collect_garbage, dry_run)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to collect dashboard storage: {str(e)}")
+    
+    return ResponseModel(
+        data=report,
+        message=f"{report['reclaimable_bytes']} bytes {'reclaimable' if dry_run else 'reclaimed'}"
+    )
+
 @router.get("/serve/{client_slug}/{project_slug}/{file_path:path}")
 async def serve_dashboard_file(
     client_slug: str,
@@ -168,23 +390,13 @@ async def serve_project_file_with_auth(
         try:
             from jose import JWTError, jwt
             from app.core.config import settings
-            from app.core.firebase_db import firebase_db
+            from app.utils.dependencies import load_principal
             
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
             subject: str = payload.get("sub")
             if subject and ":" in subject:
                 user_id, user_type = subject.split(":", 1)
-                
-                if user_type == "admin":
-                    user = firebase_db.get_by_id('admins', user_id)
-                    if user:
-                        user['user_type'] = 'admin'
-                        current_user = user
-                elif user_type == "user":
-                    user = firebase_db.get_by_id('users', user_id)
-                    if user and user.get('is_active', True):
-                        user['user_type'] = 'user'
-                        current_user = user
+                current_user = load_principal(user_id, user_type)
         except Exception as e:
             print(f"Token authentication failed: {e}")
     
@@ -204,23 +416,25 @@ async def serve_project_file_with_auth(
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    return await serve_project_file_internal(client_slug, project_slug, file_path, current_user, project_type_path)
+    return await serve_project_file_internal(client_slug, project_slug, file_path, current_user, project_type_path, request)
 
 async def serve_dashboard_file_internal(
     client_slug: str,
     project_slug: str,
     file_path: str,
-    current_user: Dict[str, Any]
+    current_user: Dict[str, Any],
+    request: Optional[Request] = None
 ):
     """Internal function to serve dashboard files with authentication and access control"""
-    return await serve_project_file_internal(client_slug, project_slug, file_path, current_user, "dashboards")
+    return await serve_project_file_internal(client_slug, project_slug, file_path, current_user, "dashboards", request)
 
 async def serve_project_file_internal(
     client_slug: str,
     project_slug: str,
     file_path: str,
     current_user: Dict[str, Any],
-    project_type_path: str = "dashboards"
+    project_type_path: str = "dashboards",
+    request: Optional[Request] = None
 ):
     """Internal function to serve project files with authentication and access control"""
     
@@ -233,117 +447,120 @@ async def serve_project_file_internal(
         if not access_granted:
             raise HTTPException(status_code=403, detail="Access denied to this project")
         
-        # Construct storage path
-        storage_path = f"{project_type_path}/{client_slug}/{project_slug}/{file_path}"
-        print(f"🔍 Looking for file at: {storage_path}")
+        # Deployed builds are immutable per instance ID, so files are cached under it
+        route = await run_in_threadpool(DashboardDeploymentService.get_dashboard_route, client_slug, project_slug)
+        instance_id = route.get('dashboard_instance_id') if route else None
         
-        # Get file from Firebase Storage
-        file_content = firebase_storage_service.get_file(storage_path)
+        # Candidate storage locations: the active release the route points at first, then
+        # the slug path where builds deployed before releases live, each also under assets/
+        base_paths = []
+        if route and route.get('storage_path'):
+            base_paths.append(route['storage_path'])
+        legacy_path = f"{project_type_path}/{client_slug}/{project_slug}"
+        if legacy_path not in base_paths:
+            base_paths.append(legacy_path)
         
-        # If not found and file_path doesn't start with 'assets/', try adding it
-        if not file_content and not file_path.startswith('assets/'):
-            assets_storage_path = f"{project_type_path}/{client_slug}/{project_slug}/assets/{file_path}"
-            print(f"🔍 Trying with assets prefix: {assets_storage_path}")
-            file_content = firebase_storage_service.get_file(assets_storage_path)
-        
-        if not file_content:
-            # Try alternative project slug (check if there's a mismatch)
-            projects = firebase_db.get_all('projects')
-            clients = firebase_db.get_all('clients')
-            
-            # Find the actual project and client
-            actual_client = None
-            actual_project = None
-            
-            for client_item in clients:
-                if DashboardDeploymentService._sanitize_name(client_item['company']) == client_slug:
-                    actual_client = client_item
-                    break
-            
-            if actual_client:
-                for project in projects:
-                    if (project['client_id'] == actual_client['id'] and 
-                        project.get('dashboard_url') and 
-                        f"/{client_slug}/" in project['dashboard_url']):
-                        actual_project = project
-                        break
-            
-            if actual_project:
-                # Try with the actual project slug from deployment
-                actual_project_slug = DashboardDeploymentService._sanitize_name(actual_project['name'])
-                alt_storage_path = f"dashboards/{client_slug}/{actual_project_slug}/{file_path}"
-                print(f"🔍 Trying alternative path: {alt_storage_path}")
-                file_content = firebase_storage_service.get_file(alt_storage_path)
-                
-                # If still not found and file_path doesn't start with 'assets/', try adding it
-                if not file_content and not file_path.startswith('assets/'):
-                    assets_path = f"dashboards/{client_slug}/{project_slug}/assets/{file_path}"
-                    print(f"🔍 Trying with assets prefix: {assets_path}")
-                    file_content = firebase_storage_service.get_file(assets_path)
-            
-            if not file_content:
-                print(f"❌ File not found at: {storage_path}")
-                raise HTTPException(status_code=404, detail=f"File not found: {storage_path}")
+        # (storage path, path relative to the build root) pairs
+        candidate_paths = []
+        for base_path in base_paths:
+            candidate_paths.append((f"{base_path}/{file_path}", file_path))
+            if not file_path.startswith('assets/'):
+                candidate_paths.append((f"{base_path}/assets/{file_path}", f"assets/{file_path}"))
         
         # Determine content type
         content_type, _ = mimetypes.guess_type(file_path)
         if not content_type:
             content_type = "application/octet-stream"
         
-        # Mobile-friendly headers
-        headers = {
-            "Cache-Control": "max-age=0, must-revalidate"
-        }
+        if_none_match = request.headers.get("if-none-match") if request else None
+        locate = _locate_html_file if content_type == "text/html" else _locate_file
+        
+        storage_path, build_path = candidate_paths[0]
+        located = None
+        for candidate_path, candidate_build_path in candidate_paths:
+            located = await run_in_threadpool(locate, instance_id, candidate_path)
+            if located:
+                storage_path, build_path = candidate_path, candidate_build_path
+                break
+        
+        if not located:
+            print(f"❌ File not found at: {storage_path}")
+            raise HTTPException(status_code=404, detail=f"File not found: {storage_path}")
+        
+        headers = {"Cache-Control": _cache_control_for(build_path, content_type)}
         
-        # For HTML files, inject mobile-friendly meta tags and styles
-        if content_type == "text/html" and file_content:
+        # Serve a precompressed sibling when the deploy produced one the client accepts;
+        # range requests always address the identity bytes
+        if content_type in COMPRESSIBLE_CONTENT_TYPES:
+            headers["Vary"] = "Accept-Encoding"
+            if request and not request.headers.get("range"):
+                for encoding in _accepted_encodings(request.headers.get("accept-encoding")):
+                    variant_path = storage_path + COMPRESSED_VARIANTS[encoding]
+                    variant = await run_in_threadpool(_locate_file, instance_id, variant_path)
+                    if variant:
+                        located, storage_path = variant, variant_path
+                        headers["Content-Encoding"] = encoding
+                        break
+        
+        # Each encoding is its own object, so its MD5 is already a distinct validator
+        headers["ETag"] = f'"{located["etag"]}"'
+        
+        # Answer conditional requests without fetching the body
+        if _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        
+        # Small files are served from memory
+        if located['source'] == 'storage' and located['size'] <= dashboard_file_cache.memory_max_file_bytes:
+            content = await run_in_threadpool(
+                dashboard_file_cache.get_or_fetch,
+                instance_id, storage_path, firebase_storage_service.get_file
+            )
+            if content is None:
+                raise HTTPException(status_code=404, detail=f"File not found: {storage_path}")
+            located = {'source': 'memory', 'content': content, 'size': len(content)}
+        
+        # Range requests are honoured for everything except HTML documents
+        byte_range = None
+        if request and content_type != "text/html":
+            if_range = request.headers.get("if-range")
+            if not if_range or if_range == headers["ETag"]:
+                byte_range = _parse_range(request.headers.get("range"), located['size'])
+        headers["Accept-Ranges"] = "bytes"
+        
+        start, end = byte_range or (0, located['size'])
+        status_code = 206 if byte_range else 200
+        if byte_range:
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{located['size']}"
+        
+        if located['source'] == 'disk':
             try:
-                html_content = file_content.decode('utf-8')
-                
-                # Mobile-friendly meta tags and styles
-                mobile_enhancements = []
-                
-                # Viewport meta tag
-                if 'name="viewport"' not in html_content.lower():
-                    mobile_enhancements.append('<meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=5.0, user-scalable=yes">')
-                
-                # Mobile-friendly CSS
-                mobile_css = '''
-                <style>
-                    * { box-sizing: border-box; }
-                    html, body { 
-                        margin: 0; 
-                        padding: 0; 
-                        width: 100%; 
-                        height: 100%; 
-                        overflow-x: auto;
-                        -webkit-text-size-adjust: 100%;
-                        -ms-text-size-adjust: 100%;
-                    }
-                    body { 
-                        min-height: 100vh; 
-                        touch-action: manipulation;
-                    }
-                    @media (max-width: 768px) {
-                        body { font-size: 14px; }
-                        * { max-width: 100%; }
-                    }
-                </style>
-                '''
-                mobile_enhancements.append(mobile_css)
-                
-                # Inject enhancements
-                if mobile_enhancements:
-                    enhancements_html = '\n    '.join(mobile_enhancements)
-                    if '<head>' in html_content:
-                        html_content = html_content.replace('<head>', f'<head>\n    {enhancements_html}')
-                    elif '<HEAD>' in html_content:
-                        html_content = html_content.replace('<HEAD>', f'<HEAD>\n    {enhancements_html}')
-                    
-                file_content = html_content.encode('utf-8')
-            except (UnicodeDecodeError, AttributeError):
-                # If decoding fails, serve original content
-                pass
+                disk_file = open(located['disk_path'], 'rb')
+            except OSError:
+                # Evicted since it was located; fall back to Storage
+                located['source'] = 'storage'
+            else:
+                headers["Content-Length"] = str(end - start)
+                return StreamingResponse(
+                    _iter_disk_file(disk_file, start, end),
+                    status_code=status_code, media_type=content_type, headers=headers
+                )
+        
+        if located['source'] == 'storage':
+            # Large uncached file: stream from Storage, filling the disk cache on full reads
+            chunks = firebase_storage_service.iter_file(
+                storage_path, start, end, STREAM_CHUNK_SIZE, generation=located.get('generation')
+            )
+            if not byte_range:
+                chunks = dashboard_file_cache.tee(instance_id, storage_path, chunks)
+            headers["Content-Length"] = str(end - start)
+            return StreamingResponse(chunks, status_code=status_code, media_type=content_type, headers=headers)
+        
+        file_content = located['content']
+        if byte_range:
+            return Response(
+                content=file_content[start:end],
+                status_code=206, media_type=content_type, headers=headers
+            )
         
         return Response(content=file_content, media_type=content_type, headers=headers)
         
@@ -388,23 +605,13 @@ async def serve_project_index(
         try:
             from jose import JWTError, jwt
             from app.core.config import settings
-            from app.core.firebase_db import firebase_db
+            from app.utils.dependencies import load_principal
             
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
             subject: str = payload.get("sub")
             if subject and ":" in subject:
                 user_id, user_type = subject.split(":", 1)
-                
-                if user_type == "admin":
-                    user = firebase_db.get_by_id('admins', user_id)
-                    if user:
-                        user['user_type'] = 'admin'
-                        current_user = user
-                elif user_type == "user":
-                    user = firebase_db.get_by_id('users', user_id)
-                    if user and user.get('is_active', True):
-                        user['user_type'] = 'user'
-                        current_user = user
+                current_user = load_principal(user_id, user_type)
         except Exception as e:
             print(f"Token authentication failed: {e}")
     
@@ -424,4 +631,4 @@ async def serve_project_index(
     if not current_user:
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    return await serve_project_file_internal(client_slug, project_slug, "index.html", current_user, project_type_path)
\ No newline at end of file
+    return await serve_project_file_internal(client_slug, project_slug, "index.html", current_user, project_type_path, request)
\ No newline at end of file
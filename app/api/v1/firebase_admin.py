@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from app.core.firebase_db import firebase_db
+from starlette.concurrency import run_in_threadpool
+from app.core.firebase_db import async_firebase_db
 from app.schemas.common import ResponseModel
 from app.schemas.admin import AdminPasswordChange
 from app.utils.dependencies import get_current_admin
@@ -47,7 +48,8 @@ async def update_admin_profile(
             file_path = f"admin/{current_admin['id']}.{file_extension}"
             
             # Upload directly to admin folder
-            public_url = firebase_storage_service.upload_file(
+            public_url = await run_in_threadpool(
+                firebase_storage_service.upload_file,
                 file_content, 
                 file_path, 
                 avatar.content_type or "image/jpeg"
@@ -59,7 +61,7 @@ async def update_admin_profile(
     
     # Update admin in Firebase
     if update_data:
-        updated_admin = firebase_db.update('admins', current_admin["id"], update_data)
+        updated_admin = await async_firebase_db.update('admins', current_admin["id"], update_data, current=current_admin)
         if not updated_admin:
             raise HTTPException(status_code=404, detail="Admin not found")
         
@@ -99,16 +101,17 @@ async def change_admin_password(
     if not stored_hash:
         raise HTTPException(status_code=400, detail="No password hash found for admin")
         
-    if not verify_password(password_data.current_password, stored_hash):
+    # bcrypt is deliberately slow; keep it off the event loop
+    if not await run_in_threadpool(verify_password, password_data.current_password, stored_hash):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Hash new password
-    new_password_hash = get_password_hash(password_data.new_password)
+    new_password_hash = await run_in_threadpool(get_password_hash, password_data.new_password)
     
     # Update password in Firebase
-    updated_admin = firebase_db.update('admins', current_admin["id"], {
+    updated_admin = await async_firebase_db.update('admins', current_admin["id"], {
         "password_hash": new_password_hash
-    })
+    }, return_document=False)
     
     if not updated_admin:
         raise HTTPException(status_code=404, detail="Admin not found")
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.core.firebase_db import firebase_db
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.core.firebase_db import async_firebase_db
 from app.schemas.common import ResponseModel
-from app.utils.dependencies import get_current_admin
+from app.utils.dependencies import get_current_admin, PageParams
 from app.models import Admin
 from app.services.firebase_storage_service import firebase_storage_service
 from typing import Dict, Any
@@ -9,6 +9,9 @@ import uuid
 
 router = APIRouter()
 
+# Fields list endpoints may be sorted by
+ORDER_FIELDS = ('company', 'created_at')
+
 @router.post("/", response_model=ResponseModel)
 async def create_client(
     client_data: Dict[str, Any],
@@ -26,7 +29,7 @@ async def create_client(
         'group_id': client_data.get('groupId')
     }
     
-    client = firebase_db.create('clients', client_doc, client_id)
+    client = await async_firebase_db.create('clients', client_doc, client_id)
     if not client:
         raise HTTPException(status_code=400, detail="Failed to create client")
     
@@ -37,13 +40,16 @@ async def create_client(
 
 @router.get("/", response_model=ResponseModel)
 async def get_clients(
+    search: str = Query(None, description="Match companies with a word starting with this text"),
+    page: PageParams = Depends(),
     current_admin: Admin = Depends(get_current_admin)
 ):
-    """Get all clients"""
-    clients = firebase_db.get_all('clients')
+    """Get a page of clients"""
+    clients, next_cursor = await async_firebase_db.search_page('clients', search, **page.query(ORDER_FIELDS))
     return ResponseModel(
         data=clients,
-        message="Clients retrieved successfully"
+        message="Clients retrieved successfully",
+        next_cursor=next_cursor
     )
 
 @router.get("/{client_id}", response_model=ResponseModel)
@@ -52,7 +58,7 @@ async def get_client(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Get client by ID"""
-    client = firebase_db.get_by_id('clients', client_id)
+    client = await async_firebase_db.get_by_id('clients', client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
@@ -82,7 +88,7 @@ async def update_client(
     if 'groupId' in client_data:
         update_data['group_id'] = client_data['groupId']
     
-    client = firebase_db.update('clients', client_id, update_data)
+    client = await async_firebase_db.update('clients', client_id, update_data)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
@@ -97,7 +103,7 @@ async def delete_client(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Delete client"""
-    success = firebase_db.delete('clients', client_id)
+    success = await async_firebase_db.delete('clients', client_id)
     if not success:
         raise HTTPException(status_code=404, detail="Client not found")
     
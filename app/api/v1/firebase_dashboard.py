@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.schemas.common import ResponseModel
+from app.services.dashboard_stats_service import DashboardStatsService
+from app.utils.dependencies import get_current_admin
+from app.models import Admin
+
+router = APIRouter()
+
+@router.get("/dashboard/stats", response_model=ResponseModel)
+async def get_dashboard_stats(
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Get dashboard statistics for admin"""
+    try:
+        stats = await DashboardStatsService.get_stats()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return ResponseModel(
+        data=stats,
+        message="Dashboard statistics retrieved successfully"
+    )
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException
-from app.core.firebase_db import firebase_db
+from app.core.firebase_db import async_firebase_db
 from app.schemas.common import ResponseModel
-from app.utils.dependencies import get_current_admin
+from app.services.dashboard_stats_service import invoice_total
+from app.utils.dependencies import get_current_admin, PageParams
 from app.models import Admin
 from app.services.email_service import send_invoice_email
 from typing import Dict, Any
@@ -9,6 +10,9 @@ import uuid
 
 router = APIRouter()
 
+# Fields list endpoints may be sorted by
+ORDER_FIELDS = ('invoice_number', 'issue_date', 'due_date', 'created_at')
+
 @router.post("/", response_model=ResponseModel)
 async def create_invoice(
     invoice_data: Dict[str, Any],
@@ -31,10 +35,11 @@ async def create_invoice(
         'status': invoice_data.get('status', 'Pending'),
         'type': invoice_data.get('type', 'manual'),
         'currency': invoice_data.get('currency', 'USD'),
-        'items': invoice_data.get('items', [])
+        'items': invoice_data.get('items', []),
+        'total': invoice_total(invoice_data.get('items'))
     }
     
-    invoice = firebase_db.create('invoices', invoice_doc, invoice_id)
+    invoice = await async_firebase_db.create('invoices', invoice_doc, invoice_id)
     if not invoice:
         raise HTTPException(status_code=400, detail="Failed to create invoice")
     
@@ -45,13 +50,15 @@ async def create_invoice(
 
 @router.get("/", response_model=ResponseModel)
 async def get_invoices(
+    page: PageParams = Depends(),
     current_admin: Admin = Depends(get_current_admin)
 ):
-    """Get all invoices"""
-    invoices = firebase_db.get_all('invoices')
+    """Get a page of invoices"""
+    invoices, next_cursor = await async_firebase_db.get_page('invoices', **page.query(ORDER_FIELDS))
     return ResponseModel(
         data=invoices,
-        message="Invoices retrieved successfully"
+        message="Invoices retrieved successfully",
+        next_cursor=next_cursor
     )
 
 @router.get("/{invoice_id}", response_model=ResponseModel)
@@ -60,7 +67,7 @@ async def get_invoice(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Get invoice by ID"""
-    invoice = firebase_db.get_by_id('invoices', invoice_id)
+    invoice = await async_firebase_db.get_by_id('invoices', invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
@@ -94,8 +101,9 @@ async def update_invoice(
         update_data['currency'] = invoice_data['currency']
     if 'items' in invoice_data:
         update_data['items'] = invoice_data['items']
+        update_data['total'] = invoice_total(invoice_data['items'])
     
-    invoice = firebase_db.update('invoices', invoice_id, update_data)
+    invoice = await async_firebase_db.update('invoices', invoice_id, update_data)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
@@ -110,7 +118,7 @@ async def delete_invoice(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Delete invoice"""
-    success = firebase_db.delete('invoices', invoice_id)
+    success = await async_firebase_db.delete('invoices', invoice_id)
     if not success:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
@@ -122,12 +130,12 @@ async def send_invoice(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Send invoice to client"""
-    invoice = firebase_db.get_by_id('invoices', invoice_id)
+    invoice = await async_firebase_db.get_by_id('invoices', invoice_id)
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
     # Get client details
-    client = firebase_db.get_by_id('clients', invoice.get('client_id'))
+    client = await async_firebase_db.get_by_id('clients', invoice.get('client_id'))
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from app.core.firebase_db import firebase_db
+from app.core.firebase_db import async_firebase_db
 from app.schemas.common import ResponseModel
 from app.utils.dependencies import get_current_admin
 from app.models import Admin
@@ -21,7 +21,7 @@ async def create_department(
         'name': dept_data.get('name')
     }
     
-    dept = firebase_db.create('departments', dept_doc, dept_id)
+    dept = await async_firebase_db.create('departments', dept_doc, dept_id)
     if not dept:
         raise HTTPException(status_code=400, detail="Failed to create department")
     
@@ -35,7 +35,7 @@ async def get_departments(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Get all departments"""
-    departments = firebase_db.get_all('departments')
+    departments = await async_firebase_db.get_all('departments')
     return ResponseModel(
         data=departments,
         message="Departments retrieved successfully"
@@ -48,7 +48,7 @@ async def update_department(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Update department"""
-    dept = firebase_db.update('departments', dept_id, {'name': dept_data.get('name')})
+    dept = await async_firebase_db.update('departments', dept_id, {'name': dept_data.get('name')})
     if not dept:
         raise HTTPException(status_code=404, detail="Department not found")
     
@@ -63,7 +63,7 @@ async def delete_department(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Delete department"""
-    success = firebase_db.delete('departments', dept_id)
+    success = await async_firebase_db.delete('departments', dept_id)
     if not success:
         raise HTTPException(status_code=404, detail="Department not found")
     
@@ -82,7 +82,7 @@ async def create_group(
         'name': group_data.get('name')
     }
     
-    group = firebase_db.create('groups', group_doc, group_id)
+    group = await async_firebase_db.create('groups', group_doc, group_id)
     if not group:
         raise HTTPException(status_code=400, detail="Failed to create group")
     
@@ -96,7 +96,7 @@ async def get_groups(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Get all groups"""
-    groups = firebase_db.get_all('groups')
+    groups = await async_firebase_db.get_all('groups')
     return ResponseModel(
         data=groups,
         message="Groups retrieved successfully"
@@ -109,7 +109,7 @@ async def update_group(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Update group"""
-    group = firebase_db.update('groups', group_id, {'name': group_data.get('name')})
+    group = await async_firebase_db.update('groups', group_id, {'name': group_data.get('name')})
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     
@@ -124,7 +124,7 @@ async def delete_group(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Delete group"""
-    success = firebase_db.delete('groups', group_id)
+    success = await async_firebase_db.delete('groups', group_id)
     if not success:
         raise HTTPException(status_code=404, detail="Group not found")
     
@@ -143,7 +143,7 @@ async def create_category(
         'name': cat_data.get('name')
     }
     
-    category = firebase_db.create('categories', cat_doc, cat_id)
+    category = await async_firebase_db.create('categories', cat_doc, cat_id)
     if not category:
         raise HTTPException(status_code=400, detail="Failed to create category")
     
@@ -157,7 +157,7 @@ async def get_categories(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Get all categories"""
-    categories = firebase_db.get_all('categories')
+    categories = await async_firebase_db.get_all('categories')
     return ResponseModel(
         data=categories,
         message="Categories retrieved successfully"
@@ -170,7 +170,7 @@ async def update_category(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Update category"""
-    category = firebase_db.update('categories', cat_id, {'name': cat_data.get('name')})
+    category = await async_firebase_db.update('categories', cat_id, {'name': cat_data.get('name')})
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
     
@@ -185,7 +185,7 @@ async def delete_category(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Delete category"""
-    success = firebase_db.delete('categories', cat_id)
+    success = await async_firebase_db.delete('categories', cat_id)
     if not success:
         raise HTTPException(status_code=404, detail="Category not found")
     
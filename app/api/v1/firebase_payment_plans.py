@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-from app.core.firebase_db import firebase_db
+from app.core.firebase_db import async_firebase_db
 from app.schemas.common import ResponseModel
-from app.utils.dependencies import get_current_admin
+from app.utils.dependencies import get_current_admin, PageParams
 from app.models import Admin
 from typing import Dict, Any
 import uuid
 
 router = APIRouter()
 
+# Fields list endpoints may be sorted by
+ORDER_FIELDS = ('name', 'price', 'created_at')
+
 @router.post("/", response_model=ResponseModel)
 async def create_payment_plan(
     plan_data: Dict[str, Any],
@@ -24,7 +27,7 @@ async def create_payment_plan(
         'is_popular': plan_data.get('is_popular', False)
     }
     
-    plan = firebase_db.create('payment_plans', plan_doc, plan_id)
+    plan = await async_firebase_db.create('payment_plans', plan_doc, plan_id)
     if not plan:
         raise HTTPException(status_code=400, detail="Failed to create payment plan")
     
@@ -35,13 +38,15 @@ async def create_payment_plan(
 
 @router.get("/", response_model=ResponseModel)
 async def get_payment_plans(
+    page: PageParams = Depends(),
     current_admin: Admin = Depends(get_current_admin)
 ):
-    """Get all payment plans"""
-    plans = firebase_db.get_all('payment_plans')
+    """Get a page of payment plans"""
+    plans, next_cursor = await async_firebase_db.get_page('payment_plans', **page.query(ORDER_FIELDS))
     return ResponseModel(
         data=plans,
-        message="Payment plans retrieved successfully"
+        message="Payment plans retrieved successfully",
+        next_cursor=next_cursor
     )
 
 @router.put("/{plan_id}", response_model=ResponseModel)
@@ -64,7 +69,7 @@ async def update_payment_plan(
     if 'is_popular' in plan_data:
         update_data['is_popular'] = plan_data['is_popular']
     
-    plan = firebase_db.update('payment_plans', plan_id, update_data)
+    plan = await async_firebase_db.update('payment_plans', plan_id, update_data)
     if not plan:
         raise HTTPException(status_code=404, detail="Payment plan not found")
     
@@ -79,7 +84,7 @@ async def delete_payment_plan(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Delete payment plan"""
-    success = firebase_db.delete('payment_plans', plan_id)
+    success = await async_firebase_db.delete('payment_plans', plan_id)
     if not success:
         raise HTTPException(status_code=404, detail="Payment plan not found")
     
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-from app.core.firebase_db import firebase_db
+from app.core.firebase_db import async_firebase_db
 from app.schemas.common import ResponseModel
-from app.utils.dependencies import get_current_admin
+from app.utils.dependencies import get_current_admin, PageParams
 from app.models import Admin
 from typing import Dict, Any
 import uuid
 
 router = APIRouter()
 
+# Fields list endpoints may be sorted by
+ORDER_FIELDS = ('title', 'category', 'created_at')
+
 @router.post("/", response_model=ResponseModel)
 async def create_portfolio_case(
     case_data: Dict[str, Any],
@@ -24,7 +27,7 @@ async def create_portfolio_case(
         'link': case_data.get('link', '#')
     }
     
-    case = firebase_db.create('portfolio_cases', case_doc, case_id)
+    case = await async_firebase_db.create('portfolio_cases', case_doc, case_id)
     if not case:
         raise HTTPException(status_code=400, detail="Failed to create portfolio case")
     
@@ -35,22 +38,25 @@ async def create_portfolio_case(
 
 @router.get("/", response_model=ResponseModel)
 async def get_portfolio_cases(
+    page: PageParams = Depends(),
     current_admin: Admin = Depends(get_current_admin)
 ):
-    """Get all portfolio cases"""
-    cases = firebase_db.get_all('portfolio_cases')
+    """Get a page of portfolio cases"""
+    cases, next_cursor = await async_firebase_db.get_page('portfolio_cases', **page.query(ORDER_FIELDS))
     return ResponseModel(
         data=cases,
-        message="Portfolio cases retrieved successfully"
+        message="Portfolio cases retrieved successfully",
+        next_cursor=next_cursor
     )
 
 @router.get("/public", response_model=ResponseModel)
-async def get_public_portfolio_cases():
-    """Get public portfolio cases (no auth required)"""
-    cases = firebase_db.get_all('portfolio_cases')
+async def get_public_portfolio_cases(page: PageParams = Depends()):
+    """Get a page of public portfolio cases (no auth required)"""
+    cases, next_cursor = await async_firebase_db.get_page('portfolio_cases', **page.query(ORDER_FIELDS))
     return ResponseModel(
         data=cases,
-        message="Public portfolio cases retrieved successfully"
+        message="Public portfolio cases retrieved successfully",
+        next_cursor=next_cursor
     )
 
 @router.put("/{case_id}", response_model=ResponseModel)
@@ -73,7 +79,7 @@ async def update_portfolio_case(
     if 'link' in case_data:
         update_data['link'] = case_data['link']
     
-    case = firebase_db.update('portfolio_cases', case_id, update_data)
+    case = await async_firebase_db.update('portfolio_cases', case_id, update_data)
     if not case:
         raise HTTPException(status_code=404, detail="Portfolio case not found")
     
@@ -88,7 +94,7 @@ async def delete_portfolio_case(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Delete portfolio case"""
-    success = firebase_db.delete('portfolio_cases', case_id)
+    success = await async_firebase_db.delete('portfolio_cases', case_id)
     if not success:
         raise HTTPException(status_code=404, detail="Portfolio case not found")
     
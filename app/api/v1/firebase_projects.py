@@ -1,19 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from app.services.firebase_project_service import FirebaseProjectService
 from app.schemas.common import ResponseModel
-from app.utils.dependencies import get_current_admin, get_current_user
+from app.utils.dependencies import get_current_admin, get_current_user, PageParams
 from app.models import Admin, User
 from typing import List, Dict, Any
 
 router = APIRouter()
 
+# Fields list endpoints may be sorted by
+ORDER_FIELDS = ('name', 'start_date', 'created_at')
+
 @router.post("/", response_model=ResponseModel)
 async def create_project(
     project_data: Dict[str, Any],
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Create new project"""
-    project = FirebaseProjectService.create_project(project_data)
+    project = await FirebaseProjectService.create_project(project_data)
     if not project:
         raise HTTPException(status_code=400, detail="Failed to create project")
     
@@ -26,13 +29,17 @@ async def create_project(
 async def get_projects(
     client_id: str = Query(None),
     search: str = Query(None),
+    page: PageParams = Depends(),
     current_admin: Admin = Depends(get_current_admin)
 ):
-    """Get list of projects"""
-    projects = FirebaseProjectService.get_projects(client_id=client_id, search=search)
+    """Get a page of projects"""
+    projects, next_cursor = await FirebaseProjectService.get_projects(
+        client_id=client_id, search=search, **page.query(ORDER_FIELDS)
+    )
     return ResponseModel(
         data=projects,
-        message="Projects retrieved successfully"
+        message="Projects retrieved successfully",
+        next_cursor=next_cursor
     )
 
 @router.get("/{project_id}", response_model=ResponseModel)
@@ -41,7 +48,7 @@ async def get_project(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Get project by ID"""
-    project = FirebaseProjectService.get_project(project_id)
+    project = await FirebaseProjectService.get_project(project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -57,7 +64,7 @@ async def update_project(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Update project"""
-    project = FirebaseProjectService.update_project(project_id, project_data)
+    project = await FirebaseProjectService.update_project(project_id, project_data)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -72,7 +79,7 @@ async def delete_project(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Delete project"""
-    success = FirebaseProjectService.delete_project(project_id)
+    success = await FirebaseProjectService.delete_project(project_id)
     if not success:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -103,7 +110,7 @@ async def get_user_projects(
     if not user_id:
         raise HTTPException(status_code=400, detail="User ID not found")
     
-    projects = FirebaseProjectService.get_user_projects(user_id)
+    projects = await FirebaseProjectService.get_user_projects(user_id)
     return ResponseModel(
         data=projects,
         message="User projects retrieved successfully"
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
-from app.core.firebase_db import firebase_db
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Query
+from app.core.firebase_db import async_firebase_db
 from app.schemas.common import ResponseModel
-from app.utils.dependencies import get_current_admin, get_current_user
+from app.utils.dependencies import get_current_admin, get_current_user, PageParams
 from app.models import Admin
 from app.core.security import get_password_hash, verify_password
 from app.services.firebase_storage_service import firebase_storage_service
@@ -10,6 +10,19 @@ import uuid
 
 router = APIRouter()
 
+# Fields list endpoints may be sorted by
+ORDER_FIELDS = ('name', 'email', 'created_at')
+
+# Fields admins can read; reads project onto these, so password hashes never leave Firestore
+USER_FIELDS = (
+    'name', 'email', 'position', 'client_id', 'role', 'dashboard_access', 'project_ids',
+    'avatar_url', 'is_active', 'created_at', 'updated_at'
+)
+
+def _public_user(user: Dict[str, Any]) -> Dict[str, Any]:
+    """A user document as written, projected onto USER_FIELDS like reads are"""
+    return {'id': user['id'], **{field: user[field] for field in USER_FIELDS if field in user}}
+
 @router.post("/", response_model=ResponseModel)
 async def create_user(
     user_data: Dict[str, Any],
@@ -30,24 +43,29 @@ async def create_user(
         'password_hash': get_password_hash(user_data.get('password', 'password'))
     }
     
-    user = firebase_db.create('users', user_doc, user_id)
+    user = await async_firebase_db.create('users', user_doc, user_id)
     if not user:
         raise HTTPException(status_code=400, detail="Failed to create user")
     
     return ResponseModel(
-        data=user,
+        data=_public_user(user),
         message="User created successfully"
     )
 
 @router.get("/", response_model=ResponseModel)
 async def get_users(
+    search: str = Query(None, description="Match names or emails with a word starting with this text"),
+    page: PageParams = Depends(),
     current_admin: Admin = Depends(get_current_admin)
 ):
-    """Get all users"""
-    users = firebase_db.get_all('users')
+    """Get a page of users"""
+    users, next_cursor = await async_firebase_db.search_page(
+        'users', search, **page.query(ORDER_FIELDS, USER_FIELDS)
+    )
     return ResponseModel(
         data=users,
-        message="Users retrieved successfully"
+        message="Users retrieved successfully",
+        next_cursor=next_cursor
     )
 
 @router.get("/{user_id}", response_model=ResponseModel)
@@ -56,7 +74,7 @@ async def get_user(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Get user by ID"""
-    user = firebase_db.get_by_id('users', user_id)
+    user = await async_firebase_db.get_by_id('users', user_id, fields=list(USER_FIELDS))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -93,12 +111,12 @@ async def update_user(
     if 'password' in user_data and user_data['password']:
         update_data['password_hash'] = get_password_hash(user_data['password'])
     
-    user = firebase_db.update('users', user_id, update_data)
+    user = await async_firebase_db.update('users', user_id, update_data)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     return ResponseModel(
-        data=user,
+        data=_public_user(user),
         message="User updated successfully"
     )
 
@@ -108,7 +126,7 @@ async def delete_user(
     current_admin: Admin = Depends(get_current_admin)
 ):
     """Delete user"""
-    success = firebase_db.delete('users', user_id)
+    success = await async_firebase_db.delete('users', user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -131,12 +149,12 @@ async def update_user_profile(
     if 'avatar_url' in profile_data:
         update_data['avatar_url'] = profile_data['avatar_url']
     
-    user = firebase_db.update('users', user_id, update_data)
+    user = await async_firebase_db.update('users', user_id, update_data)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     return ResponseModel(
-        data=user,
+        data=_public_user(user),
         message="Profile updated successfully"
     )
 
@@ -157,13 +175,15 @@ async def change_user_password(
         raise HTTPException(status_code=400, detail="Current and new passwords are required")
     
     # Verify current password
-    user = firebase_db.get_by_id('users', user_id)
+    user = await async_firebase_db.get_by_id('users', user_id)
     if not user or not verify_password(current_password, user.get('password_hash', '')):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Update password
     new_password_hash = get_password_hash(new_password)
-    updated_user = firebase_db.update('users', user_id, {'password_hash': new_password_hash})
+    updated_user = await async_firebase_db.update(
+        'users', user_id, {'password_hash': new_password_hash}, return_document=False
+    )
     
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -185,7 +205,7 @@ async def upload_user_avatar(
         avatar_url = await firebase_storage_service.upload_avatar(file, user_id)
         
         # Update user record
-        user = firebase_db.update('users', user_id, {'avatar_url': avatar_url})
+        user = await async_firebase_db.update('users', user_id, {'avatar_url': avatar_url})
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -65,7 +65,7 @@ async def update_department(
         if existing:
             raise HTTPException(status_code=400, detail="Department name already exists")
     
-    updated_department = firebase_db.update('departments', department_id, update_dict)
+    updated_department = firebase_db.update('departments', department_id, update_dict, current=department)
     if not updated_department:
         raise HTTPException(status_code=404, detail="Department not found")
     
@@ -143,7 +143,7 @@ async def update_group(
         if existing:
             raise HTTPException(status_code=400, detail="Group name already exists")
     
-    updated_group = firebase_db.update('groups', group_id, update_dict)
+    updated_group = firebase_db.update('groups', group_id, update_dict, current=group)
     if not updated_group:
         raise HTTPException(status_code=404, detail="Group not found")
     
@@ -159,12 +159,14 @@ async def delete_group(
     current_admin: Dict[str, Any] = Depends(get_current_admin)
 ):
     """Delete group"""
-    # Remove group from clients first
+    # Remove group from clients in the same commit as the group itself
     clients = firebase_db.get_all('clients', [('group_id', '==', group_id)])
-    for client in clients:
-        firebase_db.update('clients', client['id'], {'group_id': None})
+    with firebase_db.batch() as batch:
+        for client in clients:
+            batch.update('clients', client['id'], {'group_id': None})
+        batch.delete('groups', group_id)
     
-    success = firebase_db.delete('groups', group_id)
+    success = all(batch.results)
     if not success:
         raise HTTPException(status_code=404, detail="Group not found")
     
@@ -226,7 +228,7 @@ async def update_category(
         if existing:
             raise HTTPException(status_code=400, detail="Category name already exists")
     
-    updated_category = firebase_db.update('categories', category_id, update_dict)
+    updated_category = firebase_db.update('categories', category_id, update_dict, current=category)
     if not updated_category:
         raise HTTPException(status_code=404, detail="Category not found")
     
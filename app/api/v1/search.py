@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from app.schemas.common import ResponseModel
+from app.services.search_index import INDEXED_SOURCES, typeahead_index
+from app.utils.dependencies import get_current_admin
+from app.models import Admin
+from typing import Optional
+
+router = APIRouter()
+
+HIT_TYPES = tuple(source['type'] for source in INDEXED_SOURCES.values())
+
+@router.get("/search", response_model=ResponseModel)
+async def search(
+    q: str = Query(..., min_length=1, description="Text matched at word starts"),
+    limit: int = Query(10, ge=1, le=50),
+    types: Optional[str] = Query(None, description=f"Comma-separated hit types: {', '.join(HIT_TYPES)}"),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Typeahead search across clients, projects, users and invoices"""
+    selected = [t.strip() for t in types.split(',') if t.strip()] if types else None
+    if selected and any(t not in HIT_TYPES for t in selected):
+        raise HTTPException(status_code=400, detail=f"types must be among: {', '.join(HIT_TYPES)}")
+    
+    if not typeahead_index.loaded:
+        await run_in_threadpool(typeahead_index.ensure_loaded)
+    
+    return ResponseModel(
+        data=typeahead_index.search(q, limit, selected),
+        message="Search results retrieved successfully"
+    )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
-from app.core.firebase_db import firebase_db
+from app.core.firebase_db import async_firebase_db
 from app.schemas.common import ResponseModel
 from app.utils.dependencies import get_current_user
 from app.core.security import get_password_hash, verify_password
@@ -24,7 +24,7 @@ async def update_user_profile(
     if 'avatar_url' in profile_data:
         update_data['avatar_url'] = profile_data['avatar_url']
     
-    user = firebase_db.update('users', user_id, update_data)
+    user = await async_firebase_db.update('users', user_id, update_data)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -50,13 +50,15 @@ async def change_user_password(
         raise HTTPException(status_code=400, detail="Current and new passwords are required")
     
     # Verify current password
-    user = firebase_db.get_by_id('users', user_id)
+    user = await async_firebase_db.get_by_id('users', user_id)
     if not user or not verify_password(current_password, user.get('password_hash', '')):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Update password
     new_password_hash = get_password_hash(new_password)
-    updated_user = firebase_db.update('users', user_id, {'password_hash': new_password_hash})
+    updated_user = await async_firebase_db.update(
+        'users', user_id, {'password_hash': new_password_hash}, return_document=False
+    )
     
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -78,7 +80,7 @@ async def upload_user_avatar(
         avatar_url = await firebase_storage_service.upload_avatar(file, user_id)
         
         # Update user record
-        user = firebase_db.update('users', user_id, {'avatar_url': avatar_url})
+        user = await async_firebase_db.update('users', user_id, {'avatar_url': avatar_url})
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -101,7 +103,7 @@ async def get_user_invoices(
         return ResponseModel(data=[], message="No client or projects associated with user")
     
     # Get invoices for this client that are also for the user's assigned projects
-    all_invoices = firebase_db.get_all('invoices', [('client_id', '==', user_client_id)])
+    all_invoices = await async_firebase_db.get_all('invoices', [('client_id', '==', user_client_id)])
     
     # Filter invoices to only include those for user's assigned projects
     user_invoices = []
@@ -111,7 +113,7 @@ async def get_user_invoices(
             user_invoices.append(invoice)
     
     # Get client data
-    client = firebase_db.get_by_id('clients', user_client_id)
+    client = await async_firebase_db.get_by_id('clients', user_client_id)
     client_data = None
     if client:
         client_data = {
@@ -39,11 +39,57 @@ class Settings(BaseSettings):
     FIREBASE_STORAGE_BUCKET: str
     FIREBASE_MESSAGING_SENDER_ID: str
     FIREBASE_APP_ID: str
+    # Set when the bucket grants public read through IAM (allUsers: Storage Object Viewer),
+    # so uploads skip the per-object make_public call
+    FIREBASE_STORAGE_PUBLIC_READ: bool = False
+    
+    # Dashboard deploys
+    DEPLOY_MAX_PARALLEL_BUILDS: int = 1
+    DEPLOY_BUILD_TIMEOUT_SECONDS: int = 900
+    DEPLOY_BUILD_MEMORY_MB: int = 768  # V8 heap cap for npm and the bundler
+    DEPLOY_BUILD_PROCESS_MEMORY_MB: int = 1024  # OS limit on each build process's writable memory; 0 disables
+    DEPLOY_SPOOL_DIR: str = "/tmp/dashboard-deploys"
+    DEPLOY_ZIP_MAX_BYTES: int = 209715200  # 200MB
+    DEPLOY_ZIP_MAX_UNCOMPRESSED_BYTES: int = 524288000  # 500MB
+    DEPLOY_ZIP_MAX_ENTRIES: int = 20000  # whole listing, including directories and skipped node_modules
+    # /tmp is in-memory on Cloud Run, so the build caches stay off unless pointed at a mounted volume
+    NPM_CACHE_DIR: str = "/tmp/npm-cache"
+    NPM_CACHE_MAX_BYTES: int = 0  # 0 clears npm's download cache after every install
+    NODE_MODULES_CACHE_DIR: str = "/tmp/node-modules-cache"
+    NODE_MODULES_CACHE_MAX_BYTES: int = 0  # 0 disables the node_modules cache
+    DASHBOARD_UPLOAD_CONCURRENCY: int = 16
+    DASHBOARD_UPLOAD_RETRIES: int = 3
+    DASHBOARD_RELEASES_RETAINED: int = 5  # deployed builds kept for rollback
+    DASHBOARD_GC_INTERVAL_SECONDS: int = 86400  # 0 disables the periodic storage cleanup
+    DASHBOARD_GC_GRACE_SECONDS: int = 3600  # files newer than this are never collected
+    
+    # Pagination
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 200
+    
+    # Admin search
+    SEARCH_INDEX_REBUILD_SECONDS: int = 3600  # re-read indexed collections to pick up other instances' writes; 0 disables
+    
+    # Admin dashboard stats
+    DASHBOARD_STATS_TTL_SECONDS: int = 60
+    DASHBOARD_STATS_CURRENCIES: str = "USD,EUR,GBP"  # revenue is summed per currency; the first is total_revenue
+    
+    # Caching
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+    DASHBOARD_CACHE_DIR: str = "/tmp/dashboard-cache"
+    DASHBOARD_CACHE_DISK_MAX_BYTES: int = 0  # 0 disables the disk tier; /tmp is in-memory on Cloud Run
+    DASHBOARD_CACHE_MEMORY_MAX_BYTES: int = 67108864  # 64MB
+    DASHBOARD_CACHE_MEMORY_MAX_FILE_BYTES: int = 1048576  # 1MB
     
     @property
     def allowed_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
     
+    @property
+    def dashboard_stats_currencies_list(self) -> List[str]:
+        return [currency.strip() for currency in self.DASHBOARD_STATS_CURRENCIES.split(",") if currency.strip()]
+    
     class Config:
         env_file = ".env"
 
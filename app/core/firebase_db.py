@@ -1,8 +1,207 @@
 from app.services.firebase_admin_service import firebase_admin_service
-from typing import Dict, List, Optional, Any
+from app.core.config import settings
+from app.core.pagination import DOCUMENT_ID, decode_cursor, encode_cursor
+from app.core.search_keys import SEARCH_FIELDS, prefixes_key, search_keys, search_term, strip_search_keys
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Any, Tuple
+import asyncio
 import uuid
+import logging
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Firestore accepts at most this many writes per commit
+MAX_BATCH_WRITES = 500
+
+# Read-modify-write attempts for an update that returns the document, when it keeps changing underneath
+UPDATE_ATTEMPTS = 3
+
+# Document references sent per batched read
+GET_MANY_CHUNK_SIZE = 100
+
+# Callbacks notified after successful writes, keyed by collection.
+# Each callback receives (collection, doc_id, data); data is None on delete.
+_write_listeners: Dict[str, List[Callable[[str, str, Optional[Dict]], None]]] = {}
+
+def register_write_listener(collections: List[str], callback: Callable[[str, str, Optional[Dict]], None]) -> None:
+    """Register a callback fired after create/update/delete on the given collections"""
+    for collection in collections:
+        _write_listeners.setdefault(collection, []).append(callback)
+
+def _notify_write(collection: str, doc_id: str, data: Optional[Dict]) -> None:
+    """Notify listeners of a write; listener failures never fail the write"""
+    for callback in _write_listeners.get(collection, []):
+        try:
+            callback(collection, doc_id, data)
+        except Exception as e:
+            logger.error(f"Write listener failed for {collection}/{doc_id}: {e}")
+
+def _merge_update(collection: str, doc_id: str, data: Dict, current: Optional[Dict]) -> Dict:
+    """The document as written, without reading it back; only the written fields when current is None"""
+    return strip_search_keys(collection, {**(current or {}), **data, 'id': doc_id})
+
+def _strip_all(collection: str, docs: List[Dict]) -> List[Dict]:
+    if collection in SEARCH_FIELDS:
+        for doc in docs:
+            strip_search_keys(collection, doc)
+    return docs
+
+def _unique_ids(doc_ids: List[str]) -> List[str]:
+    """Drop empty and repeated IDs, keeping first-seen order"""
+    return list(dict.fromkeys(doc_id for doc_id in doc_ids if doc_id))
+
+def _in_order(doc_ids: List[str], docs: List[Dict]) -> List[Dict]:
+    """Batched reads return documents in arbitrary order; restore the requested one"""
+    by_id = {doc['id']: doc for doc in docs}
+    return [by_id[doc_id] for doc_id in doc_ids if doc_id in by_id]
+
+def _page_query(order_by: Optional[str], cursor: Optional[str]) -> Tuple[str, Optional[List]]:
+    """Ordering and start_after values for a page; every page is ordered so cursors stay stable"""
+    start_after = decode_cursor(cursor, order_by) if cursor else None
+    return order_by or DOCUMENT_ID, start_after
+
+def _page_fields(fields: Optional[List[str]], order_by: Optional[str]) -> Optional[List[str]]:
+    """A page projection always includes the ordering field, which the next cursor is built from"""
+    if fields is None or not order_by or order_by.lstrip('-') in fields:
+        return fields
+    return [*fields, order_by.lstrip('-')]
+
+def _page_result(docs: List[Dict], limit: int, order_by: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+    """Trim the look-ahead document and build the cursor for the next page, if there is one"""
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(order_by, docs[-1])
+
+def _search_queries(collection: str, term: str, filters: Optional[List]) -> List[List]:
+    """One filter list per searchable field; a document matches if any of them does"""
+    fields = SEARCH_FIELDS.get(collection)
+    if not fields:
+        raise ValueError(f"{collection} is not searchable")
+    return [list(filters or []) + [(prefixes_key(field), 'array_contains', term)] for field in fields]
+
+def _merge_pages(pages: List[List[Dict]], limit: int, order_by: Optional[str]) -> Tuple[List[Dict], Optional[str]]:
+    """Combine look-ahead pages read with the same ordering and cursor into one page.
+    
+    Each query returns its own first limit+1 matches, so the first limit
+    documents of their union are the first limit matches overall.
+    """
+    by_id = {}
+    for docs in pages:
+        for doc in docs:
+            by_id.setdefault(doc['id'], doc)
+    field = order_by.lstrip('-') if order_by else None
+    docs = sorted(
+        by_id.values(),
+        key=lambda doc: (doc.get(field), doc['id']) if field else doc['id'],
+        reverse=bool(order_by and order_by.startswith('-'))
+    )
+    return _page_result(docs, limit, order_by)
+
+def _update_write(collection: str, doc_id: str, data: Dict, update_time: Any) -> Dict:
+    """An update that only applies while the document is unchanged since it was read"""
+    return {'op': 'update', 'collection': collection, 'doc_id': doc_id, 'data': data, 'update_time': update_time}
+
+def _new_doc_id(collection: str) -> str:
+    return f"{collection[:-1]}-{uuid.uuid4().hex[:8]}"
+
+class TransactionConflict(Exception):
+    """A transaction could not commit, usually because a document it read has changed since"""
+
+class WriteBatch:
+    """Writes queued for as few commits as possible.
+
+    create/update/delete mirror FirebaseDB (including timestamps) but only
+    record the write. commit() sends them in chunks of MAX_BATCH_WRITES, each
+    chunk atomic, and returns one bool per write in queue order. An update of
+    a missing document fails its whole chunk.
+    """
+    
+    def __init__(self, service):
+        self.service = service
+        self.writes: List[Dict] = []
+        self.results: Optional[List[bool]] = None
+
+    def create(self, collection: str, data: Dict, custom_id: str = None) -> str:
+        """Queue a document creation, returning its ID"""
+        doc_id = custom_id or _new_doc_id(collection)
+        now = datetime.utcnow().isoformat()
+        data.update({'created_at': now, 'updated_at': now, **search_keys(collection, data)})
+        self._queue('set', collection, doc_id, data)
+        return doc_id
+
+    def update(self, collection: str, doc_id: str, data: Dict) -> None:
+        data.update({'updated_at': datetime.utcnow().isoformat(), **search_keys(collection, data)})
+        self._queue('update', collection, doc_id, data)
+
+    def delete(self, collection: str, doc_id: str) -> None:
+        self._queue('delete', collection, doc_id, None)
+
+    def _queue(self, op: str, collection: str, doc_id: str, data: Optional[Dict], **extra) -> None:
+        self.writes.append({'op': op, 'collection': collection, 'doc_id': doc_id, 'data': data, **extra})
+
+    def _chunks(self) -> List[List[Dict]]:
+        return [self.writes[i:i + MAX_BATCH_WRITES] for i in range(0, len(self.writes), MAX_BATCH_WRITES)]
+
+    def _record(self, chunk: List[Dict], committed: bool) -> None:
+        self.results.extend([committed] * len(chunk))
+        if committed:
+            for write in chunk:
+                _notify_write(write['collection'], write['doc_id'], write['data'])
+
+    def commit(self) -> List[bool]:
+        self.results = []
+        for chunk in self._chunks():
+            self._record(chunk, self.service.commit_writes(chunk))
+        self.writes = []
+        return self.results
+
+    async def commit_async(self) -> List[bool]:
+        self.results = []
+        for chunk in self._chunks():
+            self._record(chunk, await self.service.commit_writes_async(chunk))
+        self.writes = []
+        return self.results
+
+class Transaction(WriteBatch):
+    """Read-modify-write across documents in a single atomic commit.
+
+    Reads go straight to Firestore and remember each document's update time;
+    writes to a document that was read only apply if it is still unchanged,
+    and creating a document read as missing fails if it has appeared since.
+    Nothing is retried: on conflict commit() raises TransactionConflict and
+    none of the writes apply.
+    """
+    
+    def __init__(self, service):
+        super().__init__(service)
+        self._versions: Dict[tuple, Any] = {}
+
+    def get_by_id(self, collection: str, doc_id: str) -> Optional[Dict]:
+        doc, update_time = self.service.get_document_version(collection, doc_id)
+        self._versions[(collection, doc_id)] = update_time
+        return doc
+
+    def _queue(self, op: str, collection: str, doc_id: str, data: Optional[Dict], **extra) -> None:
+        key = (collection, doc_id)
+        if key in self._versions:
+            if self._versions[key] is None:
+                if op == 'set':
+                    op = 'create'
+            else:
+                # Every write to a document read here, sets included, requires it unchanged
+                extra['update_time'] = self._versions[key]
+        super()._queue(op, collection, doc_id, data, **extra)
+
+    def commit(self) -> List[bool]:
+        if len(self.writes) > MAX_BATCH_WRITES:
+            raise ValueError(f"A transaction can write at most {MAX_BATCH_WRITES} documents")
+        results = super().commit()
+        if not all(results):
+            raise TransactionConflict("Transaction failed to commit; no writes were applied")
+        return results
+
 class FirebaseDB:
     """Firebase database operations replacing SQLAlchemy"""
     
@@ -12,37 +211,186 @@ class FirebaseDB:
     # Generic CRUD operations
     def create(self, collection: str, data: Dict, custom_id: str = None) -> Optional[Dict]:
         """Create a new document"""
-        doc_id = custom_id or f"{collection[:-1]}-{uuid.uuid4().hex[:8]}"
+        doc_id = custom_id or _new_doc_id(collection)
         
-        # Add timestamps
+        # Add timestamps and search keys
         data.update({
             'created_at': datetime.utcnow().isoformat(),
-            'updated_at': datetime.utcnow().isoformat()
+            'updated_at': datetime.utcnow().isoformat(),
+            **search_keys(collection, data)
         })
         
         if self.service.create_document(collection, doc_id, data):
+            _notify_write(collection, doc_id, data)
             return {"id": doc_id, **data}
         return None
 
-    def get_by_id(self, collection: str, doc_id: str) -> Optional[Dict]:
-        """Get document by ID"""
-        return self.service.get_document(collection, doc_id)
+    def get_by_id(self, collection: str, doc_id: str, fields: Optional[List[str]] = None) -> Optional[Dict]:
+        """Get document by ID; with fields, only those fields (and the ID) are read"""
+        return strip_search_keys(collection, self.service.get_document(collection, doc_id, fields))
+
+    def get_all(
+        self,
+        collection: str,
+        filters: List = None,
+        limit: int = None,
+        order_by: Optional[str] = None,
+        start_after: Optional[List] = None,
+        fields: Optional[List[str]] = None,
+        raise_errors: bool = False
+    ) -> List[Dict]:
+        """Get all documents from collection.
+        
+        order_by is a field name, '-' prefixed for descending; documents
+        without that field are not returned. start_after continues after the
+        given order_by value and document ID. fields limits each document to
+        those field paths, read server-side with a projection. A failed read
+        returns [] unless raise_errors is set.
+        """
+        docs = self.service.get_collection(
+            collection, filters, limit, order_by, start_after, fields, raise_errors=raise_errors
+        )
+        return _strip_all(collection, docs)
+
+    def get_page(
+        self,
+        collection: str,
+        filters: List = None,
+        limit: int = None,
+        order_by: Optional[str] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Get one page of a collection and the cursor for the next page (None on the last).
+        
+        The order_by field is always read, since the next cursor is built from
+        it. Raises ValueError for a cursor that is malformed or from another
+        ordering.
+        """
+        limit = limit or settings.PAGE_SIZE_DEFAULT
+        query_order, start_after = _page_query(order_by, cursor)
+        docs = self.service.get_collection(
+            collection, filters, limit + 1, query_order, start_after, _page_fields(fields, order_by)
+        )
+        return _page_result(_strip_all(collection, docs), limit, order_by)
+
+    def search_page(
+        self,
+        collection: str,
+        term: str,
+        filters: List = None,
+        limit: int = None,
+        order_by: Optional[str] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Get one page of documents with a searchable field containing a word starting with term.
+        
+        Runs one indexed array_contains query per field in SEARCH_FIELDS and
+        pages like get_page. With filters or order_by, Firestore needs a
+        composite index on those fields and the search field's prefixes.
+        """
+        limit = limit or settings.PAGE_SIZE_DEFAULT
+        query_order, start_after = _page_query(order_by, cursor)
+        term = search_term(term)
+        if term is None:
+            return self.get_page(collection, filters, limit, order_by, cursor, fields)
+        
+        fields = _page_fields(fields, order_by)
+        pages = [
+            self.service.get_collection(collection, query, limit + 1, query_order, start_after, fields)
+            for query in _search_queries(collection, term, filters)
+        ]
+        docs, next_cursor = _merge_pages(pages, limit, order_by)
+        return _strip_all(collection, docs), next_cursor
 
-    def get_all(self, collection: str, filters: List = None, limit: int = None) -> List[Dict]:
-        """Get all documents from collection"""
-        return self.service.get_collection(collection, filters, limit)
+    def aggregate(
+        self,
+        collection: str,
+        aggregations: List[Tuple[str, Optional[str], str]],
+        filters: List = None
+    ) -> Optional[Dict[str, Any]]:
+        """Count, sum or average matching documents server-side, without reading them.
+        
+        aggregations are (kind, field, alias) triples, kind being 'count',
+        'sum' or 'avg'; results are keyed by alias. None if the query failed.
+        """
+        return self.service.aggregate(collection, aggregations, filters)
+
+    def get_many(self, collection: str, doc_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict]:
+        """Get documents by ID in batched reads, in the order requested.
+        
+        Repeated IDs are fetched once and missing documents are left out.
+        fields works as in get_by_id.
+        """
+        doc_ids = _unique_ids(doc_ids)
+        docs = []
+        for i in range(0, len(doc_ids), GET_MANY_CHUNK_SIZE):
+            docs.extend(self.service.get_documents(collection, doc_ids[i:i + GET_MANY_CHUNK_SIZE], fields))
+        return _in_order(doc_ids, _strip_all(collection, docs))
 
-    def update(self, collection: str, doc_id: str, data: Dict) -> Optional[Dict]:
-        """Update document"""
-        data['updated_at'] = datetime.utcnow().isoformat()
+    def update(
+        self,
+        collection: str,
+        doc_id: str,
+        data: Dict,
+        return_document: bool = True,
+        current: Optional[Dict] = None
+    ) -> Optional[Dict]:
+        """Update document.
+        
+        Returns the document merged with the update: from ``current`` when the
+        caller already holds it, otherwise from a read whose version the write
+        is conditioned on, so the result is exactly what was stored. With
+        return_document=False, meant for internal callers, only the write is
+        issued and the written fields are returned. None means the document
+        does not exist; TransactionConflict that it kept changing.
+        """
+        data.update({'updated_at': datetime.utcnow().isoformat(), **search_keys(collection, data)})
+        
+        if return_document and current is None:
+            for _ in range(UPDATE_ATTEMPTS):
+                current, update_time = self.service.get_document_version(collection, doc_id)
+                if current is None:
+                    return None
+                if self.service.commit_writes([_update_write(collection, doc_id, data, update_time)]):
+                    _notify_write(collection, doc_id, data)
+                    return _merge_update(collection, doc_id, data, current)
+            raise TransactionConflict(f"{collection}/{doc_id} changed during every update attempt")
         
         if self.service.update_document(collection, doc_id, data):
-            return self.get_by_id(collection, doc_id)
+            _notify_write(collection, doc_id, data)
+            return _merge_update(collection, doc_id, data, current if return_document else None)
         return None
 
     def delete(self, collection: str, doc_id: str) -> bool:
         """Delete document"""
-        return self.service.delete_document(collection, doc_id)
+        if self.service.delete_document(collection, doc_id):
+            _notify_write(collection, doc_id, None)
+            return True
+        return False
+
+    @contextmanager
+    def batch(self) -> Iterator[WriteBatch]:
+        """Group writes into as few commits as possible; they are sent when the block exits.
+        
+        Per-write results are on the batch's ``results`` afterwards. Writes are
+        discarded if the block raises.
+        """
+        batch = WriteBatch(self.service)
+        yield batch
+        batch.commit()
+
+    @contextmanager
+    def transaction(self) -> Iterator[Transaction]:
+        """Read documents and commit dependent writes atomically when the block exits.
+        
+        Raises TransactionConflict if a document read in the block changed
+        before the commit.
+        """
+        transaction = Transaction(self.service)
+        yield transaction
+        transaction.commit()
 
     # Specific collection operations
     def get_projects(self, client_id: str = None, status: str = None) -> List[Dict]:
@@ -81,5 +429,186 @@ class FirebaseDB:
         """Get current timestamp in ISO format"""
         return datetime.utcnow().isoformat()
 
-# Global instance
-firebase_db = FirebaseDB()
\ No newline at end of file
+class AsyncFirebaseDB:
+    """Async counterpart of FirebaseDB backed by the async Firestore client.
+
+    Exposes the same method surface so request handlers can ``await`` reads
+    and writes instead of blocking the event loop on a gRPC round trip.
+    """
+    
+    def __init__(self):
+        self.service = firebase_admin_service
+
+    # Generic CRUD operations
+    async def create(self, collection: str, data: Dict, custom_id: str = None) -> Optional[Dict]:
+        """Create a new document"""
+        doc_id = custom_id or _new_doc_id(collection)
+        
+        # Add timestamps and search keys
+        data.update({
+            'created_at': datetime.utcnow().isoformat(),
+            'updated_at': datetime.utcnow().isoformat(),
+            **search_keys(collection, data)
+        })
+        
+        if await self.service.create_document_async(collection, doc_id, data):
+            _notify_write(collection, doc_id, data)
+            return {"id": doc_id, **data}
+        return None
+
+    async def get_by_id(self, collection: str, doc_id: str, fields: Optional[List[str]] = None) -> Optional[Dict]:
+        """Get document by ID; see FirebaseDB.get_by_id"""
+        return strip_search_keys(collection, await self.service.get_document_async(collection, doc_id, fields))
+
+    async def get_all(
+        self,
+        collection: str,
+        filters: List = None,
+        limit: int = None,
+        order_by: Optional[str] = None,
+        start_after: Optional[List] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """Get all documents from collection; see FirebaseDB.get_all"""
+        docs = await self.service.get_collection_async(collection, filters, limit, order_by, start_after, fields)
+        return _strip_all(collection, docs)
+
+    async def get_page(
+        self,
+        collection: str,
+        filters: List = None,
+        limit: int = None,
+        order_by: Optional[str] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Get one page of a collection; see FirebaseDB.get_page"""
+        limit = limit or settings.PAGE_SIZE_DEFAULT
+        query_order, start_after = _page_query(order_by, cursor)
+        docs = await self.service.get_collection_async(
+            collection, filters, limit + 1, query_order, start_after, _page_fields(fields, order_by)
+        )
+        return _page_result(_strip_all(collection, docs), limit, order_by)
+
+    async def search_page(
+        self,
+        collection: str,
+        term: str,
+        filters: List = None,
+        limit: int = None,
+        order_by: Optional[str] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Search one page of documents, querying the searchable fields concurrently; see FirebaseDB.search_page"""
+        limit = limit or settings.PAGE_SIZE_DEFAULT
+        query_order, start_after = _page_query(order_by, cursor)
+        term = search_term(term)
+        if term is None:
+            return await self.get_page(collection, filters, limit, order_by, cursor, fields)
+        
+        fields = _page_fields(fields, order_by)
+        pages = await asyncio.gather(*(
+            self.service.get_collection_async(collection, query, limit + 1, query_order, start_after, fields)
+            for query in _search_queries(collection, term, filters)
+        ))
+        docs, next_cursor = _merge_pages(pages, limit, order_by)
+        return _strip_all(collection, docs), next_cursor
+
+    async def aggregate(
+        self,
+        collection: str,
+        aggregations: List[Tuple[str, Optional[str], str]],
+        filters: List = None
+    ) -> Optional[Dict[str, Any]]:
+        """Run aggregations server-side; see FirebaseDB.aggregate"""
+        return await self.service.aggregate_async(collection, aggregations, filters)
+
+    async def get_many(self, collection: str, doc_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict]:
+        """Get documents by ID in batched reads; see FirebaseDB.get_many"""
+        doc_ids = _unique_ids(doc_ids)
+        docs = []
+        for i in range(0, len(doc_ids), GET_MANY_CHUNK_SIZE):
+            docs.extend(await self.service.get_documents_async(collection, doc_ids[i:i + GET_MANY_CHUNK_SIZE], fields))
+        return _in_order(doc_ids, _strip_all(collection, docs))
+
+    async def update(
+        self,
+        collection: str,
+        doc_id: str,
+        data: Dict,
+        return_document: bool = True,
+        current: Optional[Dict] = None
+    ) -> Optional[Dict]:
+        """Update document; see FirebaseDB.update for what is returned"""
+        data.update({'updated_at': datetime.utcnow().isoformat(), **search_keys(collection, data)})
+        
+        if return_document and current is None:
+            for _ in range(UPDATE_ATTEMPTS):
+                current, update_time = await self.service.get_document_version_async(collection, doc_id)
+                if current is None:
+                    return None
+                if await self.service.commit_writes_async([_update_write(collection, doc_id, data, update_time)]):
+                    _notify_write(collection, doc_id, data)
+                    return _merge_update(collection, doc_id, data, current)
+            raise TransactionConflict(f"{collection}/{doc_id} changed during every update attempt")
+        
+        if await self.service.update_document_async(collection, doc_id, data):
+            _notify_write(collection, doc_id, data)
+            return _merge_update(collection, doc_id, data, current if return_document else None)
+        return None
+
+    async def delete(self, collection: str, doc_id: str) -> bool:
+        """Delete document"""
+        if await self.service.delete_document_async(collection, doc_id):
+            _notify_write(collection, doc_id, None)
+            return True
+        return False
+
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator[WriteBatch]:
+        """Group writes into as few commits as possible; see FirebaseDB.batch"""
+        batch = WriteBatch(self.service)
+        yield batch
+        await batch.commit_async()
+
+    # Specific collection operations
+    async def get_projects(self, client_id: str = None, status: str = None) -> List[Dict]:
+        """Get projects with optional filters"""
+        filters = []
+        if client_id:
+            filters.append(('client_id', '==', client_id))
+        if status:
+            filters.append(('status', '==', status))
+        return await self.get_all('projects', filters)
+
+    async def get_invoices(self, client_id: str = None, status: str = None) -> List[Dict]:
+        """Get invoices with optional filters"""
+        filters = []
+        if client_id:
+            filters.append(('client_id', '==', client_id))
+        if status:
+            filters.append(('status', '==', status))
+        return await self.get_all('invoices', filters)
+
+    async def get_users_by_client(self, client_id: str) -> List[Dict]:
+        """Get users by client ID"""
+        return await self.get_all('users', [('client_id', '==', client_id)])
+
+    async def get_user_by_email(self, email: str) -> Optional[Dict]:
+        """Get user by email"""
+        users = await self.get_all('users', [('email', '==', email)], limit=1)
+        return users[0] if users else None
+
+    async def get_admin_by_email(self, email: str) -> Optional[Dict]:
+        """Get admin by email"""
+        admins = await self.get_all('admins', [('email', '==', email)], limit=1)
+        return admins[0] if admins else None
+    
+    def _get_current_timestamp(self) -> str:
+        """Get current timestamp in ISO format"""
+        return datetime.utcnow().isoformat()
+
+# Global instances
+firebase_db = FirebaseDB()
+async_firebase_db = AsyncFirebaseDB()
\ No newline at end of file
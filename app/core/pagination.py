@@ -0,0 +1,30 @@
+from typing import Any, Dict, List, Optional
+import base64
+import binascii
+import json
+
+# Field path Firestore uses for the document ID in orderings and cursors
+DOCUMENT_ID = '__name__'
+
+
+def encode_cursor(order_by: Optional[str], doc: Dict[str, Any]) -> str:
+    """Opaque token resuming a listing after doc under the given ordering"""
+    values = [doc.get(order_by.lstrip('-'))] if order_by else []
+    values.append(doc['id'])
+    payload = json.dumps({'o': order_by, 'v': values}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str, order_by: Optional[str]) -> List[Any]:
+    """Cursor values from a token, raising ValueError for tokens that are malformed or from another ordering"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = payload['v']
+        cursor_order = payload.get('o')
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor")
+    
+    if cursor_order != order_by or not isinstance(values, list) or len(values) != (2 if order_by else 1):
+        raise ValueError("Cursor does not match the requested ordering")
+    return values
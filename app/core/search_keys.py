@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, Optional
+import re
+
+# Searchable fields per collection. Each is written with a {field}_prefixes
+# array of the lower-cased prefixes of every word-start suffix, so a search is
+# a single indexed array_contains query instead of a scan.
+SEARCH_FIELDS = {
+    'projects': ('name',),
+    'clients': ('company',),
+    'users': ('name', 'email'),
+}
+
+# Longest prefix indexed; longer search terms match on their first characters
+MAX_PREFIX_LENGTH = 30
+
+# Word starts indexed per value, which bounds the array at MAX_SEARCH_WORDS * MAX_PREFIX_LENGTH
+MAX_SEARCH_WORDS = 10
+
+_WORD_START = re.compile(r'(?<!\w)\w')
+
+
+def prefixes_key(field: str) -> str:
+    return f"{field}_prefixes"
+
+
+def normalize(value: Any) -> str:
+    """Case-folded text with whitespace runs collapsed"""
+    return ' '.join(str(value).lower().split())
+
+
+def word_starts(value: Any) -> List[str]:
+    """The normalized text from each word start, up to MAX_PREFIX_LENGTH characters"""
+    text = normalize(value)
+    return [
+        text[match.start():match.start() + MAX_PREFIX_LENGTH]
+        for match in list(_WORD_START.finditer(text))[:MAX_SEARCH_WORDS]
+    ]
+
+
+def prefixes(value: Any) -> List[str]:
+    """Prefixes of the text from each word start, so 'Acme Sales' matches 'sal' and 'acme s'"""
+    keys = set()
+    for suffix in word_starts(value):
+        keys.update(suffix[:length].rstrip() for length in range(1, len(suffix) + 1))
+    keys.discard('')
+    return sorted(keys)
+
+
+def search_keys(collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Search fields to write with data, for the searchable fields it sets"""
+    keys = {}
+    for field in SEARCH_FIELDS.get(collection, ()):
+        if field not in data:
+            continue
+        keys[prefixes_key(field)] = prefixes(data[field]) if data[field] is not None else []
+    return keys
+
+
+def strip_search_keys(collection: str, doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Drop the derived search fields from a document read for callers"""
+    if doc:
+        for field in SEARCH_FIELDS.get(collection, ()):
+            doc.pop(prefixes_key(field), None)
+    return doc
+
+
+def search_term(term: Optional[str]) -> Optional[str]:
+    """The array_contains value for a search, or None when there is nothing to search for"""
+    text = normalize(term or '')[:MAX_PREFIX_LENGTH].rstrip()
+    return text or None
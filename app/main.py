@@ -7,6 +7,7 @@ from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api.auth.auth import router as auth_router
 from app.api.v1.admin import router as admin_router
+from app.api.v1.firebase_dashboard import router as dashboard_router
 from app.api.v1.firebase_admin import router as firebase_admin_router
 from app.api.v1.firebase_clients import router as clients_router
 from app.api.v1.firebase_projects import router as projects_router
@@ -20,9 +21,13 @@ from app.api.v1.firebase_portfolio import router as portfolio_router
 from app.api.v1.contact import router as contact_router
 from app.api.v1.upload import router as upload_router
 from app.api.v1.deploy import router as deploy_router
+from app.api.v1.search import router as search_router
 from app.api.setup import router as setup_router
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 # Create FastAPI app with proxy headers support
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -53,6 +58,7 @@ app.add_middleware(
 
 # Include routers
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
+app.include_router(dashboard_router, prefix="/api/admin", tags=["Admin"])
 app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
 app.include_router(firebase_admin_router, prefix="/api/admin/firebase", tags=["Firebase Admin"])
 app.include_router(clients_router, prefix="/api/admin/clients", tags=["Clients"])
@@ -66,6 +72,7 @@ app.include_router(portfolio_router, prefix="/api/admin/portfolio", tags=["Portf
 app.include_router(contact_router, prefix="/api/contact", tags=["Contact"])
 app.include_router(upload_router, prefix="/api/upload", tags=["File Upload"])
 app.include_router(deploy_router, prefix="/api/admin/deploy", tags=["Dashboard Deployment"])
+app.include_router(search_router, prefix="/api/admin", tags=["Search"])
 
 # Add assets route at root level for dashboard assets
 @app.get("/assets/{file_path:path}")
@@ -75,6 +82,76 @@ async def serve_assets(file_path: str, request: Request):
     return await serve_dashboard_assets(file_path, request)
 app.include_router(setup_router, prefix="/api/setup", tags=["Setup"])
 
+# Dashboard deployments run on an in-process job runner; pick up any a restart interrupted
+@app.on_event("startup")
+async def recover_dashboard_deployments():
+    from starlette.concurrency import run_in_threadpool
+    from app.services.dashboard_deployment_service import DashboardDeploymentService
+    try:
+        await run_in_threadpool(DashboardDeploymentService.recover_deployments)
+    except Exception:
+        logger.exception("Failed to recover dashboard deployments")
+
+@app.on_event("shutdown")
+async def stop_deployment_jobs():
+    from app.services.deployment_jobs import deployment_job_runner
+    deployment_job_runner.shutdown()
+
+# Periodically delete dashboard storage no deployment references any more, and fail orphaned deployments
+async def collect_dashboard_storage():
+    import asyncio
+    from starlette.concurrency import run_in_threadpool
+    from app.services.dashboard_deployment_service import DashboardDeploymentService
+    while True:
+        await asyncio.sleep(settings.DASHBOARD_GC_INTERVAL_SECONDS)
+        try:
+            report = await run_in_threadpool(DashboardDeploymentService.collect_garbage, False)
+            logger.info(f"Dashboard storage cleanup removed {report['files']} files ({report['reclaimable_bytes']} bytes)")
+        except Exception:
+            logger.exception("Dashboard storage cleanup failed")
+        try:
+            # Also fails records orphaned by instances that stopped since this one started
+            await run_in_threadpool(DashboardDeploymentService.recover_deployments)
+        except Exception:
+            logger.exception("Failed to recover dashboard deployments")
+
+@app.on_event("startup")
+async def start_dashboard_storage_gc():
+    import asyncio
+    if settings.DASHBOARD_GC_INTERVAL_SECONDS > 0:
+        app.state.dashboard_gc_task = asyncio.create_task(collect_dashboard_storage())
+
+@app.on_event("shutdown")
+async def stop_dashboard_storage_gc():
+    task = getattr(app.state, 'dashboard_gc_task', None)
+    if task:
+        task.cancel()
+
+# Load the admin search index, then rebuild it now and then for writes made on other instances
+async def maintain_search_index():
+    import asyncio
+    from starlette.concurrency import run_in_threadpool
+    from app.services.search_index import typeahead_index
+    while True:
+        try:
+            await run_in_threadpool(typeahead_index.rebuild)
+        except Exception:
+            logger.exception("Search index rebuild failed")
+        if settings.SEARCH_INDEX_REBUILD_SECONDS <= 0:
+            return
+        await asyncio.sleep(settings.SEARCH_INDEX_REBUILD_SECONDS)
+
+@app.on_event("startup")
+async def start_search_index():
+    import asyncio
+    app.state.search_index_task = asyncio.create_task(maintain_search_index())
+
+@app.on_event("shutdown")
+async def stop_search_index():
+    task = getattr(app.state, 'search_index_task', None)
+    if task:
+        task.cancel()
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -6,4 +6,5 @@ class ResponseModel(BaseModel):
     success: bool = True
     data: Optional[Any] = None
     message: str = "Success"
-    errors: List[str] = []
\ No newline at end of file
+    errors: List[str] = []
+    next_cursor: Optional[str] = None  # set on paginated lists that have more results
\ No newline at end of file
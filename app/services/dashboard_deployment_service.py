@@ -5,20 +5,151 @@ import shutil
 import subprocess
 import tempfile
 import logging
-from typing import Optional, Dict, Any
+import gzip
+import hashlib
+import json
+import asyncio
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Callable, List, Tuple
 from fastapi import UploadFile
-from app.core.firebase_db import firebase_db
+from starlette.concurrency import run_in_threadpool
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.firebase_db import async_firebase_db, firebase_db, register_write_listener, Transaction, WriteBatch
 from app.services.firebase_storage_service import firebase_storage_service
+from app.services.dashboard_file_cache import dashboard_file_cache
+from app.services.node_modules_cache import node_modules_cache
+from app.services.deployment_jobs import (
+    DeploymentJob, DeploymentCancelled, DEPLOYMENTS_COLLECTION, deployment_job_runner
+)
 import re
+import resource
+import brotli
 
 logger = logging.getLogger(__name__)
 
+# Marks HTML that already carries the mobile enhancements, so injection is idempotent
+MOBILE_MARKER = '<!-- oneqlek:mobile -->'
+
+MOBILE_VIEWPORT_TAG = '<meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=5.0, user-scalable=yes">'
+
+MOBILE_CSS = '''
+                <style>
+                    * { box-sizing: border-box; }
+                    html, body { 
+                        margin: 0; 
+                        padding: 0; 
+                        width: 100%; 
+                        height: 100%; 
+                        overflow-x: auto;
+                        -webkit-text-size-adjust: 100%;
+                        -ms-text-size-adjust: 100%;
+                    }
+                    body { 
+                        min-height: 100vh; 
+                        touch-action: manipulation;
+                    }
+                    @media (max-width: 768px) {
+                        body { font-size: 14px; }
+                        * { max-width: 100%; }
+                    }
+                </style>
+                '''
+
+# Text formats that get precompressed .gz/.br siblings at deploy time
+# (mimetypes reports .js as text/javascript, the deploy table as application/javascript)
+COMPRESSIBLE_CONTENT_TYPES = {
+    'text/html',
+    'text/css',
+    'application/javascript',
+    'text/javascript',
+    'application/json',
+    'image/svg+xml'
+}
+
+# Below this size the encoding overhead outweighs the savings
+COMPRESSION_MIN_BYTES = 1024
+
+# Content-Encoding -> storage suffix of the precompressed sibling
+COMPRESSED_VARIANTS = {'br': '.br', 'gzip': '.gz'}
+
+# How often a running npm command checks for cancellation and the time limit
+BUILD_POLL_SECONDS = 0.5
+
+# A live instance writes its queued and running records at least once per build time limit,
+# so a record left unwritten for this many limits was orphaned by a restart
+ORPHANED_DEPLOYMENT_TIMEOUTS = 2
+
+# Deploy modes: 'source' runs npm on a project, 'prebuilt' uploads an already built bundle
+BUILD_MODES = ('source', 'prebuilt')
+
+# Where built bundles carry the dashboard instance ID: an unminified assignment, a
+# placeholder token, or the ID a previous deploy generated
+INSTANCE_ID_PATTERN = re.compile(
+    r"""(DASHBOARD_INSTANCE_ID\s*=\s*)(['"`])[^'"`\n]*\2"""
+    r"""|(['"`])(?:__DASHBOARD_INSTANCE_ID__|dashboard-[0-9a-f]{12})\3"""
+)
+
+# Content-hashed bundle names (Vite: index-B3kP9xQe.js, CRA: main.4f2a9c1b.js)
+FINGERPRINTED_NAME_PATTERN = re.compile(r'^(.+[.-][A-Za-z0-9_-]{8,})(\.[A-Za-z0-9]+)$')
+
+# Archive entries under these directories are never extracted
+SKIPPED_ARCHIVE_DIRS = {'node_modules', '.git', '__MACOSX'}
+
+ARCHIVE_CHUNK_SIZE = 1048576  # 1MB
+
+# Lookup documents mapping (client_slug, project_slug) to the deployed project,
+# written at deploy time so access checks don't scan clients and projects
+ROUTES_COLLECTION = 'dashboard_routes'
+
+# Per-deployment record of every uploaded file (path, sha256, size, content type,
+# precompressed variants), so redeploys only upload what changed
+MANIFESTS_COLLECTION = 'dashboard_manifests'
+
+# Manifest entries are stored in chunk documents keyed {deployment_id}_{index}, so large
+# builds stay under Firestore's 1 MiB document limit
+MANIFEST_CHUNKS_COLLECTION = 'dashboard_manifest_chunks'
+MANIFEST_CHUNK_BYTES = 262144  # 256KB of JSON per chunk
+
+# Top-level storage prefixes dashboards and add-ins are deployed under
+STORAGE_ROOTS = ('dashboards', 'addins')
+
+_route_cache = TTLCache(max_size=1024, ttl=60)
+
+# Slug pairs with no route are cached as {} for this long, so repeated misses skip the
+# backfill scan; writing the route drops the entry through the listener below
+ROUTE_MISS_TTL_SECONDS = 10
+
+register_write_listener(
+    [ROUTES_COLLECTION],
+    lambda collection, doc_id, data: _route_cache.invalidate(doc_id)
+)
+
+# Live project and client fields access checks compare a route against; routes are
+# written at deploy time, so reassignments, renames and deletes are only seen here
+_owner_cache = TTLCache(max_size=2048, ttl=60)
+
+register_write_listener(
+    ['projects', 'clients'],
+    lambda collection, doc_id, data: _owner_cache.invalidate((collection, doc_id))
+)
+
+class InvalidDashboardArchive(Exception):
+    """The uploaded dashboard ZIP is malformed, unsafe or over the configured limits"""
+    
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
 class DashboardDeploymentService:
     
     @staticmethod
     def _sanitize_name(name: str) -> str:
         """Convert name to URL-safe format"""
-        logger.info(f"Sanitizing name: '{name}'")
+        logger.debug(f"Sanitizing name: '{name}'")
         # Remove special characters except spaces and hyphens
         sanitized = re.sub(r'[^a-zA-Z0-9\s-]', '', name)
         # Replace spaces with hyphens and convert to lowercase
@@ -27,7 +158,7 @@ class DashboardDeploymentService:
         sanitized = re.sub(r'-+', '-', sanitized)
         # Remove leading/trailing hyphens
         sanitized = sanitized.strip('-')
-        logger.info(f"Sanitized result: '{sanitized}'")
+        logger.debug(f"Sanitized result: '{sanitized}'")
         return sanitized
     
     @staticmethod
@@ -36,22 +167,169 @@ class DashboardDeploymentService:
         project_name: str,
         client_name: str,
         dashboard_file: UploadFile,
-        deployed_by: str
+        deployed_by: str,
+        mode: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Deploy dashboard for a specific project"""
+        """Queue a dashboard deployment for a project; the build runs on the deployment job runner.
+        
+        mode is 'source' or 'prebuilt'; when omitted it is detected from the archive.
+        """
         
         deployment_id = f"dep-{uuid.uuid4().hex[:8]}"
         
+        # Spool the upload to disk in chunks; the job reads it from there
+        os.makedirs(settings.DEPLOY_SPOOL_DIR, exist_ok=True)
+        zip_path = DashboardDeploymentService._spool_path(deployment_id)
+        try:
+            size = 0
+            with open(zip_path, "wb") as buffer:
+                while chunk := await dashboard_file.read(ARCHIVE_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > settings.DEPLOY_ZIP_MAX_BYTES:
+                        raise InvalidDashboardArchive(
+                            f"ZIP file exceeds the upload limit of {settings.DEPLOY_ZIP_MAX_BYTES} bytes",
+                            status_code=413
+                        )
+                    buffer.write(chunk)
+            
+            # Reject bad archives now rather than from the queue
+            mode = await run_in_threadpool(DashboardDeploymentService.validate_archive, zip_path, mode)
+        except Exception:
+            os.remove(zip_path)
+            raise
+        
         # Create deployment record with pending status
         deployment_data = {
             'project_id': project_id,
+            'project_name': project_name,
+            'client_name': client_name,
             'deployment_type': 'project',
+            'build_mode': mode,
             'deployment_status': 'pending',
+            'phase': 'queued',
             'deployed_by': deployed_by,
             'deployed_at': firebase_db._get_current_timestamp()
         }
         
-        firebase_db.create('dashboard_deployments', deployment_data, deployment_id)
+        await async_firebase_db.create(DEPLOYMENTS_COLLECTION, deployment_data, deployment_id)
+        # Submitting writes the queue positions of waiting deployments
+        await run_in_threadpool(DashboardDeploymentService._submit_deployment, deployment_id)
+        
+        return {
+            'deployment_id': deployment_id,
+            'build_mode': mode,
+            'status': 'pending'
+        }
+    
+    @staticmethod
+    def _spool_path(deployment_id: str) -> str:
+        """Where the uploaded ZIP of a queued deployment waits for its job"""
+        return os.path.join(settings.DEPLOY_SPOOL_DIR, f"{deployment_id}.zip")
+    
+    @staticmethod
+    def _submit_deployment(deployment_id: str) -> bool:
+        return deployment_job_runner.submit(
+            deployment_id,
+            lambda job: DashboardDeploymentService.run_project_deployment(deployment_id, job)
+        )
+    
+    @staticmethod
+    def cancel_deployment(deployment_id: str) -> Dict[str, Any]:
+        """Cancel a queued or running deployment"""
+        deployment = firebase_db.get_by_id(DEPLOYMENTS_COLLECTION, deployment_id)
+        if not deployment:
+            raise LookupError("Deployment not found")
+        if deployment.get('deployment_status') not in ('pending', 'running'):
+            raise ValueError(f"Deployment is already {deployment.get('deployment_status')}")
+        
+        if deployment_job_runner.cancel(deployment_id) == 'queued':
+            DashboardDeploymentService._mark_cancelled(deployment_id)
+            return {'deployment_id': deployment_id, 'status': 'cancelled'}
+        
+        # Running here, or owned by another instance: the job stops at its next check
+        firebase_db.update(DEPLOYMENTS_COLLECTION, deployment_id, {'cancel_requested': True}, return_document=False)
+        return {'deployment_id': deployment_id, 'status': 'cancelling'}
+    
+    @staticmethod
+    def _mark_cancelled(deployment_id: str) -> None:
+        firebase_db.update(DEPLOYMENTS_COLLECTION, deployment_id, {
+            'deployment_status': 'cancelled',
+            'queue_position': None,
+            'finished_at': firebase_db._get_current_timestamp()
+        }, return_document=False)
+        zip_path = DashboardDeploymentService._spool_path(deployment_id)
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
+    
+    @staticmethod
+    def recover_deployments() -> int:
+        """Re-queue deployments interrupted by a restart whose uploaded ZIP is still spooled on this instance.
+        
+        Pending or running records without a spooled ZIP that haven't been written for
+        ORPHANED_DEPLOYMENT_TIMEOUTS build time limits belong to an instance that is gone;
+        they are marked failed so they don't stay live forever.
+        """
+        recovered = 0
+        cutoff = datetime.utcnow() - timedelta(
+            seconds=settings.DEPLOY_BUILD_TIMEOUT_SECONDS * ORPHANED_DEPLOYMENT_TIMEOUTS
+        )
+        for status in ('pending', 'running'):
+            for deployment in firebase_db.get_all(DEPLOYMENTS_COLLECTION, [('deployment_status', '==', status)]):
+                if not os.path.exists(DashboardDeploymentService._spool_path(deployment['id'])):
+                    if DashboardDeploymentService._last_written(deployment) < cutoff and \
+                            not deployment_job_runner.is_active(deployment['id']):
+                        DashboardDeploymentService._mark_orphaned(deployment['id'])
+                    continue
+                if DashboardDeploymentService._submit_deployment(deployment['id']):
+                    logger.info(f"Re-queued interrupted deployment {deployment['id']}")
+                    recovered += 1
+        return recovered
+    
+    @staticmethod
+    def _last_written(deployment: Dict[str, Any]) -> datetime:
+        for key in ('updated_at', 'started_at', 'deployed_at'):
+            try:
+                return datetime.fromisoformat(deployment[key])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return datetime.min
+    
+    @staticmethod
+    def _mark_orphaned(deployment_id: str) -> None:
+        firebase_db.update(DEPLOYMENTS_COLLECTION, deployment_id, {
+            'deployment_status': 'failed',
+            'queue_position': None,
+            'finished_at': firebase_db._get_current_timestamp(),
+            'error_message': 'Deployment was interrupted by a restart and its upload is no longer available; please deploy again'
+        }, return_document=False)
+        logger.warning(f"Marked orphaned deployment {deployment_id} as failed")
+    
+    @staticmethod
+    async def run_project_deployment(deployment_id: str, job: Optional[DeploymentJob] = None) -> Dict[str, Any]:
+        """Extract, build and upload a queued deployment, recording phases and logs in its record"""
+        
+        deployment = firebase_db.get_by_id(DEPLOYMENTS_COLLECTION, deployment_id)
+        if not deployment:
+            raise Exception(f"Deployment {deployment_id} not found")
+        
+        # Cancelled through another instance while it waited in this one's queue
+        if deployment.get('cancel_requested') or deployment.get('deployment_status') == 'cancelled':
+            DashboardDeploymentService._mark_cancelled(deployment_id)
+            return {'deployment_id': deployment_id, 'status': 'cancelled'}
+        
+        project_id = deployment['project_id']
+        zip_path = DashboardDeploymentService._spool_path(deployment_id)
+        job = job or DeploymentJob(deployment_id)
+        job.deadline = time.monotonic() + settings.DEPLOY_BUILD_TIMEOUT_SECONDS
+        
+        firebase_db.update(DEPLOYMENTS_COLLECTION, deployment_id, {
+            'deployment_status': 'running',
+            'queue_position': None,
+            'started_at': firebase_db._get_current_timestamp()
+        }, return_document=False)
+        
+        release_path = None
+        uploads_started = False
         
         try:
             # Get project type to determine URL structure
@@ -59,99 +337,345 @@ class DashboardDeploymentService:
             project_type = project.get('project_type', 'Dashboard') if project else 'Dashboard'
             
             # Generate path and URL based on project type
-            client_slug = DashboardDeploymentService._sanitize_name(client_name)
-            project_slug = DashboardDeploymentService._sanitize_name(project_name)
+            client_slug = DashboardDeploymentService._sanitize_name(deployment['client_name'])
+            project_slug = DashboardDeploymentService._sanitize_name(deployment['project_name'])
             
             if project_type == 'Add-ins':
-                storage_path = f"addins/{client_slug}/{project_slug}"
+                base_path = f"addins/{client_slug}/{project_slug}"
                 dashboard_url = f"/addins/{client_slug}/{project_slug}"
             else:
-                storage_path = f"dashboards/{client_slug}/{project_slug}"
+                base_path = f"dashboards/{client_slug}/{project_slug}"
                 dashboard_url = f"/dashboard/{client_slug}/{project_slug}"
             
+            # Each build gets its own immutable prefix; the live one keeps serving until the route moves
+            instance_id = f"dashboard-{uuid.uuid4().hex[:12]}"
+            release_path = DashboardDeploymentService._release_path(base_path, instance_id)
+            
+            # Files unchanged since the live release are copied rather than uploaded
+            previous_release = DashboardDeploymentService._load_previous_release(
+                client_slug, project_slug, base_path
+            )
+            
+            def report_progress(uploaded: int, total: int) -> None:
+                nonlocal uploads_started
+                uploads_started = True
+                job.raise_if_cancelled()
+                firebase_db.update(DEPLOYMENTS_COLLECTION, deployment_id, {
+                    'files_uploaded': uploaded,
+                    'file_count': total
+                }, return_document=False)
+            
             # Process the ZIP file
             built_files_info = await DashboardDeploymentService._process_dashboard_zip(
-                dashboard_file, storage_path
+                zip_path, release_path, job,
+                instance_id=instance_id,
+                mode=deployment.get('build_mode', 'source'),
+                on_progress=report_progress,
+                previous_release=previous_release
             )
             
-            # Update project with dashboard URL and instance ID
-            firebase_db.update('projects', project_id, {
-                'dashboard_url': dashboard_url,
-                'dashboard_instance_id': built_files_info['dashboard_instance_id']
-            })
+            # The release is complete; the manifest, the route's pointer switch, the project
+            # and the deployment record are committed together, so the release goes live atomically
+            with firebase_db.transaction() as transaction:
+                DashboardDeploymentService._write_manifest(transaction, deployment_id, {
+                    'deployment_id': deployment_id,
+                    'project_id': project_id,
+                    'base_path': base_path,
+                    'storage_path': release_path
+                }, built_files_info['manifest'])
+                
+                retired = DashboardDeploymentService._activate_release(
+                    transaction, client_slug, project_slug, {
+                        'client_id': project.get('client_id') if project else None,
+                        'project_id': project_id,
+                        'dashboard_url': dashboard_url,
+                        'base_path': base_path
+                    }, {
+                        'dashboard_instance_id': instance_id,
+                        'deployment_id': deployment_id,
+                        'storage_path': release_path,
+                        'deployed_at': firebase_db._get_current_timestamp()
+                    }
+                )
+                
+                # Update project with dashboard URL and instance ID
+                if project:
+                    transaction.update('projects', project_id, {
+                        'dashboard_url': dashboard_url,
+                        'dashboard_instance_id': instance_id
+                    })
+                
+                # Update deployment record with success
+                transaction.update(DEPLOYMENTS_COLLECTION, deployment_id, {
+                    'deployment_status': 'success',
+                    'phase': 'complete',
+                    'finished_at': firebase_db._get_current_timestamp(),
+                    'deployment_url': dashboard_url,
+                    'file_count': built_files_info['file_count'],
+                    'files_uploaded': built_files_info['file_count'],
+                    'files_changed': built_files_info['files_changed'],
+                    'files_copied': built_files_info['files_copied'],
+                    'storage_path': release_path,
+                    'dashboard_instance_id': instance_id
+                })
             
-            # Update deployment record with success
-            firebase_db.update('dashboard_deployments', deployment_id, {
-                'deployment_status': 'success',
-                'deployment_url': dashboard_url,
-                'file_count': built_files_info['file_count'],
-                'storage_path': storage_path,
-                'dashboard_instance_id': built_files_info['dashboard_instance_id']
-            })
+            # Releases beyond the retention window can no longer be rolled back to
+            for release in retired:
+                try:
+                    DashboardDeploymentService._delete_release(release)
+                except Exception as e:
+                    logger.warning(f"Failed to prune release {release['storage_path']}: {e}")
             
             return {
                 'deployment_id': deployment_id,
                 'dashboard_url': dashboard_url,
                 'status': 'success',
                 'file_count': built_files_info['file_count'],
-                'dashboard_instance_id': built_files_info['dashboard_instance_id']
+                'files_changed': built_files_info['files_changed'],
+                'files_copied': built_files_info['files_copied'],
+                'dashboard_instance_id': instance_id
             }
             
         except Exception as e:
             # Update deployment record with failure
-            firebase_db.update('dashboard_deployments', deployment_id, {
-                'deployment_status': 'failed',
-                'error_message': str(e)
-            })
+            firebase_db.update(DEPLOYMENTS_COLLECTION, deployment_id, {
+                'deployment_status': 'cancelled' if isinstance(e, DeploymentCancelled) else 'failed',
+                'finished_at': firebase_db._get_current_timestamp(),
+                'error_message': str(e),
+                'logs': job.logs
+            }, return_document=False)
+            if release_path and uploads_started:
+                # Nothing points at a partial release; remove what was written
+                firebase_storage_service.delete_prefix(f"{release_path}/")
             raise e
+        finally:
+            if os.path.exists(zip_path):
+                os.remove(zip_path)
     
     @staticmethod
-    async def _process_dashboard_zip(dashboard_file: UploadFile, storage_path: str) -> Dict[str, Any]:
-        """Extract ZIP, build React app, and upload to Firebase Storage"""
+    async def _process_dashboard_zip(
+        zip_path: str,
+        storage_path: str,
+        job: DeploymentJob,
+        instance_id: Optional[str] = None,
+        mode: str = 'source',
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        previous_release: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Extract ZIP, build React app (unless the bundle is prebuilt), and upload to Firebase Storage"""
         
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Save uploaded ZIP file
-            zip_path = os.path.join(temp_dir, "dashboard.zip")
-            with open(zip_path, "wb") as buffer:
-                content = await dashboard_file.read()
-                buffer.write(content)
-            
-            # Extract ZIP file
-            extract_dir = os.path.join(temp_dir, "extracted")
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
-            
-            # Find the main project directory (should contain package.json)
-            project_dir = DashboardDeploymentService._find_project_directory(extract_dir)
-            if not project_dir:
-                raise Exception("No package.json found in ZIP file")
-            
-            # Generate unique dashboard instance ID and update App.tsx
-            unique_instance_id = f"dashboard-{uuid.uuid4().hex[:12]}"
-            DashboardDeploymentService._update_dashboard_instance_id(project_dir, unique_instance_id)
+            with job.phase('extract'):
+                # Extract only the project directory (package.json, or index.html when prebuilt)
+                project_dir = os.path.join(temp_dir, "extracted")
+                DashboardDeploymentService._extract_project(zip_path, project_dir, mode)
+                
+                # Generate unique dashboard instance ID and write it into the app
+                unique_instance_id = instance_id or f"dashboard-{uuid.uuid4().hex[:12]}"
+                if mode == 'prebuilt':
+                    changed = DashboardDeploymentService._apply_instance_id_to_build(project_dir, unique_instance_id)
+                    job.log(f"Prebuilt bundle: set DASHBOARD_INSTANCE_ID in {changed} file(s)")
+                else:
+                    DashboardDeploymentService._update_dashboard_instance_id(project_dir, unique_instance_id)
             
-            # Install dependencies and build
-            build_dir = await DashboardDeploymentService._build_react_app(project_dir)
+            if mode == 'prebuilt':
+                build_dir = project_dir
+            else:
+                # Install dependencies and build
+                build_dir = await DashboardDeploymentService._build_react_app(project_dir, job)
             
             # Upload built files to Firebase Storage
-            file_count = await DashboardDeploymentService._upload_built_files(build_dir, storage_path)
+            with job.phase('upload'):
+                upload_result = await DashboardDeploymentService._upload_built_files(
+                    build_dir, storage_path,
+                    on_progress=on_progress,
+                    previous_release=previous_release
+                )
             
             return {
-                'file_count': file_count,
+                **upload_result,
                 'storage_path': storage_path,
                 'dashboard_instance_id': unique_instance_id
             }
     
     @staticmethod
-    def _find_project_directory(extract_dir: str) -> Optional[str]:
-        """Find directory containing package.json"""
-        for root, dirs, files in os.walk(extract_dir):
-            if 'package.json' in files:
-                return root
-        return None
+    def _find_project_directory(names: List[str]) -> Optional[str]:
+        """Archive prefix of the shallowest directory containing package.json ('' for the root)"""
+        candidates = [name for name in names if name == 'package.json' or name.endswith('/package.json')]
+        if not candidates:
+            return None
+        shallowest = min(candidates, key=lambda name: (name.count('/'), name))
+        return shallowest[:-len('package.json')]
+    
+    @staticmethod
+    def _find_build_directory(names: List[str]) -> Optional[str]:
+        """Archive prefix of a built bundle: the shallowest index.html next to assets/ or static/, else the shallowest index.html"""
+        candidates = [name for name in names if name == 'index.html' or name.endswith('/index.html')]
+        if not candidates:
+            return None
+        prefixes = [name[:-len('index.html')] for name in candidates]
+        with_assets = [
+            prefix for prefix in prefixes
+            if any(name.startswith(f"{prefix}assets/") or name.startswith(f"{prefix}static/") for name in names)
+        ]
+        return min(with_assets or prefixes, key=lambda prefix: (prefix.count('/'), prefix))
     
     @staticmethod
-    async def _build_react_app(project_dir: str) -> str:
+    def _archive_members(
+        zip_file: zipfile.ZipFile,
+        mode: Optional[str] = None
+    ) -> Tuple[str, List[Tuple[str, zipfile.ZipInfo]]]:
+        """Validate an archive's listing, returning the build mode and (path relative to the project directory, entry) pairs to extract"""
+        # Bound the listing before walking it, so an archive of millions of entries is rejected up front
+        entries = zip_file.infolist()
+        if len(entries) > settings.DEPLOY_ZIP_MAX_ENTRIES:
+            raise InvalidDashboardArchive(
+                f"ZIP file has {len(entries)} entries, more than the limit of {settings.DEPLOY_ZIP_MAX_ENTRIES}"
+            )
+        
+        members = []
+        for info in entries:
+            name = info.filename.replace('\\', '/')
+            parts = [part for part in name.split('/') if part not in ('', '.')]
+            if name.startswith('/') or '..' in parts or (parts and ':' in parts[0]):
+                raise InvalidDashboardArchive(f"Unsafe path in ZIP file: {info.filename}")
+            if info.is_dir() or SKIPPED_ARCHIVE_DIRS.intersection(parts):
+                continue
+            members.append(('/'.join(parts), info))
+        
+        names = [name for name, _ in members]
+        if mode is None:
+            # Source projects carry package.json; a bundle without one is already built
+            mode = 'source' if DashboardDeploymentService._find_project_directory(names) is not None else 'prebuilt'
+        
+        if mode == 'prebuilt':
+            project_root = DashboardDeploymentService._find_build_directory(names)
+            if project_root is None:
+                raise InvalidDashboardArchive("No package.json or built index.html found in ZIP file")
+        else:
+            project_root = DashboardDeploymentService._find_project_directory(names)
+            if project_root is None:
+                raise InvalidDashboardArchive("No package.json found in ZIP file")
+        members = [(name[len(project_root):], info) for name, info in members if name.startswith(project_root)]
+        
+        if sum(info.file_size for _, info in members) > settings.DEPLOY_ZIP_MAX_UNCOMPRESSED_BYTES:
+            raise InvalidDashboardArchive(
+                f"ZIP file expands beyond the limit of {settings.DEPLOY_ZIP_MAX_UNCOMPRESSED_BYTES} bytes"
+            )
+        return mode, members
+    
+    @staticmethod
+    def validate_archive(zip_path: str, mode: Optional[str] = None) -> str:
+        """Check a dashboard ZIP from its central directory without extracting anything, returning its build mode"""
+        try:
+            with zipfile.ZipFile(zip_path) as zip_file:
+                return DashboardDeploymentService._archive_members(zip_file, mode)[0]
+        except zipfile.BadZipFile:
+            raise InvalidDashboardArchive("Uploaded file is not a valid ZIP archive")
+    
+    @staticmethod
+    def _extract_project(zip_path: str, project_dir: str, mode: Optional[str] = None) -> None:
+        """Extract the project directory of a dashboard ZIP, counting the bytes actually written against the limit"""
+        written = 0
+        with zipfile.ZipFile(zip_path) as zip_file:
+            for rel_name, info in DashboardDeploymentService._archive_members(zip_file, mode)[1]:
+                target = os.path.join(project_dir, *rel_name.split('/'))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zip_file.open(info) as source, open(target, 'wb') as destination:
+                    while chunk := source.read(ARCHIVE_CHUNK_SIZE):
+                        written += len(chunk)
+                        if written > settings.DEPLOY_ZIP_MAX_UNCOMPRESSED_BYTES:
+                            raise InvalidDashboardArchive(
+                                f"ZIP file expands beyond the limit of {settings.DEPLOY_ZIP_MAX_UNCOMPRESSED_BYTES} bytes"
+                            )
+                        destination.write(chunk)
+    
+    @staticmethod
+    def _build_env() -> Dict[str, str]:
+        """npm environment with the shared download cache and a capped V8 heap"""
+        env = node_modules_cache.npm_env()
+        heap_limit = f"--max-old-space-size={settings.DEPLOY_BUILD_MEMORY_MB}"
+        env['NODE_OPTIONS'] = f"{env.get('NODE_OPTIONS', '')} {heap_limit}".strip()
+        return env
+    
+    @staticmethod
+    def _build_preexec() -> Optional[Callable[[], None]]:
+        """preexec_fn capping the writable memory of each build process, or None when unlimited.
+        
+        RLIMIT_DATA rather than RLIMIT_AS: V8 reserves far more address space than it uses.
+        """
+        limit_mb = settings.DEPLOY_BUILD_PROCESS_MEMORY_MB
+        if limit_mb <= 0:
+            return None
+        limit = limit_mb * 1024 * 1024
+        
+        def set_limit() -> None:
+            resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+        return set_limit
+    
+    @staticmethod
+    def _run_build_command(command: List[str], project_dir: str, job: DeploymentJob) -> None:
+        """Run an npm command within the build time limit, capturing its output into the deployment logs.
+        
+        The command runs in its own process group so a timeout or cancel also stops
+        the processes npm spawned, and with an OS memory limit each of them inherits.
+        """
+        job.log(f"$ {' '.join(command)}")
+        process = subprocess.Popen(
+            command, cwd=project_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, env=DashboardDeploymentService._build_env(), start_new_session=True,
+            preexec_fn=DashboardDeploymentService._build_preexec()
+        )
+        
+        stop_reason = None
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=BUILD_POLL_SECONDS)
+                break
+            except subprocess.TimeoutExpired:
+                if job.cancel_requested():
+                    stop_reason = DeploymentCancelled("Deployment was cancelled")
+                elif job.remaining_time() is not None and job.remaining_time() <= 0:
+                    stop_reason = Exception(
+                        f"Build exceeded the {settings.DEPLOY_BUILD_TIMEOUT_SECONDS}s time limit"
+                    )
+                else:
+                    continue
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        
+        job.log(stdout)
+        job.log(stderr)
+        if stop_reason is not None:
+            raise stop_reason
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
+    
+    @staticmethod
+    def _install_dependencies(project_dir: str, job: DeploymentJob) -> None:
+        """Install node_modules, reusing a cached tree when the lockfile matches a previous build"""
+        npm_flags = ['--prefer-offline', '--no-audit', '--no-fund']
+        lockfile_path = os.path.join(project_dir, 'package-lock.json')
+        
+        if not os.path.exists(lockfile_path):
+            DashboardDeploymentService._run_build_command(['npm', 'install', *npm_flags], project_dir, job)
+            node_modules_cache.trim_npm_cache()
+            return
+        
+        lockfile_key = node_modules_cache.key_for(lockfile_path)
+        if node_modules_cache.restore(lockfile_key, project_dir):
+            job.log(f"Reused cached node_modules for lockfile {lockfile_key[:12]}")
+            return
+        
+        # A lockfile makes the install reproducible, so it can be cached under its hash
+        DashboardDeploymentService._run_build_command(['npm', 'ci', *npm_flags], project_dir, job)
+        node_modules_cache.store(lockfile_key, project_dir)
+        node_modules_cache.trim_npm_cache()
+    
+    @staticmethod
+    async def _build_react_app(project_dir: str, job: DeploymentJob) -> str:
         """Install dependencies and build React app"""
         
         # Check if package.json exists
@@ -162,13 +686,15 @@ class DashboardDeploymentService:
         try:
             # Install dependencies
             logger.info(f"Installing dependencies in {project_dir}")
-            result = subprocess.run(['npm', 'install'], cwd=project_dir, check=True, capture_output=True, text=True)
-            logger.info(f"npm install completed: {result.stdout}")
+            with job.phase('install'):
+                DashboardDeploymentService._install_dependencies(project_dir, job)
+            logger.info("npm install completed")
             
             # Build the project
             logger.info(f"Building React app in {project_dir}")
-            result = subprocess.run(['npm', 'run', 'build'], cwd=project_dir, check=True, capture_output=True, text=True)
-            logger.info(f"npm build completed: {result.stdout}")
+            with job.phase('build'):
+                DashboardDeploymentService._run_build_command(['npm', 'run', 'build'], project_dir, job)
+            logger.info("npm build completed")
             
             # Return build directory path
             build_dir = os.path.join(project_dir, 'build')
@@ -186,38 +712,473 @@ class DashboardDeploymentService:
             raise Exception(f"Build failed: {error_msg}")
     
     @staticmethod
-    async def _upload_built_files(build_dir: str, storage_path: str) -> int:
-        """Upload all built files to Firebase Storage"""
+    async def _upload_built_files(
+        build_dir: str,
+        storage_path: str,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        previous_release: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Write a build to its release prefix concurrently, copying files unchanged since the previous release.
         
-        file_count = 0
+        Progress is reported as (processed, total). Returns counts and the new manifest entries.
+        """
+        previous_files = previous_release['files'] if previous_release else {}
+        previous_path = previous_release['storage_path'] if previous_release else None
         
+        uploads = []
         for root, dirs, files in os.walk(build_dir):
             for file in files:
                 file_path = os.path.join(root, file)
                 
                 # Calculate relative path from build directory
-                rel_path = os.path.relpath(file_path, build_dir)
-                
-                # Create storage path
-                storage_file_path = f"{storage_path}/{rel_path}".replace('\\', '/')
-                
-                # Read file content
-                with open(file_path, 'rb') as f:
-                    file_content = f.read()
-                
-                # Determine content type
-                content_type = DashboardDeploymentService._get_content_type(file)
-                
-                # Upload to Firebase Storage
-                firebase_storage_service.upload_file(
-                    file_content, 
-                    storage_file_path, 
-                    content_type
+                rel_path = os.path.relpath(file_path, build_dir).replace('\\', '/')
+                uploads.append((file_path, rel_path))
+        
+        total = len(uploads)
+        # Report roughly every 5% so progress doesn't cost a write per file
+        report_every = max(1, total // 20)
+        if on_progress:
+            on_progress(0, total)
+        
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(
+            max_workers=settings.DASHBOARD_UPLOAD_CONCURRENCY,
+            thread_name_prefix='dashboard-upload'
+        )
+        manifest = []
+        changed = 0
+        try:
+            futures = [
+                loop.run_in_executor(
+                    pool, DashboardDeploymentService._upload_built_file,
+                    file_path, rel_path, storage_path, previous_files.get(rel_path), previous_path
                 )
-                
-                file_count += 1
+                for file_path, rel_path in uploads
+            ]
+            for future in asyncio.as_completed(futures):
+                entry, uploaded = await future
+                manifest.append(entry)
+                changed += uploaded
+                if on_progress and (len(manifest) % report_every == 0 or len(manifest) == total):
+                    on_progress(len(manifest), total)
+        finally:
+            # On failure, drop queued uploads instead of waiting for them
+            pool.shutdown(wait=False, cancel_futures=True)
+        
+        manifest.sort(key=lambda entry: entry['path'])
+        return {
+            'file_count': total,
+            'files_changed': changed,
+            'files_copied': total - changed,
+            'manifest': manifest
+        }
+    
+    @staticmethod
+    def _upload_built_file(
+        file_path: str,
+        rel_path: str,
+        storage_path: str,
+        previous: Optional[Dict[str, Any]] = None,
+        previous_path: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Upload one built file and its precompressed variants, or copy them server-side from the
+        previous release when the file is unchanged.
+        
+        Returns the file's manifest entry and whether it was uploaded.
+        """
+        with open(file_path, 'rb') as f:
+            file_content = f.read()
+        
+        # Determine content type
+        content_type = DashboardDeploymentService._get_content_type(file_path)
+        
+        # Apply the mobile enhancements once here instead of on every request
+        if content_type == 'text/html':
+            file_content = DashboardDeploymentService._prepare_html(file_content)
+        
+        storage_file_path = f"{storage_path}/{rel_path}"
+        retries = settings.DASHBOARD_UPLOAD_RETRIES
         
-        return file_count
+        # Hash what is actually stored, so the comparison covers the HTML injection too
+        sha256 = hashlib.sha256(file_content).hexdigest()
+        if previous and previous_path and previous.get('sha256') == sha256:
+            previous_file_path = f"{previous_path}/{rel_path}"
+            firebase_storage_service.copy_file(previous_file_path, storage_file_path, retries=retries)
+            for encoding in previous.get('variants', []):
+                suffix = COMPRESSED_VARIANTS[encoding]
+                firebase_storage_service.copy_file(previous_file_path + suffix, storage_file_path + suffix, retries=retries)
+            return previous, False
+        
+        firebase_storage_service.upload_file(file_content, storage_file_path, content_type, retries=retries)
+        variants = DashboardDeploymentService._upload_compressed_variants(
+            file_content, storage_file_path, content_type
+        )
+        
+        entry = {
+            'path': rel_path,
+            'sha256': sha256,
+            'size': len(file_content),
+            'content_type': content_type,
+            'variants': variants
+        }
+        return entry, True
+    
+    @staticmethod
+    def _load_previous_release(client_slug: str, project_slug: str, base_path: str) -> Optional[Dict[str, Any]]:
+        """Storage path and manifest (keyed by build path) of the live release under a base path, if known"""
+        route = firebase_db.get_by_id(
+            ROUTES_COLLECTION, DashboardDeploymentService._route_id(client_slug, project_slug)
+        )
+        if not route or route.get('base_path') != base_path or not route.get('deployment_id'):
+            return None
+        
+        manifest = firebase_db.get_by_id(MANIFESTS_COLLECTION, route['deployment_id'])
+        if not manifest or manifest.get('storage_path') != route.get('storage_path'):
+            return None
+        files = DashboardDeploymentService._read_manifest_files(manifest)
+        if files is None:
+            return None
+        return {
+            'storage_path': manifest['storage_path'],
+            'files': {entry['path']: entry for entry in files}
+        }
+    
+    @staticmethod
+    def _manifest_chunk_ids(deployment_id: str, chunk_count: int) -> List[str]:
+        return [f"{deployment_id}_{index:04d}" for index in range(chunk_count)]
+    
+    @staticmethod
+    def _write_manifest(
+        batch: WriteBatch,
+        deployment_id: str,
+        manifest: Dict[str, Any],
+        files: List[Dict[str, Any]]
+    ) -> None:
+        """Queue a manifest document and the chunk documents holding its file entries"""
+        chunks, size = [[]], 0
+        for entry in files:
+            entry_size = len(json.dumps(entry))
+            if chunks[-1] and size + entry_size > MANIFEST_CHUNK_BYTES:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(entry)
+            size += entry_size
+        
+        chunk_ids = DashboardDeploymentService._manifest_chunk_ids(deployment_id, len(chunks))
+        for chunk_id, chunk in zip(chunk_ids, chunks):
+            batch.create(MANIFEST_CHUNKS_COLLECTION, {'deployment_id': deployment_id, 'files': chunk}, chunk_id)
+        batch.create(MANIFESTS_COLLECTION, {
+            **manifest,
+            'file_count': len(files),
+            'chunk_count': len(chunks)
+        }, deployment_id)
+    
+    @staticmethod
+    def _read_manifest_files(manifest: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """File entries of a manifest, or None when a chunk is missing"""
+        if 'files' in manifest:
+            # Written before manifests were chunked
+            return manifest['files']
+        chunk_ids = DashboardDeploymentService._manifest_chunk_ids(manifest['id'], manifest.get('chunk_count', 0))
+        chunks = firebase_db.get_many(MANIFEST_CHUNKS_COLLECTION, chunk_ids)
+        if len(chunks) != len(chunk_ids):
+            return None
+        return [entry for chunk in chunks for entry in chunk['files']]
+    
+    @staticmethod
+    def _delete_manifest(batch: WriteBatch, manifest: Dict[str, Any]) -> None:
+        """Queue deletes for a manifest document and its chunks"""
+        for chunk_id in DashboardDeploymentService._manifest_chunk_ids(manifest['id'], manifest.get('chunk_count', 0)):
+            batch.delete(MANIFEST_CHUNKS_COLLECTION, chunk_id)
+        batch.delete(MANIFESTS_COLLECTION, manifest['id'])
+    
+    @staticmethod
+    def _release_path(base_path: str, instance_id: str) -> str:
+        """Immutable storage prefix of one deployed build"""
+        return f"{base_path}/releases/{instance_id}"
+    
+    @staticmethod
+    def _activate_release(
+        transaction: Transaction,
+        client_slug: str,
+        project_slug: str,
+        route: Dict[str, Any],
+        release: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Point the route at a new release within a transaction, returning releases that fell out of retention"""
+        route_id = DashboardDeploymentService._route_id(client_slug, project_slug)
+        existing = transaction.get_by_id(ROUTES_COLLECTION, route_id) or {}
+        releases = [release] + [
+            r for r in existing.get('releases', [])
+            if r['dashboard_instance_id'] != release['dashboard_instance_id']
+        ]
+        retained = max(1, settings.DASHBOARD_RELEASES_RETAINED)
+        
+        data = {
+            'client_slug': client_slug,
+            'project_slug': project_slug,
+            **route,
+            'storage_path': release['storage_path'],
+            'dashboard_instance_id': release['dashboard_instance_id'],
+            'deployment_id': release['deployment_id'],
+            'releases': releases[:retained]
+        }
+        # Both writes carry the read's precondition; update also keeps the route's created_at
+        if existing:
+            transaction.update(ROUTES_COLLECTION, route_id, data)
+        else:
+            transaction.create(ROUTES_COLLECTION, data, route_id)
+        return releases[retained:]
+    
+    @staticmethod
+    def _delete_release(release: Dict[str, Any]) -> None:
+        """Remove a retired release's files and manifest"""
+        firebase_storage_service.delete_prefix(f"{release['storage_path']}/")
+        manifest = firebase_db.get_by_id(MANIFESTS_COLLECTION, release['deployment_id'], fields=['chunk_count'])
+        if manifest:
+            with firebase_db.batch() as batch:
+                DashboardDeploymentService._delete_manifest(batch, manifest)
+        dashboard_file_cache.invalidate(release['storage_path'])
+    
+    @staticmethod
+    def list_releases(project_id: str) -> Dict[str, Any]:
+        """Retained releases of a project's dashboard, newest first, with the active one flagged"""
+        route = DashboardDeploymentService._find_route_for_project(project_id)
+        active = route.get('dashboard_instance_id')
+        return {
+            'project_id': project_id,
+            'active_instance_id': active,
+            'releases': [
+                {**release, 'active': release['dashboard_instance_id'] == active}
+                for release in route.get('releases', [])
+            ]
+        }
+    
+    @staticmethod
+    def rollback_project_dashboard(project_id: str, instance_id: Optional[str] = None) -> Dict[str, Any]:
+        """Make a retained release live again by moving the route's pointer; nothing is re-uploaded.
+        
+        Without an instance_id, rolls back to the release deployed before the active one.
+        """
+        route = DashboardDeploymentService._find_route_for_project(project_id)
+        releases = route.get('releases', [])
+        active = route.get('dashboard_instance_id')
+        
+        if instance_id:
+            target = next((r for r in releases if r['dashboard_instance_id'] == instance_id), None)
+            if target is None:
+                raise LookupError("Release not found")
+        else:
+            position = next((i for i, r in enumerate(releases) if r['dashboard_instance_id'] == active), -1)
+            if position < 0 or position + 1 >= len(releases):
+                raise ValueError("No earlier release to roll back to")
+            target = releases[position + 1]
+        
+        if target['dashboard_instance_id'] == active:
+            raise ValueError("Release is already active")
+        
+        # The route write switches what every request resolves; the project follows in the same commit
+        with firebase_db.batch() as batch:
+            batch.update(ROUTES_COLLECTION, route['id'], {
+                'storage_path': target['storage_path'],
+                'dashboard_instance_id': target['dashboard_instance_id'],
+                'deployment_id': target['deployment_id']
+            })
+            batch.update('projects', project_id, {
+                'dashboard_instance_id': target['dashboard_instance_id']
+            })
+        if not all(batch.results):
+            raise Exception("Failed to switch the active release")
+        
+        return {
+            'project_id': project_id,
+            'dashboard_instance_id': target['dashboard_instance_id'],
+            'deployment_id': target['deployment_id'],
+            'previous_instance_id': active
+        }
+    
+    @staticmethod
+    def _find_route_for_project(project_id: str) -> Dict[str, Any]:
+        """The route lookup that carries a project's releases"""
+        routes = firebase_db.get_all(ROUTES_COLLECTION, [('project_id', '==', project_id)])
+        route = next((r for r in routes if r.get('releases')), None)
+        if route is None:
+            raise LookupError("No releases found for project")
+        return route
+    
+    @staticmethod
+    def _compress_variants(file_content: bytes, content_type: str) -> Dict[str, bytes]:
+        """Build precompressed encodings of a file, keyed by Content-Encoding"""
+        if content_type not in COMPRESSIBLE_CONTENT_TYPES or len(file_content) < COMPRESSION_MIN_BYTES:
+            return {}
+        
+        variants = {}
+        # mtime=0 keeps the output, and so its ETag, stable across redeploys
+        variants['gzip'] = gzip.compress(file_content, compresslevel=9, mtime=0)
+        variants['br'] = brotli.compress(file_content, quality=11)
+        
+        # Only keep encodings that actually save bytes
+        return {encoding: data for encoding, data in variants.items() if len(data) < len(file_content)}
+    
+    @staticmethod
+    def _upload_compressed_variants(file_content: bytes, storage_file_path: str, content_type: str) -> List[str]:
+        """Upload .gz/.br siblings next to a built file, returning the encodings uploaded"""
+        variants = DashboardDeploymentService._compress_variants(file_content, content_type)
+        for encoding, data in variants.items():
+            firebase_storage_service.upload_file(
+                data,
+                storage_file_path + COMPRESSED_VARIANTS[encoding],
+                'application/gzip' if encoding == 'gzip' else 'application/x-brotli',
+                retries=settings.DASHBOARD_UPLOAD_RETRIES
+            )
+        return sorted(variants)
+    
+    @staticmethod
+    def _prepare_html(file_content: bytes) -> bytes:
+        """Inject mobile-friendly meta tags and styles into an HTML document (idempotent)"""
+        try:
+            html_content = file_content.decode('utf-8')
+        except UnicodeDecodeError:
+            # If decoding fails, keep original content
+            return file_content
+        
+        if MOBILE_MARKER in html_content:
+            return file_content
+        
+        # Mobile-friendly meta tags and styles
+        mobile_enhancements = [MOBILE_MARKER]
+        
+        # Viewport meta tag
+        if 'name="viewport"' not in html_content.lower():
+            mobile_enhancements.append(MOBILE_VIEWPORT_TAG)
+        
+        # Mobile-friendly CSS
+        mobile_enhancements.append(MOBILE_CSS)
+        
+        # Inject enhancements
+        enhancements_html = '\n    '.join(mobile_enhancements)
+        if '<head>' in html_content:
+            html_content = html_content.replace('<head>', f'<head>\n    {enhancements_html}')
+        elif '<HEAD>' in html_content:
+            html_content = html_content.replace('<HEAD>', f'<HEAD>\n    {enhancements_html}')
+        else:
+            return file_content
+        
+        return html_content.encode('utf-8')
+    
+    @staticmethod
+    def reprocess_html(project_id: str) -> Dict[str, Any]:
+        """Re-run the mobile HTML injection over an already-deployed dashboard"""
+        deployments = firebase_db.get_all('dashboard_deployments', [
+            ('project_id', '==', project_id),
+            ('deployment_type', '==', 'project')
+        ])
+        storage_paths = {d['storage_path'] for d in deployments if d.get('storage_path')}
+        if not storage_paths:
+            raise Exception("No deployed dashboard found for project")
+        
+        updated = []
+        for storage_path in storage_paths:
+            for file_path in firebase_storage_service.list_files(f"{storage_path}/"):
+                if not file_path.lower().endswith('.html'):
+                    continue
+                content = firebase_storage_service.get_file(file_path)
+                if content is None:
+                    continue
+                prepared = DashboardDeploymentService._prepare_html(content)
+                if prepared != content:
+                    firebase_storage_service.upload_file(prepared, file_path, 'text/html')
+                    DashboardDeploymentService._upload_compressed_variants(prepared, file_path, 'text/html')
+                    updated.append(file_path)
+            dashboard_file_cache.invalidate(storage_path)
+        
+        return {'project_id': project_id, 'updated_files': updated}
+    
+    @staticmethod
+    def _storage_unit(file_path: str) -> Optional[str]:
+        """The deployment a stored file belongs to: its release prefix, or the slug path for legacy in-place builds"""
+        parts = file_path.split('/')
+        if len(parts) < 4 or parts[0] not in STORAGE_ROOTS:
+            return None
+        if parts[3] == 'releases' and len(parts) > 5:
+            return '/'.join(parts[:5])
+        return '/'.join(parts[:3])
+    
+    @staticmethod
+    def _referenced_storage_units() -> set:
+        """Storage prefixes some project's deployment still needs, including releases retained for rollback.
+        
+        Fails closed: a failed read raises rather than reporting nothing as referenced.
+        """
+        routes = {}
+        for route in firebase_db.get_all(ROUTES_COLLECTION, raise_errors=True):
+            routes.setdefault(route.get('project_id'), []).append(route)
+        
+        referenced = set()
+        deployed = 0
+        for project in firebase_db.get_all('projects', fields=['dashboard_url'], raise_errors=True):
+            dashboard_url = project.get('dashboard_url')
+            if not dashboard_url:
+                continue
+            deployed += 1
+            project_routes = routes.get(project['id'], [])
+            for route in project_routes:
+                if route.get('releases'):
+                    referenced.update(release['storage_path'] for release in route['releases'])
+                elif route.get('storage_path'):
+                    referenced.add(route['storage_path'])
+            if not project_routes:
+                # Deployed before the route index; the URL carries the slug path
+                prefix, _, slugs = dashboard_url.strip('/').partition('/')
+                root = {'dashboard': 'dashboards', 'addins': 'addins'}.get(prefix)
+                if root:
+                    referenced.add(f"{root}/{slugs}")
+        if deployed and not referenced:
+            raise RuntimeError(f"{deployed} projects have dashboards but no storage is referenced; refusing to collect")
+        return referenced
+    
+    @staticmethod
+    def collect_garbage(dry_run: bool = True) -> Dict[str, Any]:
+        """Find (and unless dry_run, delete) dashboard storage no project's deployment references.
+        
+        Files written within DASHBOARD_GC_GRACE_SECONDS are left alone so releases still being
+        uploaded are never collected. Raises, deleting nothing, when the projects or routes can't be read.
+        """
+        referenced = DashboardDeploymentService._referenced_storage_units()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.DASHBOARD_GC_GRACE_SECONDS)
+        
+        orphans: Dict[str, List[Dict[str, Any]]] = {}
+        recent = set()
+        for root in STORAGE_ROOTS:
+            for info in firebase_storage_service.list_file_info(f"{root}/"):
+                unit = DashboardDeploymentService._storage_unit(info['name'])
+                if unit is None or unit in referenced:
+                    continue
+                if info['updated'] and info['updated'] > cutoff:
+                    recent.add(unit)
+                orphans.setdefault(unit, []).append(info)
+        
+        prefixes = [
+            {
+                'prefix': unit,
+                'files': len(files),
+                'bytes': sum(f['size'] for f in files)
+            }
+            for unit, files in sorted(orphans.items()) if unit not in recent
+        ]
+        
+        if not dry_run:
+            for entry in prefixes:
+                firebase_storage_service.delete_files([f['name'] for f in orphans[entry['prefix']]])
+                dashboard_file_cache.invalidate(entry['prefix'])
+            logger.info(f"Collected {len(prefixes)} unreferenced dashboard prefixes")
+        
+        return {
+            'dry_run': dry_run,
+            'prefixes': prefixes,
+            'files': sum(entry['files'] for entry in prefixes),
+            'reclaimable_bytes': sum(entry['bytes'] for entry in prefixes)
+        }
     
     @staticmethod
     def _update_dashboard_instance_id(project_dir: str, instance_id: str) -> None:
@@ -248,6 +1209,79 @@ class DashboardDeploymentService:
         else:
             logger.warning("App.tsx not found in project directory")
     
+    @staticmethod
+    def _apply_instance_id_to_build(build_dir: str, instance_id: str) -> int:
+        """Write the instance ID into built JavaScript, returning how many files changed.
+        
+        Browsers cache fingerprinted files as immutable, so a changed one is renamed and
+        references to it are rewritten; that can change (and rename) the files that
+        import it in turn.
+        """
+        text_files = []
+        for root, dirs, files in os.walk(build_dir):
+            for file in files:
+                if os.path.splitext(file)[1].lower() in ('.js', '.mjs', '.html', '.css', '.json'):
+                    text_files.append(os.path.join(root, file))
+        
+        contents = {}
+        for path in text_files:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    contents[path] = f.read()
+            except UnicodeDecodeError:
+                continue
+        original = dict(contents)
+        
+        def replace_id(match: re.Match) -> str:
+            if match.group(1):
+                return f"{match.group(1)}{match.group(2)}{instance_id}{match.group(2)}"
+            return f"{match.group(3)}{instance_id}{match.group(3)}"
+        
+        for path, content in contents.items():
+            if path.endswith(('.js', '.mjs')):
+                contents[path] = INSTANCE_ID_PATTERN.sub(replace_id, content)
+        
+        suffix = instance_id.rsplit('-', 1)[-1][:8]
+        renamed: Dict[str, str] = {}
+        source_maps: List[Tuple[str, str]] = []
+        while True:
+            pending = {}
+            for path, content in contents.items():
+                name = os.path.basename(path)
+                match = FINGERPRINTED_NAME_PATTERN.match(name)
+                if content != original[path] and match and name not in renamed:
+                    pending[name] = f"{match.group(1)}-{suffix}{match.group(2)}"
+                    # A source map moves with its file so sourceMappingURL keeps resolving
+                    if os.path.exists(f"{path}.map"):
+                        pending[f"{name}.map"] = f"{pending[name]}.map"
+                        target = os.path.join(os.path.dirname(path), f"{pending[name]}.map")
+                        source_maps.append((f"{path}.map", target))
+            if not pending:
+                break
+            renamed.update(pending)
+            # Match whole file names only: index-B3kP9xQe.js is not a match inside index-B3kP9xQe.js.map
+            names = re.compile(
+                r"(^|[\s'\"`/(=])(" + '|'.join(re.escape(name) for name in pending) + r")(?![\w.-])",
+                re.MULTILINE
+            )
+            for path in contents:
+                contents[path] = names.sub(lambda m: f"{m.group(1)}{pending[m.group(2)]}", contents[path])
+        
+        for source, target in source_maps:
+            os.replace(source, target)
+        
+        changed = 0
+        for path, content in contents.items():
+            if content == original[path]:
+                continue
+            changed += 1
+            os.remove(path)
+            name = os.path.basename(path)
+            target = os.path.join(os.path.dirname(path), renamed.get(name, name))
+            with open(target, 'w', encoding='utf-8') as f:
+                f.write(content)
+        return changed
+    
     @staticmethod
     def _get_content_type(filename: str) -> str:
         """Get content type based on file extension"""
@@ -270,6 +1304,107 @@ class DashboardDeploymentService:
         }
         return content_types.get(ext, 'application/octet-stream')
     
+    @staticmethod
+    def _route_id(client_slug: str, project_slug: str) -> str:
+        """Document ID of the route lookup for a slug pair"""
+        # Sanitized slugs never contain underscores, so the separator is unambiguous
+        return f"{client_slug}__{project_slug}"
+    
+    @staticmethod
+    def _write_dashboard_route(client_slug: str, project_slug: str, route: Dict[str, Any]) -> None:
+        """Create or replace the route lookup document for a deployed project"""
+        route_id = DashboardDeploymentService._route_id(client_slug, project_slug)
+        route_doc = {'client_slug': client_slug, 'project_slug': project_slug, **route}
+        
+        created = firebase_db.create(ROUTES_COLLECTION, route_doc, route_id)
+        if created:
+            _route_cache.set(route_id, created)
+        else:
+            logger.warning(f"Failed to write dashboard route {route_id}")
+    
+    @staticmethod
+    def _find_dashboard_route_by_scan(client_slug: str, project_slug: str) -> Optional[Dict[str, Any]]:
+        """Resolve slugs by scanning clients and projects (deployments made before the route index)"""
+        clients = firebase_db.get_all('clients')
+        client = None
+        for c in clients:
+            if DashboardDeploymentService._sanitize_name(c['company']) == client_slug:
+                client = c
+                break
+        
+        if not client:
+            return None
+        
+        projects = firebase_db.get_all('projects', [('client_id', '==', client['id'])])
+        for p in projects:
+            if DashboardDeploymentService._sanitize_name(p['name']) == project_slug:
+                dashboard_url = p.get('dashboard_url')
+                if not dashboard_url:
+                    return None
+                
+                storage_path = None
+                if dashboard_url.startswith('/dashboard/'):
+                    storage_path = f"dashboards/{client_slug}/{project_slug}"
+                elif dashboard_url.startswith('/addins/'):
+                    storage_path = f"addins/{client_slug}/{project_slug}"
+                
+                return {
+                    'client_id': client['id'],
+                    'project_id': p['id'],
+                    'dashboard_url': dashboard_url,
+                    'storage_path': storage_path,
+                    'dashboard_instance_id': p.get('dashboard_instance_id')
+                }
+        return None
+    
+    @staticmethod
+    def get_dashboard_route(client_slug: str, project_slug: str) -> Optional[Dict[str, Any]]:
+        """Resolve a (client_slug, project_slug) pair to its deployed project"""
+        route_id = DashboardDeploymentService._route_id(client_slug, project_slug)
+        
+        route = _route_cache.get(route_id)
+        if route is not None:
+            return route or None
+        
+        route = firebase_db.get_by_id(ROUTES_COLLECTION, route_id)
+        if route is None:
+            # Backfill the index for dashboards deployed before it existed
+            route = DashboardDeploymentService._find_dashboard_route_by_scan(client_slug, project_slug)
+            if route is None:
+                _route_cache.set(route_id, {}, ttl=ROUTE_MISS_TTL_SECONDS)
+                return None
+            DashboardDeploymentService._write_dashboard_route(client_slug, project_slug, route)
+            route = {'id': route_id, 'client_slug': client_slug, 'project_slug': project_slug, **route}
+        
+        _route_cache.set(route_id, route)
+        return route
+    
+    @staticmethod
+    def _cached_fields(collection: str, doc_id: Optional[str], fields: List[str]) -> Optional[Dict[str, Any]]:
+        """A projected read through _owner_cache; missing documents are cached as {}"""
+        if not doc_id:
+            return None
+        doc = _owner_cache.get((collection, doc_id))
+        if doc is None:
+            doc = firebase_db.get_by_id(collection, doc_id, fields=fields) or {}
+            _owner_cache.set((collection, doc_id), doc)
+        return doc or None
+    
+    @staticmethod
+    def _live_client_id(route: Dict[str, Any], client_slug: str, project_slug: str) -> Optional[str]:
+        """The client the routed project belongs to now, or None once it is undeployed, renamed, moved or deleted"""
+        project = DashboardDeploymentService._cached_fields(
+            'projects', route.get('project_id'), ['name', 'client_id', 'dashboard_url']
+        )
+        if not project or not project.get('dashboard_url'):
+            return None
+        if DashboardDeploymentService._sanitize_name(project.get('name') or '') != project_slug:
+            return None
+        client = DashboardDeploymentService._cached_fields('clients', project.get('client_id'), ['company'])
+        if not client or DashboardDeploymentService._sanitize_name(client.get('company') or '') != client_slug:
+            return None
+        return project['client_id']
+    
     @staticmethod
     async def validate_dashboard_access(
         client_slug: str, 
@@ -279,26 +1414,15 @@ class DashboardDeploymentService:
         """Validate if user has access to dashboard"""
         
         try:
-            # Find client by slug
-            clients = firebase_db.get_all('clients')
-            client = None
-            for c in clients:
-                if DashboardDeploymentService._sanitize_name(c['company']) == client_slug:
-                    client = c
-                    break
-            
-            if not client:
+            route = await run_in_threadpool(DashboardDeploymentService.get_dashboard_route, client_slug, project_slug)
+            if not route or not route.get('dashboard_url'):
                 return False
             
-            # Find project by slug and client
-            projects = firebase_db.get_all('projects', [('client_id', '==', client['id'])])
-            project = None
-            for p in projects:
-                if DashboardDeploymentService._sanitize_name(p['name']) == project_slug:
-                    project = p
-                    break
-            
-            if not project or not project.get('dashboard_url'):
+            # The route's client_id is a deploy-time copy; decide on the live project and client
+            client_id = await run_in_threadpool(
+                DashboardDeploymentService._live_client_id, route, client_slug, project_slug
+            )
+            if client_id is None:
                 return False
             
             # Both Dashboard and Add-ins projects can be served through internal system
@@ -315,7 +1439,7 @@ class DashboardDeploymentService:
                 user_client_id = current_user.get('client_id')
                 user_project_ids = current_user.get('project_ids', [])
                 
-                return (user_client_id == client['id'] and project['id'] in user_project_ids)
+                return (user_client_id == client_id and route['project_id'] in user_project_ids)
             
             return False
             
@@ -339,22 +1463,42 @@ class DashboardDeploymentService:
         deployment = deployments[0]  # Get the latest deployment
         
         try:
-            # Delete files from Firebase Storage if storage_path exists
-            if 'storage_path' in deployment:
-                # Note: Firebase Storage doesn't have a direct "delete folder" API
-                # This would need to be implemented based on your storage structure
-                pass
+            routes = firebase_db.get_all(ROUTES_COLLECTION, [('project_id', '==', project_id)])
             
-            # Remove dashboard URL and instance ID from project
-            firebase_db.update('projects', project_id, {
-                'dashboard_url': None,
-                'dashboard_instance_id': None
-            })
+            # Delete the project's whole storage tree: every retained release and any legacy in-place build
+            base_paths = {
+                route.get('base_path') or route['storage_path']
+                for route in routes if route.get('storage_path')
+            }
+            if deployment.get('storage_path'):
+                base_paths.add(deployment['storage_path'].split('/releases/')[0])
+            for base_path in base_paths:
+                removed = firebase_storage_service.delete_prefix(f"{base_path}/")
+                logger.info(f"Deleted {removed['files']} files ({removed['bytes']} bytes) under {base_path}")
+                dashboard_file_cache.invalidate(base_path)
             
-            # Delete deployment record
-            firebase_db.delete('dashboard_deployments', deployment['id'])
+            manifests = firebase_db.get_all(
+                MANIFESTS_COLLECTION, [('project_id', '==', project_id)], fields=['chunk_count']
+            )
+            with firebase_db.batch() as batch:
+                # Remove dashboard URL and instance ID from project
+                batch.update('projects', project_id, {
+                    'dashboard_url': None,
+                    'dashboard_instance_id': None
+                })
+                
+                # Stop resolving the project's slugs
+                for route in routes:
+                    batch.delete(ROUTES_COLLECTION, route['id'])
+                
+                # Without manifests the next deploy uploads the full build
+                for manifest in manifests:
+                    DashboardDeploymentService._delete_manifest(batch, manifest)
+                
+                # Delete deployment record
+                batch.delete('dashboard_deployments', deployment['id'])
             
-            return True
+            return all(batch.results)
             
         except Exception as e:
             print(f"Error deleting dashboard deployment: {e}")
@@ -0,0 +1,275 @@
+from collections import OrderedDict
+from typing import Callable, Iterator, Optional, Tuple
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+
+class DashboardFileCache:
+    """Two-tier cache for deployed dashboard files.
+
+    Deployed builds are immutable per dashboard_instance_id, so entries are
+    keyed by (instance_id, storage_path) and never need revalidation. Small
+    files live in a bounded in-memory LRU; everything else is written to a
+    size-bounded on-disk cache. Lookups that missed in Storage are remembered
+    briefly so the serving fallbacks don't re-probe the bucket.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        disk_max_bytes: int,
+        memory_max_bytes: int,
+        memory_max_file_bytes: int
+    ):
+        self.cache_dir = cache_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self.memory_max_file_bytes = memory_max_file_bytes
+
+        self._memory: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[CacheKey, Tuple[str, int]]" = OrderedDict()
+        self._disk_bytes = 0
+        self._etags: dict = {}
+        self._missing = TTLCache(max_size=4096, ttl=300)
+        self._lock = threading.Lock()
+        self._disk_ready = False
+
+    def _ensure_disk(self) -> bool:
+        """Create a clean cache directory on first use; files from a previous process are not indexed"""
+        if self._disk_ready:
+            return True
+        if self.disk_max_bytes <= 0:
+            return False
+        try:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._disk_ready = True
+        except OSError as e:
+            logger.warning(f"Dashboard disk cache disabled, cannot use {self.cache_dir}: {e}")
+            self.disk_max_bytes = 0
+        return self._disk_ready
+
+    def _disk_file(self, key: CacheKey) -> str:
+        # Hash the key so storage paths from URLs never become filesystem paths
+        digest = hashlib.sha256(f"{key[0]}\0{key[1]}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest)
+
+    def get(self, instance_id: Optional[str], storage_path: str) -> Optional[bytes]:
+        """Return cached content, or None on a miss"""
+        key = (instance_id or '', storage_path)
+
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                return content
+
+            disk_entry = self._disk.get(key)
+            if disk_entry is None:
+                return None
+            self._disk.move_to_end(key)
+
+        try:
+            with open(disk_entry[0], 'rb') as f:
+                content = f.read()
+        except OSError:
+            with self._lock:
+                self._drop_disk(key)
+            return None
+
+        self._put_memory(key, content)
+        return content
+
+    def get_disk_entry(self, instance_id: Optional[str], storage_path: str) -> Optional[Tuple[str, int]]:
+        """Path and size of an entry held on disk, for streaming it without loading it into memory"""
+        key = (instance_id or '', storage_path)
+        with self._lock:
+            entry = self._disk.get(key)
+            if entry is not None:
+                self._disk.move_to_end(key)
+            return entry
+
+    def tee(self, instance_id: Optional[str], storage_path: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """Yield chunks while writing them to the disk cache; the entry is kept only if the stream completes"""
+        key = (instance_id or '', storage_path)
+        if not self._ensure_disk():
+            yield from chunks
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+        size = 0
+        digest = hashlib.md5()
+        completed = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                    yield chunk
+            completed = True
+        finally:
+            if completed and size <= self.disk_max_bytes:
+                self._commit_disk(key, tmp_path, size, digest.hexdigest())
+            elif os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def put(self, instance_id: Optional[str], storage_path: str, content: bytes) -> None:
+        """Cache content in memory when small enough, and on disk"""
+        key = (instance_id or '', storage_path)
+        self._missing.invalidate(key)
+        # MD5 hex matches the md5Hash Storage keeps for the object, so validators
+        # from cached content and from blob metadata agree
+        etag = hashlib.md5(content).hexdigest()
+        self._put_memory(key, content)
+        self._put_disk(key, content)
+        with self._lock:
+            if key in self._memory or key in self._disk:
+                self._etags[key] = etag
+
+    def get_etag(self, instance_id: Optional[str], storage_path: str) -> Optional[str]:
+        """Content MD5 of a cached entry, without reading its body"""
+        key = (instance_id or '', storage_path)
+        with self._lock:
+            if key in self._memory or key in self._disk:
+                return self._etags.get(key)
+            return None
+
+    def is_missing(self, instance_id: Optional[str], storage_path: str) -> bool:
+        """Whether a recent fetch found nothing at this path"""
+        return (instance_id or '', storage_path) in self._missing
+
+    def mark_missing(self, instance_id: Optional[str], storage_path: str) -> None:
+        self._missing.set((instance_id or '', storage_path), True)
+
+    def get_or_fetch(
+        self,
+        instance_id: Optional[str],
+        storage_path: str,
+        fetch: Callable[[str], Optional[bytes]]
+    ) -> Optional[bytes]:
+        """Return cached content, fetching and caching it on a miss"""
+        content = self.get(instance_id, storage_path)
+        if content is not None:
+            return content
+        if self.is_missing(instance_id, storage_path):
+            return None
+
+        content = fetch(storage_path)
+        if content is None:
+            self.mark_missing(instance_id, storage_path)
+        else:
+            self.put(instance_id, storage_path, content)
+        return content
+
+    def invalidate(self, storage_prefix: str) -> None:
+        """Drop every cached entry under a storage path prefix, for all instances"""
+        prefix = storage_prefix.rstrip('/') + '/'
+        matches = lambda key: key[1].startswith(prefix)
+
+        with self._lock:
+            for key in [key for key in self._memory if matches(key)]:
+                self._memory_bytes -= len(self._memory.pop(key))
+            for key in [key for key in self._disk if matches(key)]:
+                self._drop_disk(key)
+            for key in [key for key in self._etags if matches(key)]:
+                del self._etags[key]
+        self._missing.invalidate_where(matches)
+
+    def clear(self) -> None:
+        """Drop everything"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for key in list(self._disk):
+                self._drop_disk(key)
+            self._etags.clear()
+        self._missing.clear()
+
+    def _put_memory(self, key: CacheKey, content: bytes) -> None:
+        size = len(content)
+        if size > self.memory_max_file_bytes or size > self.memory_max_bytes:
+            return
+
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = content
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_max_bytes:
+                evicted_key, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+                if evicted_key not in self._disk:
+                    self._etags.pop(evicted_key, None)
+
+    def _put_disk(self, key: CacheKey, content: bytes) -> None:
+        size = len(content)
+        if size > self.disk_max_bytes or not self._ensure_disk():
+            return
+
+        tmp_path = None
+        try:
+            # Write to a temp file and rename so readers never see partial content
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+        except OSError as e:
+            logger.warning(f"Failed to write dashboard cache entry for {key[1]}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        self._commit_disk(key, tmp_path, size)
+
+    def _commit_disk(self, key: CacheKey, tmp_path: str, size: int, etag: Optional[str] = None) -> None:
+        """Move a fully written temp file into place and account for it"""
+        path = self._disk_file(key)
+        try:
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write dashboard cache entry for {key[1]}: {e}")
+            return
+
+        with self._lock:
+            previous = self._disk.pop(key, None)
+            if previous is not None:
+                self._disk_bytes -= previous[1]
+            self._disk[key] = (path, size)
+            self._disk_bytes += size
+            if etag is not None:
+                self._etags[key] = etag
+            while self._disk_bytes > self.disk_max_bytes and self._disk:
+                self._drop_disk(next(iter(self._disk)))
+
+    def _drop_disk(self, key: CacheKey) -> None:
+        """Remove a disk entry; caller holds the lock"""
+        entry = self._disk.pop(key, None)
+        if entry is None:
+            return
+        self._disk_bytes -= entry[1]
+        if key not in self._memory:
+            self._etags.pop(key, None)
+        try:
+            os.remove(entry[0])
+        except OSError:
+            pass
+
+
+dashboard_file_cache = DashboardFileCache(
+    cache_dir=settings.DASHBOARD_CACHE_DIR,
+    disk_max_bytes=settings.DASHBOARD_CACHE_DISK_MAX_BYTES,
+    memory_max_bytes=settings.DASHBOARD_CACHE_MEMORY_MAX_BYTES,
+    memory_max_file_bytes=settings.DASHBOARD_CACHE_MEMORY_MAX_FILE_BYTES
+)
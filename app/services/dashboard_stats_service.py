@@ -0,0 +1,65 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.firebase_db import async_firebase_db, register_write_listener
+
+STATS_KEY = 'dashboard'
+
+# One cached result shared by every admin; writes to the counted collections drop it
+stats_cache = TTLCache(max_size=1, ttl=settings.DASHBOARD_STATS_TTL_SECONDS)
+
+register_write_listener(['projects', 'clients', 'invoices'], lambda collection, doc_id, data: stats_cache.clear())
+
+
+def invoice_total(items: Optional[List[Dict[str, Any]]]) -> float:
+    """Sum of price times quantity over invoice items, stored as total so revenue can be summed server-side"""
+    total = 0.0
+    for item in items or []:
+        try:
+            total += float(item.get('price') or 0) * float(item.get('quantity') or 0)
+        except (TypeError, ValueError):
+            continue
+    return total
+
+
+class DashboardStatsService:
+    @staticmethod
+    async def get_stats() -> Dict[str, Any]:
+        """Admin home totals from aggregation queries, cached for DASHBOARD_STATS_TTL_SECONDS"""
+        stats = stats_cache.get(STATS_KEY)
+        if stats is not None:
+            return stats
+
+        currencies = settings.dashboard_stats_currencies_list
+        paid = [('status', '==', 'Paid')]
+        results = await asyncio.gather(
+            async_firebase_db.aggregate('projects', [('count', None, 'count')]),
+            async_firebase_db.aggregate('clients', [('count', None, 'count')]),
+            async_firebase_db.aggregate('invoices', [('count', None, 'count')], [('status', '==', 'Pending')]),
+            async_firebase_db.aggregate('invoices', [('count', None, 'count')], paid),
+            *(
+                async_firebase_db.aggregate(
+                    'invoices', [('count', None, 'count'), ('sum', 'total', 'revenue')],
+                    paid + [('currency', '==', currency)]
+                )
+                for currency in currencies
+            )
+        )
+        if any(result is None for result in results):
+            raise RuntimeError("Dashboard statistics are unavailable")
+
+        projects, clients, pending, paid_count, *by_currency = results
+        revenue = {currency: result['revenue'] for currency, result in zip(currencies, by_currency)}
+        stats = {
+            'total_projects': projects['count'],
+            'total_clients': clients['count'],
+            'pending_invoices': pending['count'],
+            'paid_invoices': paid_count['count'],
+            'total_revenue': revenue.get(currencies[0], 0) if currencies else 0,
+            'revenue_by_currency': revenue,
+            # Paid invoices in currencies not listed in DASHBOARD_STATS_CURRENCIES
+            'unsummed_paid_invoices': paid_count['count'] - sum(result['count'] for result in by_currency)
+        }
+        stats_cache.set(STATS_KEY, stats)
+        return stats
@@ -0,0 +1,205 @@
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import logging
+import threading
+import time
+from app.core.config import settings
+from app.core.firebase_db import firebase_db
+
+logger = logging.getLogger(__name__)
+
+DEPLOYMENTS_COLLECTION = 'dashboard_deployments'
+
+# Captured output kept per deployment record (Firestore documents are capped at 1MB)
+MAX_LOG_CHARS = 20000
+
+# How often a running job re-reads its record for a cancel sent to another instance
+CANCEL_POLL_SECONDS = 5.0
+
+
+class DeploymentCancelled(Exception):
+    """Raised inside a deployment once cancellation has been requested"""
+
+
+class DeploymentJob:
+    """Tracks the current phase, per-phase timing and captured logs of a deployment in its record"""
+
+    def __init__(self, deployment_id: str):
+        self.deployment_id = deployment_id
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.cancel_event = threading.Event()
+        self.deadline: Optional[float] = None
+        self._logs: List[str] = []
+        self._log_chars = 0
+        self._record_checked_at = time.monotonic()
+
+    def save(self, data: Dict[str, Any]) -> None:
+        try:
+            firebase_db.update(DEPLOYMENTS_COLLECTION, self.deployment_id, data, return_document=False)
+        except Exception as e:
+            # Status reporting must never fail the deployment itself
+            logger.warning(f"Failed to update deployment {self.deployment_id}: {e}")
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Record a phase as current while the block runs, with its duration once it ends"""
+        self.raise_if_cancelled()
+        started = time.monotonic()
+        self.phases[name] = {'started_at': firebase_db._get_current_timestamp()}
+        self.save({'phase': name, 'phases': self.phases})
+        try:
+            yield
+        finally:
+            self.phases[name]['duration_ms'] = int((time.monotonic() - started) * 1000)
+            self.save({'phases': self.phases, 'logs': self.logs})
+
+    def log(self, text: Optional[str]) -> None:
+        """Capture command output for the status endpoint, keeping the most recent output within the cap"""
+        if not text:
+            return
+        self._logs.append(text.rstrip('\n'))
+        self._log_chars += len(text)
+        while self._log_chars > MAX_LOG_CHARS and len(self._logs) > 1:
+            self._log_chars -= len(self._logs.pop(0))
+
+    @property
+    def logs(self) -> str:
+        return '\n'.join(self._logs)[-MAX_LOG_CHARS:]
+
+    def cancel_requested(self) -> bool:
+        """Whether this job should stop, checking the record now and then for cancels sent elsewhere"""
+        if self.cancel_event.is_set():
+            return True
+        now = time.monotonic()
+        if now - self._record_checked_at >= CANCEL_POLL_SECONDS:
+            self._record_checked_at = now
+            try:
+                record = firebase_db.get_by_id(DEPLOYMENTS_COLLECTION, self.deployment_id)
+            except Exception:
+                record = None
+            if record and record.get('cancel_requested'):
+                self.cancel_event.set()
+        return self.cancel_event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancel_requested():
+            raise DeploymentCancelled("Deployment was cancelled")
+
+    def remaining_time(self) -> Optional[float]:
+        """Seconds left before the build time limit, or None when unlimited"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+
+class DeploymentJobRunner:
+    """In-process FIFO scheduler for deployments.
+
+    At most max_parallel jobs run at once, each on its own worker thread with a
+    private event loop, so blocking npm builds and uploads never stall the
+    server's loop. Waiting jobs have their queue position written to their
+    records; queue state otherwise lives in the records, which is what
+    recovery after a restart reads.
+    """
+
+    def __init__(self, max_parallel: int):
+        self.max_parallel = max_parallel
+        self._queue: Deque[Tuple[DeploymentJob, Callable[[DeploymentJob], Awaitable[Any]]]] = deque()
+        self._running: Dict[str, DeploymentJob] = {}
+        self._condition = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._stopped = False
+
+    def submit(self, job_id: str, run: Callable[[DeploymentJob], Awaitable[Any]]) -> bool:
+        """Queue a job unless one with the same ID is already queued or running"""
+        with self._condition:
+            if job_id in self._running or any(job.deployment_id == job_id for job, _ in self._queue):
+                return False
+            self._queue.append((DeploymentJob(job_id), run))
+            self._stopped = False
+            self._start_workers()
+            self._condition.notify()
+            positions = self._positions()
+        self._publish_positions(positions)
+        return True
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a job on this instance, returning 'queued' or 'running' for where it was found"""
+        with self._condition:
+            for entry in self._queue:
+                if entry[0].deployment_id == job_id:
+                    self._queue.remove(entry)
+                    positions = self._positions()
+                    break
+            else:
+                job = self._running.get(job_id)
+                if job is None:
+                    return None
+                job.cancel_event.set()
+                return 'running'
+        self._publish_positions(positions)
+        return 'queued'
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """1-based position of a waiting job"""
+        with self._condition:
+            for position, (job, _) in enumerate(self._queue, start=1):
+                if job.deployment_id == job_id:
+                    return position
+        return None
+
+    def is_active(self, job_id: str) -> bool:
+        with self._condition:
+            return job_id in self._running or any(job.deployment_id == job_id for job, _ in self._queue)
+
+    def shutdown(self) -> None:
+        """Stop starting jobs; queued ones stay pending in Firestore for the next start.
+        
+        Workers still running a job stay tracked until they exit, so a later submit
+        never starts more than max_parallel of them.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def _start_workers(self) -> None:
+        """Start worker threads on first use; caller holds the condition"""
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        while len(self._workers) < self.max_parallel:
+            worker = threading.Thread(
+                target=self._work, name=f"deploy-job-{len(self._workers)}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                job, run = self._queue.popleft()
+                self._running[job.deployment_id] = job
+                positions = self._positions()
+            self._publish_positions(positions)
+
+            try:
+                asyncio.run(run(job))
+            except Exception as e:
+                logger.error(f"Deployment job {job.deployment_id} failed: {e}")
+            finally:
+                with self._condition:
+                    self._running.pop(job.deployment_id, None)
+
+    def _positions(self) -> List[Tuple[DeploymentJob, int]]:
+        return [(job, position) for position, (job, _) in enumerate(self._queue, start=1)]
+
+    def _publish_positions(self, positions: List[Tuple[DeploymentJob, int]]) -> None:
+        for job, position in positions:
+            job.save({'queue_position': position})
+
+
+deployment_job_runner = DeploymentJobRunner(max_parallel=settings.DEPLOY_MAX_PARALLEL_BUILDS)
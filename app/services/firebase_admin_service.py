@@ -1,8 +1,10 @@
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
+from google.api_core.exceptions import FailedPrecondition
 from google.cloud.firestore_v1.base_query import FieldFilter
 from app.core.config import settings
-from typing import Dict, List, Optional, Any
+from app.core.pagination import DOCUMENT_ID
+from typing import Dict, List, Optional, Any, Tuple
 import logging
 import os
 import json
@@ -12,6 +14,7 @@ logger = logging.getLogger(__name__)
 class FirebaseAdminService:
     _instance = None
     _db = None
+    _async_db = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -55,16 +58,22 @@ class FirebaseAdminService:
                     logger.info(f"Firebase Admin SDK initialized with default credentials for project: {settings.FIREBASE_PROJECT_ID}")
                 
             self._db = firestore.client()
+            self._async_db = firestore_async.client()
             logger.info("Firestore client initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize Firebase Admin SDK: {e}")
             self._db = None
+            self._async_db = None
 
     @property
     def db(self):
         return self._db
 
+    @property
+    def async_db(self):
+        return self._async_db
+
     def create_document(self, collection: str, document_id: str, data: Dict) -> bool:
         """Create a document in Firestore"""
         try:
@@ -79,13 +88,13 @@ class FirebaseAdminService:
             logger.error(f"Error creating document in {collection}: {e}")
             return False
 
-    def get_document(self, collection: str, document_id: str) -> Optional[Dict]:
-        """Get a document from Firestore"""
+    def get_document(self, collection: str, document_id: str, fields: Optional[List[str]] = None) -> Optional[Dict]:
+        """Get a document from Firestore, only the given fields when fields is set"""
         try:
             if not self._db:
                 return None
                 
-            doc = self._db.collection(collection).document(document_id).get()
+            doc = self._db.collection(collection).document(document_id).get(field_paths=fields)
             if doc.exists:
                 data = doc.to_dict()
                 data["id"] = doc.id
@@ -121,22 +130,71 @@ class FirebaseAdminService:
             logger.error(f"Error deleting document from {collection}: {e}")
             return False
 
-    def get_collection(self, collection: str, filters: List = None, limit: int = None) -> List[Dict]:
-        """Get all documents from a collection with optional filters"""
+    @staticmethod
+    def _build_query(
+        client,
+        collection: str,
+        filters: List = None,
+        limit: int = None,
+        order_by: Optional[str] = None,
+        start_after: Optional[List] = None,
+        fields: Optional[List[str]] = None
+    ):
+        """Build a collection query.
+
+        order_by names a field, prefixed with '-' for descending; results are
+        then ordered by document ID to break ties, or by document ID alone when
+        only a cursor is given. start_after holds the cursor values for those
+        orderings, ending with a document ID. fields projects each result onto
+        the listed field paths.
+        """
+        query = client.collection(collection)
+        
+        if fields is not None:
+            query = query.select(fields)
+        
+        if filters:
+            for filter_item in filters:
+                field, operator, value = filter_item
+                query = query.where(filter=FieldFilter(field, operator, value))
+        
+        if order_by or start_after is not None:
+            field = order_by or DOCUMENT_ID
+            direction = firestore.Query.DESCENDING if field.startswith('-') else firestore.Query.ASCENDING
+            order_fields = [field.lstrip('-')]
+            if order_fields[0] != DOCUMENT_ID:
+                order_fields.append(DOCUMENT_ID)
+            for field in order_fields:
+                query = query.order_by(field, direction=direction)
+            if start_after is not None:
+                query = query.start_after(dict(zip(order_fields, start_after)))
+        
+        if limit:
+            query = query.limit(limit)
+        return query
+
+    def get_collection(
+        self,
+        collection: str,
+        filters: List = None,
+        limit: int = None,
+        order_by: Optional[str] = None,
+        start_after: Optional[List] = None,
+        fields: Optional[List[str]] = None,
+        raise_errors: bool = False
+    ) -> List[Dict]:
+        """Get all documents from a collection with optional filters.
+
+        Errors are logged and give an empty list, unless raise_errors is set
+        for callers that must not mistake a failed read for no documents.
+        """
         try:
             if not self._db:
+                if raise_errors:
+                    raise RuntimeError("Firestore client not initialized")
                 return []
                 
-            query = self._db.collection(collection)
-            
-            if filters:
-                for filter_item in filters:
-                    field, operator, value = filter_item
-                    query = query.where(filter=FieldFilter(field, operator, value))
-            
-            if limit:
-                query = query.limit(limit)
-            
+            query = self._build_query(self._db, collection, filters, limit, order_by, start_after, fields)
             docs = query.stream()
             result = []
             for doc in docs:
@@ -146,9 +204,269 @@ class FirebaseAdminService:
             
             logger.info(f"Retrieved {len(result)} documents from {collection}")
             return result
+        except FailedPrecondition as e:
+            # A query without its composite index (see firestore.indexes.json) must not look like an empty page
+            logger.error(f"Query on {collection} needs an index: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error getting collection {collection}: {e}")
+            if raise_errors:
+                raise
+            return []
+
+    def _build_aggregation(self, client, collection: str, filters: List, aggregations: List[Tuple[str, Optional[str], str]]):
+        """Build one aggregation query from (kind, field, alias) triples; kind is count, sum or avg"""
+        query = self._build_query(client, collection, filters)
+        for kind, field, alias in aggregations:
+            if kind == 'count':
+                query = query.count(alias=alias)
+            else:
+                query = getattr(query, kind)(field, alias=alias)
+        return query
+
+    def aggregate(
+        self,
+        collection: str,
+        aggregations: List[Tuple[str, Optional[str], str]],
+        filters: List = None
+    ) -> Optional[Dict[str, Any]]:
+        """Run count/sum/avg aggregations server-side in one round trip, keyed by alias"""
+        try:
+            if not self._db:
+                return None
+                
+            results = self._build_aggregation(self._db, collection, filters, aggregations).get()
+            return {result.alias: result.value for row in results for result in row}
+        except Exception as e:
+            logger.error(f"Error aggregating {collection}: {e}")
+            return None
+
+    def get_documents(self, collection: str, document_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict]:
+        """Get several documents in one batched read; missing documents are skipped"""
+        try:
+            if not self._db:
+                return []
+                
+            refs = [self._db.collection(collection).document(doc_id) for doc_id in document_ids]
+            result = []
+            for doc in self._db.get_all(refs, field_paths=fields):
+                if doc.exists:
+                    data = doc.to_dict()
+                    data["id"] = doc.id
+                    result.append(data)
+            return result
+        except Exception as e:
+            logger.error(f"Error getting documents from {collection}: {e}")
+            return []
+
+    def get_document_version(self, collection: str, document_id: str) -> Tuple[Optional[Dict], Optional[Any]]:
+        """Get a document and its update time, for use as a write precondition"""
+        try:
+            if not self._db:
+                return None, None
+                
+            doc = self._db.collection(collection).document(document_id).get()
+            if doc.exists:
+                data = doc.to_dict()
+                data["id"] = doc.id
+                return data, doc.update_time
+            return None, None
+        except Exception as e:
+            logger.error(f"Error getting document from {collection}: {e}")
+            return None, None
+
+    def _build_batch(self, client, writes: List[Dict]):
+        """Queue writes on a Firestore batch.
+
+        Each write is a dict with op ('set', 'create', 'update' or 'delete'),
+        collection, doc_id, data and optionally update_time, which makes the
+        write fail unless the document is unchanged since it was read.
+        """
+        batch = client.batch()
+        for write in writes:
+            ref = client.collection(write['collection']).document(write['doc_id'])
+            option = None
+            if write.get('update_time') is not None:
+                option = client.write_option(last_update_time=write['update_time'])
+            
+            if write['op'] == 'set':
+                batch.set(ref, write['data'])
+                if option is not None:
+                    # batch.set takes no write option; add the precondition to the queued write
+                    option.modify_write(batch._write_pbs[-1])
+            elif write['op'] == 'create':
+                batch.create(ref, write['data'])
+            elif write['op'] == 'update':
+                batch.update(ref, write['data'], option=option)
+            elif write['op'] == 'delete':
+                batch.delete(ref, option=option)
+        return batch
+
+    def commit_writes(self, writes: List[Dict]) -> bool:
+        """Commit up to 500 writes atomically in one round trip"""
+        try:
+            if not self._db:
+                return False
+                
+            self._build_batch(self._db, writes).commit()
+            logger.info(f"Committed {len(writes)} writes")
+            return True
+        except Exception as e:
+            logger.error(f"Error committing {len(writes)} writes: {e}")
+            return False
+
+    # Async variants backed by the async Firestore client, for use from
+    # request handlers so Firestore round trips don't block the event loop
+    async def create_document_async(self, collection: str, document_id: str, data: Dict) -> bool:
+        """Create a document in Firestore"""
+        try:
+            if not self._async_db:
+                logger.error("Firestore async client not initialized")
+                return False
+                
+            await self._async_db.collection(collection).document(document_id).set(data)
+            logger.info(f"Document created: {collection}/{document_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error creating document in {collection}: {e}")
+            return False
+
+    async def get_document_async(self, collection: str, document_id: str, fields: Optional[List[str]] = None) -> Optional[Dict]:
+        """Get a document from Firestore, only the given fields when fields is set"""
+        try:
+            if not self._async_db:
+                return None
+                
+            doc = await self._async_db.collection(collection).document(document_id).get(field_paths=fields)
+            if doc.exists:
+                data = doc.to_dict()
+                data["id"] = doc.id
+                return data
+            return None
+        except Exception as e:
+            logger.error(f"Error getting document from {collection}: {e}")
+            return None
+
+    async def get_document_version_async(self, collection: str, document_id: str) -> Tuple[Optional[Dict], Optional[Any]]:
+        """Get a document and its update time, for use as a write precondition"""
+        try:
+            if not self._async_db:
+                return None, None
+                
+            doc = await self._async_db.collection(collection).document(document_id).get()
+            if doc.exists:
+                data = doc.to_dict()
+                data["id"] = doc.id
+                return data, doc.update_time
+            return None, None
+        except Exception as e:
+            logger.error(f"Error getting document from {collection}: {e}")
+            return None, None
+
+    async def get_documents_async(self, collection: str, document_ids: List[str], fields: Optional[List[str]] = None) -> List[Dict]:
+        """Get several documents in one batched read; missing documents are skipped"""
+        try:
+            if not self._async_db:
+                return []
+                
+            refs = [self._async_db.collection(collection).document(doc_id) for doc_id in document_ids]
+            result = []
+            async for doc in self._async_db.get_all(refs, field_paths=fields):
+                if doc.exists:
+                    data = doc.to_dict()
+                    data["id"] = doc.id
+                    result.append(data)
+            return result
+        except Exception as e:
+            logger.error(f"Error getting documents from {collection}: {e}")
+            return []
+
+    async def update_document_async(self, collection: str, document_id: str, data: Dict) -> bool:
+        """Update a document in Firestore"""
+        try:
+            if not self._async_db:
+                return False
+                
+            await self._async_db.collection(collection).document(document_id).update(data)
+            logger.info(f"Document updated: {collection}/{document_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error updating document in {collection}: {e}")
+            return False
+
+    async def delete_document_async(self, collection: str, document_id: str) -> bool:
+        """Delete a document from Firestore"""
+        try:
+            if not self._async_db:
+                return False
+                
+            await self._async_db.collection(collection).document(document_id).delete()
+            logger.info(f"Document deleted: {collection}/{document_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting document from {collection}: {e}")
+            return False
+
+    async def get_collection_async(
+        self,
+        collection: str,
+        filters: List = None,
+        limit: int = None,
+        order_by: Optional[str] = None,
+        start_after: Optional[List] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """Get all documents from a collection with optional filters"""
+        try:
+            if not self._async_db:
+                return []
+                
+            query = self._build_query(self._async_db, collection, filters, limit, order_by, start_after, fields)
+            result = []
+            async for doc in query.stream():
+                data = doc.to_dict()
+                data["id"] = doc.id
+                result.append(data)
+            
+            logger.info(f"Retrieved {len(result)} documents from {collection}")
+            return result
+        except FailedPrecondition as e:
+            # A query without its composite index (see firestore.indexes.json) must not look like an empty page
+            logger.error(f"Query on {collection} needs an index: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error getting collection {collection}: {e}")
             return []
 
+    async def aggregate_async(
+        self,
+        collection: str,
+        aggregations: List[Tuple[str, Optional[str], str]],
+        filters: List = None
+    ) -> Optional[Dict[str, Any]]:
+        """Run count/sum/avg aggregations server-side in one round trip, keyed by alias"""
+        try:
+            if not self._async_db:
+                return None
+                
+            results = await self._build_aggregation(self._async_db, collection, filters, aggregations).get()
+            return {result.alias: result.value for row in results for result in row}
+        except Exception as e:
+            logger.error(f"Error aggregating {collection}: {e}")
+            return None
+
+    async def commit_writes_async(self, writes: List[Dict]) -> bool:
+        """Commit up to 500 writes atomically in one round trip"""
+        try:
+            if not self._async_db:
+                return False
+                
+            await self._build_batch(self._async_db, writes).commit()
+            logger.info(f"Committed {len(writes)} writes")
+            return True
+        except Exception as e:
+            logger.error(f"Error committing {len(writes)} writes: {e}")
+            return False
+
 # Global instance
 firebase_admin_service = FirebaseAdminService()
\ No newline at end of file
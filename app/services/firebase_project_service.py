@@ -1,15 +1,15 @@
-from app.core.firebase_db import firebase_db
-from typing import Optional, List, Dict
+from app.core.firebase_db import async_firebase_db
+from typing import Optional, List, Dict, Tuple
 import uuid
 
 class FirebaseProjectService:
     @staticmethod
-    def create_project(project_data: Dict) -> Optional[Dict]:
+    async def create_project(project_data: Dict) -> Optional[Dict]:
         """Create a new project in Firebase"""
         project_id = f"p-{uuid.uuid4().hex[:8]}"
         
         # Get currency from payment plan
-        plan = firebase_db.get_by_id('payment_plans', project_data.get('plan_id'))
+        plan = await async_firebase_db.get_by_id('payment_plans', project_data.get('plan_id'))
         currency = plan.get('currency', 'USD') if plan else 'USD'
         
         project_doc = {
@@ -26,33 +26,38 @@ class FirebaseProjectService:
             'currency': currency
         }
         
-        return firebase_db.create('projects', project_doc, project_id)
+        return await async_firebase_db.create('projects', project_doc, project_id)
 
     @staticmethod
-    def get_project(project_id: str) -> Optional[Dict]:
+    async def get_project(project_id: str) -> Optional[Dict]:
         """Get project by ID"""
-        return firebase_db.get_by_id('projects', project_id)
+        return await async_firebase_db.get_by_id('projects', project_id)
 
     @staticmethod
-    def get_projects(client_id: str = None, search: str = None) -> List[Dict]:
-        """Get all projects with optional filters"""
+    async def get_projects(
+        client_id: str = None,
+        search: str = None,
+        limit: int = None,
+        order_by: str = None,
+        cursor: str = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Get a page of projects with optional filters, and the cursor for the next page"""
         filters = []
         if client_id:
             filters.append(('client_id', '==', client_id))
         
-        projects = firebase_db.get_all('projects', filters)
-        
         if search:
-            projects = [p for p in projects if search.lower() in p.get('name', '').lower()]
-        
-        return projects
+            return await async_firebase_db.search_page('projects', search, filters, limit, order_by, cursor, fields)
+        return await async_firebase_db.get_page('projects', filters, limit, order_by, cursor, fields)
 
     @staticmethod
-    def update_project(project_id: str, project_data: Dict) -> Optional[Dict]:
+    async def update_project(project_id: str, project_data: Dict) -> Optional[Dict]:
         """Update project"""
         # Check if project type is being changed
+        current_project = None
         if 'project_type' in project_data:
-            current_project = firebase_db.get_by_id('projects', project_id)
+            current_project = await async_firebase_db.get_by_id('projects', project_id)
             if current_project:
                 old_type = current_project.get('project_type', 'Dashboard')
                 new_type = project_data['project_type']
@@ -60,65 +65,83 @@ class FirebaseProjectService:
                 # If project type is changing, handle dashboard compatibility
                 if old_type != new_type:
                     from app.services.dashboard_deployment_service import DashboardDeploymentService
-                    import asyncio
                     
-                    # Handle the type change asynchronously
+                    # Handle the type change
                     try:
-                        loop = asyncio.get_event_loop()
-                        change_result = loop.run_until_complete(
-                            DashboardDeploymentService.handle_project_type_change(project_id, old_type, new_type)
+                        change_result = await DashboardDeploymentService.handle_project_type_change(
+                            project_id, old_type, new_type
                         )
                         print(f"Project type change handled: {change_result['message']}")
                     except Exception as e:
                         print(f"Error handling project type change: {e}")
         
-        return firebase_db.update('projects', project_id, project_data)
+        # The project read for the type check is the current document; don't read it again
+        return await async_firebase_db.update('projects', project_id, project_data, current=current_project)
 
     @staticmethod
-    def delete_project(project_id: str) -> bool:
+    async def delete_project(project_id: str) -> bool:
         """Delete project"""
-        return firebase_db.delete('projects', project_id)
+        from app.services.dashboard_deployment_service import (
+            DashboardDeploymentService, ROUTES_COLLECTION, MANIFESTS_COLLECTION
+        )
+        
+        if not await async_firebase_db.delete('projects', project_id):
+            return False
+        
+        # Drop slug lookups so the deleted project's dashboard stops resolving,
+        # and the upload manifests of its deployments
+        filters = [('project_id', '==', project_id)]
+        routes = await async_firebase_db.get_all(ROUTES_COLLECTION, filters, fields=['project_id'])
+        manifests = await async_firebase_db.get_all(MANIFESTS_COLLECTION, filters, fields=['chunk_count'])
+        async with async_firebase_db.batch() as batch:
+            for route in routes:
+                batch.delete(ROUTES_COLLECTION, route['id'])
+            for manifest in manifests:
+                DashboardDeploymentService._delete_manifest(batch, manifest)
+        return True
 
     @staticmethod
-    def get_user_projects(user_id: str) -> List[Dict]:
+    async def get_user_projects(user_id: str) -> List[Dict]:
         """Get projects assigned to a user with client information"""
-        user = firebase_db.get_by_id('users', user_id)
+        user = await async_firebase_db.get_by_id('users', user_id)
         if not user or not user.get('project_ids'):
             return []
         
-        project_ids = user.get('project_ids', [])
-        projects = []
+        # Two batched reads: the assigned projects, then their clients
+        assigned = await async_firebase_db.get_many('projects', user['project_ids'])
+        clients = await async_firebase_db.get_many(
+            'clients', [p.get('client_id') for p in assigned], fields=['company', 'email']
+        )
+        clients_by_id = {client['id']: client for client in clients}
         
-        for project_id in project_ids:
-            project = firebase_db.get_by_id('projects', project_id)
-            if project:
-                # Get client data for this project
-                client_data = None
-                if project.get('client_id'):
-                    client = firebase_db.get_by_id('clients', project.get('client_id'))
-                    if client:
-                        client_data = {
-                            'id': client.get('id'),
-                            'company': client.get('company'),
-                            'email': client.get('email')
-                        }
-                
-                # Transform snake_case to camelCase for frontend
-                transformed_project = {
-                    'id': project.get('id'),
-                    'name': project.get('name'),
-                    'clientId': project.get('client_id'),
-                    'planId': project.get('plan_id'),
-                    'departmentId': project.get('department_id'),
-                    'status': project.get('status'),
-                    'startDate': project.get('start_date'),
-                    'dashboardUrl': project.get('dashboard_url'),
-                    'imageUrl': project.get('image_url'),
-                    'projectType': project.get('project_type'),
-                    'currency': project.get('currency'),
-                    'progress': project.get('progress'),
-                    'client': client_data
+        projects = []
+        for project in assigned:
+            # Get client data for this project
+            client_data = None
+            client = clients_by_id.get(project.get('client_id'))
+            if client:
+                client_data = {
+                    'id': client.get('id'),
+                    'company': client.get('company'),
+                    'email': client.get('email')
                 }
-                projects.append(transformed_project)
+            
+            # Transform snake_case to camelCase for frontend
+            transformed_project = {
+                'id': project.get('id'),
+                'name': project.get('name'),
+                'clientId': project.get('client_id'),
+                'planId': project.get('plan_id'),
+                'departmentId': project.get('department_id'),
+                'status': project.get('status'),
+                'startDate': project.get('start_date'),
+                'dashboardUrl': project.get('dashboard_url'),
+                'imageUrl': project.get('image_url'),
+                'projectType': project.get('project_type'),
+                'currency': project.get('currency'),
+                'progress': project.get('progress'),
+                'client': client_data
+            }
+            projects.append(transformed_project)
         
         return projects
\ No newline at end of file
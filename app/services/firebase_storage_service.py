@@ -1,14 +1,34 @@
 from firebase_admin import storage
+from google.api_core.exceptions import NotFound, ServerError, TooManyRequests
 import uuid
+import random
+import time
 import requests
 from io import BytesIO
 from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import base64
 import logging
 from app.core.config import settings
 from fastapi import UploadFile
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_RETRY_BASE_DELAY = 0.5  # seconds, doubled per attempt
+DELETE_BATCH_SIZE = 100  # the most requests one JSON API batch accepts
+DELETE_CONCURRENCY = 8
+STREAM_READ_AHEAD_BYTES = 4194304  # 4MB per ranged request when streaming a file
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limiting, server errors and dropped connections are worth retrying"""
+    return isinstance(error, (
+        TooManyRequests,
+        ServerError,
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout
+    ))
+
 class FirebaseStorageService:
     def __init__(self):
         self._bucket = None
@@ -49,16 +69,42 @@ class FirebaseStorageService:
             # Return a default avatar URL as fallback
             return self.get_default_avatar(user_id)
     
-    def upload_file(self, file_content: bytes, file_path: str, content_type: str) -> str:
-        """Upload file to Firebase Storage"""
-        try:
+    def _with_retries(self, operation: Callable[[], str], description: str, retries: int) -> str:
+        """Run a write, retrying transient failures with exponential backoff"""
+        attempt = 0
+        while True:
+            try:
+                return operation()
+            except Exception as e:
+                if attempt >= retries or not _is_retryable(e):
+                    logger.error(f"Failed to {description}: {e}")
+                    raise e
+                delay = UPLOAD_RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(1, 1.5)
+                logger.warning(f"Failed to {description} ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+    
+    def _publish(self, blob) -> str:
+        if not settings.FIREBASE_STORAGE_PUBLIC_READ:
+            blob.make_public()
+        return blob.public_url
+    
+    def upload_file(self, file_content: bytes, file_path: str, content_type: str, retries: int = 0) -> str:
+        """Upload file to Firebase Storage, retrying transient failures with exponential backoff"""
+        def upload() -> str:
             blob = self.bucket.blob(file_path)
             blob.upload_from_string(file_content, content_type=content_type)
-            blob.make_public()
-            return blob.public_url
-        except Exception as e:
-            logger.error(f"Failed to upload file {file_path}: {e}")
-            raise e
+            return self._publish(blob)
+        
+        return self._with_retries(upload, f"upload file {file_path}", retries)
+    
+    def copy_file(self, source_path: str, destination_path: str, retries: int = 0) -> str:
+        """Copy a stored file server-side, without downloading it"""
+        def copy() -> str:
+            blob = self.bucket.copy_blob(self.bucket.blob(source_path), self.bucket, destination_path)
+            return self._publish(blob)
+        
+        return self._with_retries(copy, f"copy file {source_path} to {destination_path}", retries)
     
     async def upload_avatar(self, file: UploadFile, user_id: str) -> str:
         """Upload user avatar file to Firebase Storage"""
@@ -126,13 +172,113 @@ class FirebaseStorageService:
         """Get file content from Firebase Storage"""
         try:
             blob = self.bucket.blob(file_path)
-            if not blob.exists():
-                return None
+            # A single download call; a missing object surfaces as NotFound
             return blob.download_as_bytes()
+        except NotFound:
+            return None
         except Exception as e:
             logger.error(f"Failed to get file {file_path}: {e}")
             return None
     
+    def get_file_info(self, file_path: str) -> Optional[Dict]:
+        """Get size and a strong validator for a stored file from its metadata, without downloading it"""
+        try:
+            blob = self.bucket.get_blob(file_path)
+            if blob is None:
+                return None
+            if blob.md5_hash:
+                etag = base64.b64decode(blob.md5_hash).hex()
+            else:
+                # Composite objects have no MD5; the generation changes on every overwrite
+                etag = f"g{blob.generation}"
+            return {
+                'size': blob.size,
+                'etag': etag,
+                'content_type': blob.content_type,
+                'content_encoding': blob.content_encoding,
+                'generation': blob.generation
+            }
+        except Exception as e:
+            logger.error(f"Failed to get metadata for {file_path}: {e}")
+            return None
+    
+    def get_file_etag(self, file_path: str) -> Optional[str]:
+        """Get a strong validator for a stored file without downloading it"""
+        info = self.get_file_info(file_path)
+        return info['etag'] if info else None
+    
+    def iter_file(
+        self,
+        file_path: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: int = 1048576,
+        generation: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Stream a byte range of a stored file in chunks; end is exclusive and defaults to the object size.
+        
+        Reads go through one blob reader pinned to a single generation, so an overwrite mid-stream
+        can't splice two versions together. Pass the generation from get_file_info to skip a metadata read.
+        """
+        blob = self.bucket.blob(file_path, generation=generation)
+        if generation is None or end is None:
+            # Loads the size and pins the live generation for every read below
+            blob.reload()
+            if end is None:
+                end = blob.size
+        if end <= start:
+            return
+        
+        # Fetch up to STREAM_READ_AHEAD_BYTES per request, never past the end of the range
+        read_ahead = min(max(chunk_size, STREAM_READ_AHEAD_BYTES), end - start)
+        with blob.open('rb', chunk_size=read_ahead) as reader:
+            if start:
+                reader.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = reader.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                yield chunk
+                remaining -= len(chunk)
+    
+    def list_files(self, prefix: str) -> List[str]:
+        """List object names under a prefix"""
+        return [blob.name for blob in self.bucket.list_blobs(prefix=prefix)]
+    
+    def list_file_info(self, prefix: str) -> List[Dict[str, Any]]:
+        """List name, size and last update time of every object under a prefix"""
+        return [
+            {'name': blob.name, 'size': blob.size or 0, 'updated': blob.updated}
+            for blob in self.bucket.list_blobs(prefix=prefix)
+        ]
+    
+    def delete_files(self, file_paths: List[str]) -> int:
+        """Delete objects in batched requests, several batches at a time; returns how many were attempted"""
+        chunks = [file_paths[i:i + DELETE_BATCH_SIZE] for i in range(0, len(file_paths), DELETE_BATCH_SIZE)]
+        if not chunks:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(DELETE_CONCURRENCY, len(chunks))) as pool:
+            return sum(pool.map(self._delete_batch, chunks))
+    
+    def _delete_batch(self, file_paths: List[str]) -> int:
+        blobs = [self.bucket.blob(file_path) for file_path in file_paths]
+        try:
+            with self.bucket.client.batch():
+                for blob in blobs:
+                    blob.delete()
+        except Exception as e:
+            # One missing object fails the whole batch; retry this chunk one object at a time
+            logger.warning(f"Batch delete of {len(blobs)} files failed ({e}), deleting individually")
+            self.bucket.delete_blobs(blobs, on_error=lambda blob: None)
+        return len(blobs)
+    
+    def delete_prefix(self, prefix: str) -> Dict[str, int]:
+        """Delete every object under a prefix, returning the file count and bytes removed"""
+        files = self.list_file_info(prefix)
+        self.delete_files([f['name'] for f in files])
+        return {'files': len(files), 'bytes': sum(f['size'] for f in files)}
+    
     def delete_file(self, file_path: str) -> bool:
         """Delete file from Firebase Storage"""
         try:
@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SIZE_FILE = '.size'
+
+
+def _tree_size(path: str) -> int:
+    """Total size of the regular files under a directory"""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """Hardlink a file, copying when the two paths are on different filesystems"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class NodeModulesCache:
+    """Lockfile-keyed cache of installed node_modules trees.
+
+    Builds with an identical package-lock.json get the same dependency tree, so
+    a completed install is kept under the lockfile hash and later builds restore
+    it with hardlinks instead of running npm. Entries are evicted least recently
+    used first once the cache exceeds max_bytes; a max_bytes of 0 disables it.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, npm_cache_dir: str, npm_cache_max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.npm_cache_dir = npm_cache_dir
+        self.npm_cache_max_bytes = npm_cache_max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(lockfile_path: str) -> str:
+        with open(lockfile_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def restore(self, key: str, project_dir: str) -> bool:
+        """Link a cached node_modules into a project, returning False on a miss"""
+        source = os.path.join(self._entry_dir(key), 'node_modules')
+        if self.max_bytes <= 0 or not os.path.isdir(source):
+            return False
+
+        target = os.path.join(project_dir, 'node_modules')
+        shutil.rmtree(target, ignore_errors=True)
+        try:
+            shutil.copytree(source, target, symlinks=True, copy_function=_link_or_copy)
+        except (OSError, shutil.Error) as e:
+            logger.warning(f"Failed to restore cached node_modules {key[:12]}: {e}")
+            shutil.rmtree(target, ignore_errors=True)
+            return False
+
+        # Entry mtime is the LRU clock
+        os.utime(self._entry_dir(key))
+        return True
+
+    def store(self, key: str, project_dir: str) -> None:
+        """Keep a freshly installed node_modules for later builds with the same lockfile"""
+        source = os.path.join(project_dir, 'node_modules')
+        if self.max_bytes <= 0 or not os.path.isdir(source) or os.path.isdir(self._entry_dir(key)):
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            shutil.copytree(source, os.path.join(tmp_dir, 'node_modules'), symlinks=True, copy_function=_link_or_copy)
+            size = _tree_size(tmp_dir)
+            if size > self.max_bytes:
+                return
+            with open(os.path.join(tmp_dir, SIZE_FILE), 'w') as f:
+                f.write(str(size))
+            # Rename into place so concurrent builds never see a partial entry
+            os.rename(tmp_dir, self._entry_dir(key))
+        except (OSError, shutil.Error) as e:
+            # Another build stored the same lockfile first, or the disk is full
+            logger.debug(f"Skipped caching node_modules {key[:12]}: {e}")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._evict()
+
+    def _entry_size(self, key: str) -> int:
+        try:
+            with open(os.path.join(self._entry_dir(key), SIZE_FILE)) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return _tree_size(self._entry_dir(key))
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                path = self._entry_dir(name)
+                if name.startswith('.') or not os.path.isdir(path):
+                    continue
+                entries.append((os.stat(path).st_mtime, name, self._entry_size(name)))
+
+            total = sum(size for _, _, size in entries)
+            for _, name, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(self._entry_dir(name), ignore_errors=True)
+                total -= size
+                logger.info(f"Evicted cached node_modules {name[:12]}")
+
+    def trim_npm_cache(self) -> None:
+        """npm never prunes its download cache; start it over once it outgrows its limit"""
+        if not os.path.isdir(self.npm_cache_dir):
+            return
+        with self._lock:
+            if _tree_size(self.npm_cache_dir) > self.npm_cache_max_bytes:
+                logger.info(f"npm cache exceeded {self.npm_cache_max_bytes} bytes, clearing {self.npm_cache_dir}")
+                shutil.rmtree(self.npm_cache_dir, ignore_errors=True)
+
+    def npm_env(self) -> dict:
+        """Environment for npm commands, pointing them at the shared download cache"""
+        return {**os.environ, 'npm_config_cache': self.npm_cache_dir}
+
+
+node_modules_cache = NodeModulesCache(
+    cache_dir=settings.NODE_MODULES_CACHE_DIR,
+    max_bytes=settings.NODE_MODULES_CACHE_MAX_BYTES,
+    npm_cache_dir=settings.NPM_CACHE_DIR,
+    npm_cache_max_bytes=settings.NPM_CACHE_MAX_BYTES
+)
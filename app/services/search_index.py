@@ -0,0 +1,188 @@
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+import threading
+from app.core.firebase_db import firebase_db, register_write_listener
+from app.core.search_keys import search_term, word_starts
+
+logger = logging.getLogger(__name__)
+
+# Indexed collections: the hit type, the fields matched (the first is the
+# label) and a field shown alongside the label
+INDEXED_SOURCES = {
+    'clients': {'type': 'client', 'fields': ('company',), 'detail': 'email'},
+    'projects': {'type': 'project', 'fields': ('name',), 'detail': 'status'},
+    'users': {'type': 'user', 'fields': ('name', 'email'), 'detail': 'email'},
+    'invoices': {'type': 'invoice', 'fields': ('invoice_number',), 'detail': 'status'},
+}
+
+# Index entries looked at per collection and query; short queries stop here and rank what they found
+MAX_SCAN = 500
+
+DocKey = Tuple[str, str]
+# (text from a word start, collection, document ID, field index, word position)
+Entry = Tuple[str, str, str, int, int]
+
+
+def _tracked_fields(collection: str) -> List[str]:
+    source = INDEXED_SOURCES[collection]
+    return list(dict.fromkeys([*source['fields'], source['detail']]))
+
+
+class _Index:
+    """Sorted word-start entries per collection plus the hit shown for each document; not thread-safe"""
+
+    def __init__(self):
+        # One list per collection, so a types filter never spends the scan window on other types
+        self.entries: Dict[str, List[Entry]] = {collection: [] for collection in INDEXED_SOURCES}
+        self.docs: Dict[DocKey, Dict[str, Any]] = {}
+        self.doc_entries: Dict[DocKey, List[Entry]] = {}
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, Dict]]) -> "_Index":
+        index = cls()
+        for collection, doc in documents:
+            index._store(collection, doc['id'], {field: doc.get(field) for field in _tracked_fields(collection)})
+        for (collection, _), entries in index.doc_entries.items():
+            index.entries[collection].extend(entries)
+        for entries in index.entries.values():
+            entries.sort()
+        return index
+
+    def apply(self, collection: str, doc_id: str, data: Optional[Dict]) -> None:
+        """Apply a write: data is the fields written, None for a delete"""
+        key = (collection, doc_id)
+        if data is None:
+            self._remove(key)
+            return
+
+        written = {field: data[field] for field in _tracked_fields(collection) if field in data}
+        if not written:
+            return
+        values = {**self.docs.get(key, {}).get('values', {}), **written}
+        self._remove(key)
+        for entry in self._store(collection, doc_id, values):
+            insort(self.entries[collection], entry)
+
+    def _store(self, collection: str, doc_id: str, values: Dict[str, Any]) -> List[Entry]:
+        source = INDEXED_SOURCES[collection]
+        entries = []
+        for field_index, field in enumerate(source['fields']):
+            for position, text in enumerate(word_starts(values.get(field) or '')):
+                entries.append((text, collection, doc_id, field_index, position))
+        if not entries:
+            return []
+
+        key = (collection, doc_id)
+        label = next((values[field] for field in source['fields'] if values.get(field)), None)
+        self.docs[key] = {'values': values, 'label': label}
+        self.doc_entries[key] = entries
+        return entries
+
+    def _remove(self, key: DocKey) -> None:
+        self.docs.pop(key, None)
+        entries = self.entries[key[0]]
+        for entry in self.doc_entries.pop(key, []):
+            i = bisect_left(entries, entry)
+            if i < len(entries) and entries[i] == entry:
+                del entries[i]
+
+    def search(self, term: str, limit: int, types: Optional[set]) -> List[Dict[str, Any]]:
+        best: Dict[DocKey, tuple] = {}
+        for collection, entries in self.entries.items():
+            if types and INDEXED_SOURCES[collection]['type'] not in types:
+                continue
+            i = bisect_left(entries, (term,))
+            end = min(len(entries), i + MAX_SCAN)
+            while i < end and entries[i][0].startswith(term):
+                _, _, doc_id, field_index, position = entries[i]
+                i += 1
+                key = (collection, doc_id)
+                label = self.docs[key]['label'] or ''
+                # Whole-value prefix matches first, then the label over other fields, then shorter labels
+                rank = (position > 0, field_index, len(label), label.lower())
+                if key not in best or rank < best[key]:
+                    best[key] = rank
+
+        hits = []
+        for key in sorted(best, key=best.get)[:limit]:
+            collection, doc_id = key
+            source = INDEXED_SOURCES[collection]
+            hits.append({
+                'type': source['type'],
+                'id': doc_id,
+                'label': self.docs[key]['label'],
+                'detail': self.docs[key]['values'].get(source['detail'])
+            })
+        return hits
+
+
+class TypeaheadIndex:
+    """In-process typeahead index over the names admins search for.
+
+    Every indexed field is kept, per collection, as a sorted list of its text
+    from each word start, so a query is a binary search plus a short scan of
+    each collection searched. Writes through
+    FirebaseDB update it immediately; rebuild() re-reads the collections
+    with projected reads and picks up writes made by other instances.
+    """
+
+    def __init__(self):
+        self._index = _Index()
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._pending: Optional[List[Tuple[str, str, Optional[Dict]]]] = None
+        self.loaded = False
+
+    def on_write(self, collection: str, doc_id: str, data: Optional[Dict]) -> None:
+        with self._lock:
+            self._index.apply(collection, doc_id, data)
+            if self._pending is not None:
+                self._pending.append((collection, doc_id, data))
+
+    def rebuild(self) -> int:
+        """Re-read every indexed collection and swap in a fresh index, returning its document count"""
+        with self._rebuild_lock:
+            return self._rebuild()
+
+    def ensure_loaded(self) -> None:
+        """Build the index on first use; concurrent callers wait for the one build"""
+        if self.loaded:
+            return
+        with self._rebuild_lock:
+            if not self.loaded:
+                self._rebuild()
+
+    def _rebuild(self) -> int:
+        with self._lock:
+            self._pending = []
+        try:
+            documents = [
+                (collection, doc)
+                for collection in INDEXED_SOURCES
+                for doc in firebase_db.get_all(collection, fields=_tracked_fields(collection))
+            ]
+            index = _Index.build(documents)
+            with self._lock:
+                # Writes that landed while reading may be missing from what was read
+                for collection, doc_id, data in self._pending:
+                    index.apply(collection, doc_id, data)
+                self._index = index
+                self.loaded = True
+        finally:
+            with self._lock:
+                self._pending = None
+        logger.info(f"Search index rebuilt with {len(index.docs)} documents")
+        return len(index.docs)
+
+    def search(self, query: str, limit: int = 10, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Top hits for a query, matched at word starts across every indexed field"""
+        term = search_term(query)
+        if term is None:
+            return []
+        with self._lock:
+            return self._index.search(term, limit, set(types) if types else None)
+
+
+typeahead_index = TypeaheadIndex()
+register_write_listener(list(INDEXED_SOURCES), typeahead_index.on_write)
@@ -0,0 +1,152 @@
+import copy
+import pytest
+from app.core.firebase_db import firebase_db
+
+
+def _project(doc_id, doc, fields):
+    """A stored document as read, keeping only top-level fields when projected"""
+    if fields is not None:
+        doc = {field: value for field, value in doc.items() if field in fields}
+    return {**copy.deepcopy(doc), "id": doc_id}
+
+
+def _matches(stored, operator, value):
+    if operator == 'array_contains':
+        return value in (stored or [])
+    return stored == value
+
+
+class FakeFirestore:
+    """In-memory stand-in for the FirebaseAdminService document operations"""
+
+    def __init__(self):
+        self.collections = {}
+        self.reads = 0
+        self.commits = 0
+        self.aggregations = 0
+        self.versions = {}
+
+    def create_document(self, collection, document_id, data):
+        self.collections.setdefault(collection, {})[document_id] = copy.deepcopy(data)
+        self._touch(collection, document_id)
+        return True
+
+    def _touch(self, collection, document_id):
+        key = (collection, document_id)
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def get_document(self, collection, document_id, fields=None):
+        self.reads += 1
+        doc = self.collections.get(collection, {}).get(document_id)
+        if doc is None:
+            return None
+        return _project(document_id, doc, fields)
+
+    def update_document(self, collection, document_id, data):
+        docs = self.collections.get(collection, {})
+        if document_id not in docs:
+            return False
+        docs[document_id].update(copy.deepcopy(data))
+        self._touch(collection, document_id)
+        return True
+
+    def delete_document(self, collection, document_id):
+        self.collections.get(collection, {}).pop(document_id, None)
+        self.versions.pop((collection, document_id), None)
+        return True
+
+    async def get_collection_async(self, collection, filters=None, limit=None, order_by=None, start_after=None,
+                                   fields=None):
+        return self.get_collection(collection, filters, limit, order_by, start_after, fields)
+
+    async def get_document_async(self, collection, document_id, fields=None):
+        return self.get_document(collection, document_id, fields)
+
+    async def create_document_async(self, collection, document_id, data):
+        return self.create_document(collection, document_id, data)
+
+    async def update_document_async(self, collection, document_id, data):
+        return self.update_document(collection, document_id, data)
+
+    async def delete_document_async(self, collection, document_id):
+        return self.delete_document(collection, document_id)
+
+    def get_documents(self, collection, document_ids, fields=None):
+        self.reads += 1
+        docs = self.collections.get(collection, {})
+        # Like Firestore's batched read, results don't follow the request order
+        return [_project(doc_id, docs[doc_id], fields) for doc_id in sorted(document_ids) if doc_id in docs]
+
+    async def get_documents_async(self, collection, document_ids, fields=None):
+        return self.get_documents(collection, document_ids, fields)
+
+    def get_document_version(self, collection, document_id):
+        return self.get_document(collection, document_id), self.versions.get((collection, document_id))
+
+    async def get_document_version_async(self, collection, document_id):
+        return self.get_document_version(collection, document_id)
+
+    def commit_writes(self, writes):
+        self.commits += 1
+        for write in writes:
+            key = (write['collection'], write['doc_id'])
+            exists = write['doc_id'] in self.collections.get(write['collection'], {})
+            if write.get('update_time') is not None and self.versions.get(key) != write['update_time']:
+                return False
+            if (write['op'] == 'create' and exists) or (write['op'] == 'update' and not exists):
+                return False
+        for write in writes:
+            if write['op'] in ('set', 'create'):
+                self.create_document(write['collection'], write['doc_id'], write['data'])
+            elif write['op'] == 'update':
+                self.update_document(write['collection'], write['doc_id'], write['data'])
+            else:
+                self.delete_document(write['collection'], write['doc_id'])
+        return True
+
+    async def commit_writes_async(self, writes):
+        return self.commit_writes(writes)
+
+    def get_collection(self, collection, filters=None, limit=None, order_by=None, start_after=None, fields=None,
+                       raise_errors=False):
+        self.reads += 1
+        result = []
+        for doc_id, doc in self.collections.get(collection, {}).items():
+            if all(_matches(doc.get(field), operator, value) for field, operator, value in (filters or [])):
+                result.append(_project(doc_id, doc, fields))
+        if order_by:
+            field = order_by.lstrip('-')
+            key = (lambda doc: (doc["id"],)) if field == '__name__' else (lambda doc: (doc[field], doc["id"]))
+            result = sorted((doc for doc in result if field == '__name__' or field in doc), key=key,
+                            reverse=order_by.startswith('-'))
+            if start_after is not None:
+                after = tuple(start_after)
+                result = [doc for doc in result if (key(doc) < after if order_by.startswith('-') else key(doc) > after)]
+        return result[:limit] if limit else result
+
+    def aggregate(self, collection, aggregations, filters=None):
+        self.aggregations += 1
+        docs = [doc for doc in self.collections.get(collection, {}).values()
+                if all(_matches(doc.get(field), operator, value) for field, operator, value in (filters or []))]
+        results = {}
+        for kind, field, alias in aggregations:
+            if kind == 'count':
+                results[alias] = len(docs)
+            else:
+                results[alias] = sum(doc[field] for doc in docs if isinstance(doc.get(field), (int, float)))
+        return results
+
+    async def aggregate_async(self, collection, aggregations, filters=None):
+        return self.aggregate(collection, aggregations, filters)
+
+
+@pytest.fixture
+def fake_firestore(monkeypatch):
+    fake = FakeFirestore()
+    for name in ("create_document", "get_document", "update_document", "delete_document", "get_collection",
+                 "get_document_version", "get_document_version_async", "commit_writes", "commit_writes_async",
+                 "get_documents", "get_documents_async", "get_document_async", "get_collection_async",
+                 "create_document_async", "update_document_async", "delete_document_async",
+                 "aggregate", "aggregate_async"):
+        monkeypatch.setattr(firebase_db.service, name, getattr(fake, name))
+    return fake
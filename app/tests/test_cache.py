@@ -0,0 +1,114 @@
+import time
+from app.core.cache import TTLCache
+from app.services.dashboard_file_cache import DashboardFileCache
+from app.core.firebase_db import firebase_db
+from app.utils.dependencies import load_principal, principal_cache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_size=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_load_principal_is_cached_and_invalidated_on_write(monkeypatch):
+    principal_cache.clear()
+    calls = []
+
+    def fake_get_by_id(collection, doc_id):
+        calls.append((collection, doc_id))
+        return {"id": doc_id, "name": "Test User", "is_active": True}
+
+    monkeypatch.setattr(firebase_db, "get_by_id", fake_get_by_id)
+    monkeypatch.setattr(firebase_db.service, "update_document", lambda *args: True)
+    monkeypatch.setattr(firebase_db.service, "get_document_version", lambda *args: ({"id": "u-1"}, "v1"))
+    monkeypatch.setattr(firebase_db.service, "commit_writes", lambda writes: True)
+
+    first = load_principal("u-1", "user")
+    first["name"] = "mutated"
+    second = load_principal("u-1", "user")
+    assert second["name"] == "Test User"
+    assert second["user_type"] == "user"
+    assert len(calls) == 1
+
+    firebase_db.update("users", "u-1", {"name": "Renamed"})
+    calls.clear()
+    load_principal("u-1", "user")
+    assert calls == [("users", "u-1")]
+
+
+def test_load_principal_rejects_inactive_users(monkeypatch):
+    principal_cache.clear()
+    monkeypatch.setattr(
+        firebase_db, "get_by_id",
+        lambda collection, doc_id: {"id": doc_id, "is_active": False}
+    )
+    assert load_principal("u-2", "user") is None
+    assert load_principal("u-2", "unknown") is None
+
+
+def make_file_cache(tmp_path, **overrides):
+    options = dict(
+        cache_dir=str(tmp_path / "dashboard-cache"),
+        disk_max_bytes=100,
+        memory_max_bytes=20,
+        memory_max_file_bytes=10
+    )
+    options.update(overrides)
+    return DashboardFileCache(**options)
+
+
+def test_dashboard_file_cache_fetches_once_per_instance(tmp_path):
+    cache = make_file_cache(tmp_path)
+    fetches = []
+
+    def fetch(path):
+        fetches.append(path)
+        return b"console.log(1)" if path.endswith(".js") else None
+
+    path = "dashboards/acme/sales/assets/index.js"
+    assert cache.get_or_fetch("dashboard-1", path, fetch) == b"console.log(1)"
+    assert cache.get_or_fetch("dashboard-1", path, fetch) == b"console.log(1)"
+    assert cache.get_or_fetch("dashboard-2", path, fetch) == b"console.log(1)"
+    assert fetches == [path, path]
+
+    # Misses are remembered too, so fallbacks don't re-probe storage
+    missing = "dashboards/acme/sales/missing.css"
+    assert cache.get_or_fetch("dashboard-1", missing, fetch) is None
+    assert cache.get_or_fetch("dashboard-1", missing, fetch) is None
+    assert fetches.count(missing) == 1
+
+
+def test_dashboard_file_cache_large_files_go_to_disk_only(tmp_path):
+    cache = make_file_cache(tmp_path)
+    cache.put("dashboard-1", "dashboards/acme/sales/big.js", b"x" * 50)
+    assert cache._memory_bytes == 0
+    assert cache._disk_bytes == 50
+    assert cache.get("dashboard-1", "dashboards/acme/sales/big.js") == b"x" * 50
+
+    # Disk is bounded too; the oldest entry is evicted
+    cache.put("dashboard-1", "dashboards/acme/sales/big2.js", b"y" * 60)
+    assert cache.get("dashboard-1", "dashboards/acme/sales/big.js") is None
+    assert cache._disk_bytes == 60
+
+
+def test_dashboard_file_cache_invalidates_by_prefix(tmp_path):
+    cache = make_file_cache(tmp_path)
+    cache.put("dashboard-1", "dashboards/acme/sales/index.html", b"<html>")
+    cache.put("dashboard-1", "dashboards/acme/sales-eu/index.html", b"<html>")
+    cache.invalidate("dashboards/acme/sales")
+    assert cache.get("dashboard-1", "dashboards/acme/sales/index.html") is None
+    assert cache.get("dashboard-1", "dashboards/acme/sales-eu/index.html") == b"<html>"
@@ -0,0 +1,737 @@
+import asyncio
+import gzip
+import io
+import os
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+import brotli
+from datetime import datetime, timedelta, timezone
+import pytest
+from types import SimpleNamespace
+from fastapi import UploadFile
+from google.api_core.exceptions import ServiceUnavailable
+from app.services import firebase_storage_service as firebase_storage_module
+from app.services.firebase_storage_service import FirebaseStorageService, firebase_storage_service
+from app.services import dashboard_deployment_service
+from app.core.config import settings
+from app.core.firebase_db import firebase_db
+from app.services.dashboard_deployment_service import (
+    DashboardDeploymentService, InvalidDashboardArchive, ROUTES_COLLECTION
+)
+from app.services.deployment_jobs import (
+    DeploymentJob, DeploymentJobRunner, DEPLOYMENTS_COLLECTION, deployment_job_runner
+)
+from app.services.node_modules_cache import NodeModulesCache
+
+
+@pytest.fixture(autouse=True)
+def clear_route_cache():
+    dashboard_deployment_service._route_cache.clear()
+    dashboard_deployment_service._owner_cache.clear()
+    yield
+    dashboard_deployment_service._route_cache.clear()
+    dashboard_deployment_service._owner_cache.clear()
+
+
+def seed_deployed_project(fake_firestore):
+    fake_firestore.create_document('clients', 'c-1', {'company': 'Acme Corp'})
+    fake_firestore.create_document('projects', 'p-1', {
+        'name': 'Sales KPIs',
+        'client_id': 'c-1',
+        'dashboard_url': '/dashboard/acme-corp/sales-kpis'
+    })
+
+
+def test_access_check_uses_route_index(fake_firestore):
+    seed_deployed_project(fake_firestore)
+    DashboardDeploymentService._write_dashboard_route('acme-corp', 'sales-kpis', {
+        'client_id': 'c-1',
+        'project_id': 'p-1',
+        'dashboard_url': '/dashboard/acme-corp/sales-kpis',
+        'storage_path': 'dashboards/acme-corp/sales-kpis',
+        'dashboard_instance_id': 'dashboard-abc'
+    })
+    dashboard_deployment_service._route_cache.clear()
+    fake_firestore.reads = 0
+
+    user = {'user_type': 'user', 'client_id': 'c-1', 'project_ids': ['p-1']}
+    for _ in range(3):
+        assert asyncio.run(DashboardDeploymentService.validate_dashboard_access('acme-corp', 'sales-kpis', user))
+    # The route, then the live project and client, once
+    assert fake_firestore.reads == 3
+
+    other = {'user_type': 'user', 'client_id': 'c-1', 'project_ids': []}
+    assert not asyncio.run(DashboardDeploymentService.validate_dashboard_access('acme-corp', 'sales-kpis', other))
+
+
+def test_access_follows_live_project_and_client(fake_firestore):
+    seed_deployed_project(fake_firestore)
+    fake_firestore.create_document('clients', 'c-2', {'company': 'Acme Corp'})
+    assert DashboardDeploymentService.get_dashboard_route('acme-corp', 'sales-kpis')['client_id'] == 'c-1'
+    old_client = {'user_type': 'user', 'client_id': 'c-1', 'project_ids': ['p-1']}
+    new_client = {'user_type': 'user', 'client_id': 'c-2', 'project_ids': ['p-1']}
+
+    def allowed(user):
+        return asyncio.run(DashboardDeploymentService.validate_dashboard_access('acme-corp', 'sales-kpis', user))
+
+    assert allowed(old_client) and not allowed(new_client)
+
+    # Reassigned without a redeploy; the route still carries c-1
+    firebase_db.update('projects', 'p-1', {'client_id': 'c-2'}, return_document=False)
+    assert not allowed(old_client) and allowed(new_client)
+
+    firebase_db.update('projects', 'p-1', {'name': 'Renamed'}, return_document=False)
+    assert not allowed(new_client)
+    firebase_db.update('projects', 'p-1', {'name': 'Sales KPIs'}, return_document=False)
+    firebase_db.delete('clients', 'c-2')
+    assert not allowed(new_client)
+
+
+def test_legacy_deployment_is_backfilled_into_route_index(fake_firestore):
+    seed_deployed_project(fake_firestore)
+
+    route = DashboardDeploymentService.get_dashboard_route('acme-corp', 'sales-kpis')
+    assert route['project_id'] == 'p-1'
+    assert route['storage_path'] == 'dashboards/acme-corp/sales-kpis'
+    assert 'acme-corp__sales-kpis' in fake_firestore.collections[ROUTES_COLLECTION]
+
+
+def test_unknown_slugs_are_denied(fake_firestore):
+    seed_deployed_project(fake_firestore)
+    admin = {'user_type': 'admin'}
+    assert not asyncio.run(DashboardDeploymentService.validate_dashboard_access('acme-corp', 'missing', admin))
+
+
+def test_prepare_html_injects_mobile_enhancements_once():
+    html = b"<html><head><title>KPIs</title></head><body></body></html>"
+    prepared = DashboardDeploymentService._prepare_html(html)
+    assert b'name="viewport"' in prepared
+    assert prepared.count(b"<style>") == 1
+    assert DashboardDeploymentService._prepare_html(prepared) == prepared
+
+    # Documents that already declare a viewport keep theirs
+    with_viewport = b'<html><head><meta name="viewport" content="width=500"></head></html>'
+    assert DashboardDeploymentService._prepare_html(with_viewport).count(b'name="viewport"') == 1
+
+
+def test_compressed_variants_skip_small_and_binary_files():
+    css = b"body { margin: 0; }\n" * 200
+    variants = DashboardDeploymentService._compress_variants(css, "text/css")
+    assert gzip.decompress(variants["gzip"]) == css
+    # Brotli is a hard requirement; a missing module must not silently drop .br variants
+    assert brotli.decompress(variants["br"]) == css
+    assert variants == DashboardDeploymentService._compress_variants(css, "text/css")
+
+    assert DashboardDeploymentService._compress_variants(b"a{}", "text/css") == {}
+    assert DashboardDeploymentService._compress_variants(css, "image/png") == {}
+
+
+def test_built_files_upload_concurrently_with_progress(tmp_path, monkeypatch):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_bytes(b"<html><head></head></html>")
+    for i in range(10):
+        (tmp_path / "assets" / f"chunk-{i}.js").write_bytes(b"x")
+
+    uploaded = []
+    monkeypatch.setattr(
+        firebase_storage_service, "upload_file",
+        lambda content, path, content_type, retries=0: uploaded.append((path, content_type, content))
+    )
+    progress = []
+
+    result = asyncio.run(DashboardDeploymentService._upload_built_files(
+        str(tmp_path), "dashboards/acme/sales", on_progress=lambda done, total: progress.append((done, total))
+    ))
+
+    assert result["file_count"] == result["files_changed"] == 11
+    assert len(uploaded) == 11
+    assert progress[0] == (0, 11) and progress[-1] == (11, 11)
+    html = [content for path, content_type, content in uploaded if path == "dashboards/acme/sales/index.html"]
+    assert b"oneqlek:mobile" in html[0]
+
+
+def test_redeploy_copies_unchanged_files_from_previous_release(tmp_path, monkeypatch):
+    uploaded, copied = [], []
+    monkeypatch.setattr(
+        firebase_storage_service, "upload_file",
+        lambda content, path, content_type, retries=0: uploaded.append(path)
+    )
+    monkeypatch.setattr(
+        firebase_storage_service, "copy_file",
+        lambda source, destination, retries=0: copied.append((source, destination))
+    )
+
+    def deploy(files, release, previous=None):
+        build_dir = tmp_path / f"build-{len(list(tmp_path.iterdir()))}"
+        for name, content in files.items():
+            (build_dir / name).parent.mkdir(parents=True, exist_ok=True)
+            (build_dir / name).write_bytes(content)
+        return asyncio.run(DashboardDeploymentService._upload_built_files(
+            str(build_dir), f"dashboards/acme/sales/releases/{release}", previous_release=previous
+        ))
+
+    css = b"body { margin: 0; }\n" * 200
+    first = deploy({"index.html": b"<html><head></head></html>", "assets/a.js": b"a", "assets/app.css": css}, "r1")
+    previous = {
+        "storage_path": "dashboards/acme/sales/releases/r1",
+        "files": {entry["path"]: entry for entry in first["manifest"]}
+    }
+    assert previous["files"]["assets/app.css"]["variants"] == ["br", "gzip"]
+
+    uploaded.clear()
+    second = deploy({"index.html": b"<html><head></head></html>", "assets/a.js": b"a2", "assets/app.css": css}, "r2", previous)
+
+    assert uploaded == ["dashboards/acme/sales/releases/r2/assets/a.js"]
+    assert sorted(copied) == [
+        ("dashboards/acme/sales/releases/r1/assets/app.css", "dashboards/acme/sales/releases/r2/assets/app.css"),
+        ("dashboards/acme/sales/releases/r1/assets/app.css.br", "dashboards/acme/sales/releases/r2/assets/app.css.br"),
+        ("dashboards/acme/sales/releases/r1/assets/app.css.gz", "dashboards/acme/sales/releases/r2/assets/app.css.gz"),
+        ("dashboards/acme/sales/releases/r1/index.html", "dashboards/acme/sales/releases/r2/index.html"),
+    ]
+    assert (second["file_count"], second["files_changed"], second["files_copied"]) == (3, 1, 2)
+    assert [entry["path"] for entry in second["manifest"]] == ["assets/a.js", "assets/app.css", "index.html"]
+
+
+def test_route_misses_are_cached_until_the_route_is_written(fake_firestore):
+    seed_deployed_project(fake_firestore)
+    fake_firestore.reads = 0
+
+    for _ in range(3):
+        assert DashboardDeploymentService.get_dashboard_route('acme-corp', 'missing') is None
+    assert fake_firestore.reads == 3  # route, clients and projects, once
+
+    # The write listener drops the cached miss
+    firebase_db.create(ROUTES_COLLECTION, {'project_id': 'p-2'}, 'acme-corp__missing')
+    assert DashboardDeploymentService.get_dashboard_route('acme-corp', 'missing')['project_id'] == 'p-2'
+
+
+def test_large_manifests_are_split_across_chunk_documents(fake_firestore, monkeypatch):
+    monkeypatch.setattr(dashboard_deployment_service, "MANIFEST_CHUNK_BYTES", 1000)
+    files = [{"path": f"assets/chunk-{i}.js", "sha256": "a" * 64, "size": i} for i in range(30)]
+    fake_firestore.create_document(ROUTES_COLLECTION, 'acme-corp__sales-kpis', {
+        'base_path': 'dashboards/acme-corp/sales-kpis',
+        'storage_path': 'dashboards/acme-corp/sales-kpis/releases/r1',
+        'deployment_id': 'dep-1'
+    })
+
+    with firebase_db.batch() as batch:
+        DashboardDeploymentService._write_manifest(batch, 'dep-1', {
+            'storage_path': 'dashboards/acme-corp/sales-kpis/releases/r1'
+        }, files)
+
+    manifest = fake_firestore.collections['dashboard_manifests']['dep-1']
+    assert manifest['chunk_count'] > 1 and 'files' not in manifest
+    previous = DashboardDeploymentService._load_previous_release(
+        'acme-corp', 'sales-kpis', 'dashboards/acme-corp/sales-kpis'
+    )
+    assert list(previous['files']) == [entry['path'] for entry in files]
+
+    monkeypatch.setattr(firebase_storage_service, "delete_prefix", lambda prefix: {'files': 0, 'bytes': 0})
+    DashboardDeploymentService._delete_release({
+        'storage_path': 'dashboards/acme-corp/sales-kpis/releases/r1', 'deployment_id': 'dep-1'
+    })
+    assert not fake_firestore.collections['dashboard_manifests']
+    assert not fake_firestore.collections['dashboard_manifest_chunks']
+
+
+def activate(instance_id):
+    with firebase_db.transaction() as transaction:
+        return DashboardDeploymentService._activate_release(transaction, 'acme-corp', 'sales-kpis', {
+            'client_id': 'c-1',
+            'project_id': 'p-1',
+            'dashboard_url': '/dashboard/acme-corp/sales-kpis',
+            'base_path': 'dashboards/acme-corp/sales-kpis'
+        }, {
+            'dashboard_instance_id': instance_id,
+            'deployment_id': f'dep-{instance_id}',
+            'storage_path': f'dashboards/acme-corp/sales-kpis/releases/{instance_id}',
+            'deployed_at': '2026-01-01T00:00:00'
+        })
+
+
+def test_releases_beyond_retention_are_retired(fake_firestore, monkeypatch):
+    monkeypatch.setattr(settings, "DASHBOARD_RELEASES_RETAINED", 2)
+
+    assert activate('r1') == [] and activate('r2') == []
+    retired = activate('r3')
+
+    assert [release['dashboard_instance_id'] for release in retired] == ['r1']
+    route = DashboardDeploymentService.get_dashboard_route('acme-corp', 'sales-kpis')
+    assert route['storage_path'] == 'dashboards/acme-corp/sales-kpis/releases/r3'
+    assert [release['dashboard_instance_id'] for release in route['releases']] == ['r3', 'r2']
+
+
+def test_activating_a_release_keeps_the_route_created_at(fake_firestore):
+    activate('r1')
+    created_at = fake_firestore.collections['dashboard_routes']['acme-corp__sales-kpis']['created_at']
+    fake_firestore.collections['dashboard_routes']['acme-corp__sales-kpis']['created_at'] = '2025-01-01T00:00:00'
+
+    activate('r2')
+
+    route = fake_firestore.collections['dashboard_routes']['acme-corp__sales-kpis']
+    assert created_at and route['created_at'] == '2025-01-01T00:00:00'
+    assert [release['dashboard_instance_id'] for release in route['releases']] == ['r2', 'r1']
+
+
+def test_rollback_moves_route_to_previous_release(fake_firestore):
+    seed_deployed_project(fake_firestore)
+    for instance_id in ('r1', 'r2', 'r3'):
+        activate(instance_id)
+
+    result = DashboardDeploymentService.rollback_project_dashboard('p-1')
+    assert (result['previous_instance_id'], result['dashboard_instance_id']) == ('r3', 'r2')
+    route = DashboardDeploymentService.get_dashboard_route('acme-corp', 'sales-kpis')
+    assert route['storage_path'] == 'dashboards/acme-corp/sales-kpis/releases/r2'
+    assert route['deployment_id'] == 'dep-r2'
+    assert fake_firestore.collections['projects']['p-1']['dashboard_instance_id'] == 'r2'
+
+    DashboardDeploymentService.rollback_project_dashboard('p-1', 'r3')
+    assert DashboardDeploymentService.get_dashboard_route('acme-corp', 'sales-kpis')['dashboard_instance_id'] == 'r3'
+
+    with pytest.raises(ValueError):
+        DashboardDeploymentService.rollback_project_dashboard('p-1', 'r3')
+    with pytest.raises(LookupError):
+        DashboardDeploymentService.rollback_project_dashboard('p-1', 'missing')
+
+
+def test_upload_file_retries_transient_errors(monkeypatch):
+    attempts = []
+
+    class FlakyBlob:
+        public_url = "https://storage.example/file.js"
+
+        def upload_from_string(self, content, content_type=None):
+            attempts.append(content_type)
+            if len(attempts) < 3:
+                raise ServiceUnavailable("try again")
+
+        def make_public(self):
+            pass
+
+    service = FirebaseStorageService()
+    service._bucket = SimpleNamespace(blob=lambda path: FlakyBlob())
+    monkeypatch.setattr(firebase_storage_module, "UPLOAD_RETRY_BASE_DELAY", 0)
+
+    assert service.upload_file(b"x", "file.js", "application/javascript", retries=3) == FlakyBlob.public_url
+    assert len(attempts) == 3
+
+    attempts.clear()
+    with pytest.raises(ServiceUnavailable):
+        service.upload_file(b"x", "file.js", "application/javascript", retries=1)
+
+
+
+def test_iter_file_streams_one_pinned_generation(monkeypatch):
+    opened = []
+
+    class Blob:
+        size = 10
+
+        def __init__(self, generation):
+            self.generation = generation
+
+        def reload(self):
+            self.generation = 3
+
+        def open(self, mode, chunk_size=None):
+            opened.append((self.generation, chunk_size))
+            return io.BytesIO(b"0123456789")
+
+    service = FirebaseStorageService()
+    service._bucket = SimpleNamespace(blob=lambda path, generation=None: Blob(generation))
+
+    assert list(service.iter_file("file.js", 2, 9, chunk_size=3, generation=5)) == [b"234", b"567", b"8"]
+    assert list(service.iter_file("file.js", chunk_size=4)) == [b"0123", b"4567", b"89"]
+    # One reader per stream, pinned to the caller's generation or the one loaded with the size
+    assert [generation for generation, _ in opened] == [5, 3]
+    assert [chunk_size for _, chunk_size in opened] == [7, 10]
+
+def test_deployment_is_queued_then_run_in_phases(fake_firestore, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DEPLOY_SPOOL_DIR", str(tmp_path / "spool"))
+    submitted = []
+    monkeypatch.setattr(deployment_job_runner, "submit", lambda job_id, run: submitted.append(run) or True)
+    fake_firestore.create_document('projects', 'p-1', {'name': 'Sales KPIs', 'client_id': 'c-1'})
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zip_file:
+        zip_file.writestr('sales/package.json', '{}')
+    upload = UploadFile(file=io.BytesIO(archive.getvalue()), filename='dashboard.zip')
+
+    result = asyncio.run(DashboardDeploymentService.deploy_project_dashboard(
+        'p-1', 'Sales KPIs', 'Acme Corp', upload, 'admin-1'
+    ))
+    deployment_id = result['deployment_id']
+    assert result['status'] == 'pending'
+    assert fake_firestore.collections[DEPLOYMENTS_COLLECTION][deployment_id]['phase'] == 'queued'
+
+    async def build(project_dir, job):
+        with job.phase('install'):
+            job.log('added 1 package')
+        with job.phase('build'):
+            build_dir = os.path.join(project_dir, 'dist')
+            os.makedirs(build_dir)
+            with open(os.path.join(build_dir, 'index.html'), 'w') as f:
+                f.write('<html><head></head></html>')
+        return build_dir
+
+    monkeypatch.setattr(DashboardDeploymentService, '_build_react_app', staticmethod(build))
+    monkeypatch.setattr(firebase_storage_service, 'upload_file', lambda *args, **kwargs: None)
+    asyncio.run(submitted[0](DeploymentJob(deployment_id)))
+
+    record = fake_firestore.collections[DEPLOYMENTS_COLLECTION][deployment_id]
+    assert record['deployment_status'] == 'success'
+    assert set(record['phases']) == {'extract', 'install', 'build', 'upload'}
+    assert all('duration_ms' in phase for phase in record['phases'].values())
+    assert 'added 1 package' in record['logs']
+    assert record['deployment_url'] == '/dashboard/acme-corp/sales-kpis'
+    assert record['storage_path'] == f"dashboards/acme-corp/sales-kpis/releases/{record['dashboard_instance_id']}"
+    assert not os.path.exists(DashboardDeploymentService._spool_path(deployment_id))
+
+
+
+def test_recovery_fails_deployments_orphaned_by_a_restart(fake_firestore, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DEPLOY_SPOOL_DIR", str(tmp_path / "spool"))
+    submitted = []
+    monkeypatch.setattr(deployment_job_runner, "submit", lambda job_id, run: submitted.append(job_id) or True)
+    stale = (datetime.utcnow() - timedelta(seconds=settings.DEPLOY_BUILD_TIMEOUT_SECONDS * 3)).isoformat()
+    recent = datetime.utcnow().isoformat()
+    fake_firestore.create_document(DEPLOYMENTS_COLLECTION, 'd-stale', {'deployment_status': 'running', 'updated_at': stale})
+    fake_firestore.create_document(DEPLOYMENTS_COLLECTION, 'd-queued', {'deployment_status': 'pending', 'updated_at': stale})
+    fake_firestore.create_document(DEPLOYMENTS_COLLECTION, 'd-elsewhere', {'deployment_status': 'running', 'updated_at': recent})
+    fake_firestore.create_document(DEPLOYMENTS_COLLECTION, 'd-spooled', {'deployment_status': 'pending', 'updated_at': stale})
+    os.makedirs(settings.DEPLOY_SPOOL_DIR)
+    open(DashboardDeploymentService._spool_path('d-spooled'), 'wb').close()
+
+    assert DashboardDeploymentService.recover_deployments() == 1
+
+    records = fake_firestore.collections[DEPLOYMENTS_COLLECTION]
+    assert submitted == ['d-spooled']
+    for deployment_id in ('d-stale', 'd-queued'):
+        assert records[deployment_id]['deployment_status'] == 'failed'
+        assert 'restart' in records[deployment_id]['error_message']
+    assert records['d-elsewhere']['deployment_status'] == 'running'
+    assert records['d-spooled']['deployment_status'] == 'pending'
+
+
+def make_project(path, lockfile=b'{"lockfileVersion": 3}'):
+    path.mkdir()
+    (path / "package-lock.json").write_bytes(lockfile)
+    return str(path)
+
+
+def test_install_reuses_node_modules_for_matching_lockfile(tmp_path, monkeypatch):
+    cache = NodeModulesCache(str(tmp_path / "cache"), 10 ** 6, str(tmp_path / "npm"), 10 ** 6)
+    monkeypatch.setattr(dashboard_deployment_service, "node_modules_cache", cache)
+    commands = []
+
+    def run(command, project_dir, job):
+        commands.append(command[:2])
+        os.makedirs(os.path.join(project_dir, "node_modules", "react"))
+        with open(os.path.join(project_dir, "node_modules", "react", "index.js"), "w") as f:
+            f.write("module.exports = {}")
+
+    monkeypatch.setattr(DashboardDeploymentService, "_run_build_command", staticmethod(run))
+    job = DeploymentJob("dep-1")
+
+    DashboardDeploymentService._install_dependencies(make_project(tmp_path / "first"), job)
+    second = make_project(tmp_path / "second")
+    DashboardDeploymentService._install_dependencies(second, job)
+
+    assert commands == [["npm", "ci"]]
+    assert os.path.exists(os.path.join(second, "node_modules", "react", "index.js"))
+    assert "Reused cached node_modules" in job.logs
+
+
+def test_node_modules_cache_is_off_by_default(tmp_path):
+    cache = NodeModulesCache(str(tmp_path / "cache"), settings.NODE_MODULES_CACHE_MAX_BYTES,
+                             str(tmp_path / "npm"), settings.NPM_CACHE_MAX_BYTES)
+    project = make_project(tmp_path / "project")
+    os.makedirs(os.path.join(project, "node_modules"))
+    os.makedirs(cache.npm_cache_dir)
+    with open(os.path.join(cache.npm_cache_dir, "tarball"), "wb") as f:
+        f.write(b"x")
+
+    cache.store("key", project)
+    cache.trim_npm_cache()
+
+    assert not os.path.exists(cache.cache_dir)
+    assert not os.path.exists(cache.npm_cache_dir)
+
+
+def test_node_modules_cache_evicts_least_recently_used(tmp_path):
+    cache = NodeModulesCache(str(tmp_path / "cache"), 2500, str(tmp_path / "npm"), 10 ** 6)
+    for name in ("a", "b", "c"):
+        project = make_project(tmp_path / name, name.encode())
+        os.makedirs(os.path.join(project, "node_modules"))
+        with open(os.path.join(project, "node_modules", "lib.js"), "wb") as f:
+            f.write(b"x" * 1000)
+        cache.store(name, project)
+        if name == "b":
+            os.utime(os.path.join(cache.cache_dir, "a"), (0, 0))
+            os.utime(os.path.join(cache.cache_dir, "b"), (1, 1))
+
+    assert sorted(os.listdir(cache.cache_dir)) == ["b", "c"]
+
+
+def test_queued_deployment_reports_position_and_can_be_cancelled(fake_firestore, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DEPLOY_SPOOL_DIR", str(tmp_path))
+    runner = DeploymentJobRunner(max_parallel=1)
+    monkeypatch.setattr(dashboard_deployment_service, "deployment_job_runner", runner)
+    started, release = threading.Event(), threading.Event()
+
+    async def blocking(job):
+        started.set()
+        release.wait(5)
+
+    for deployment_id in ("dep-1", "dep-2", "dep-3"):
+        fake_firestore.create_document(DEPLOYMENTS_COLLECTION, deployment_id, {'deployment_status': 'pending'})
+        (tmp_path / f"{deployment_id}.zip").write_bytes(b"zip")
+        runner.submit(deployment_id, blocking)
+        started.wait(5)
+
+    deployments = fake_firestore.collections[DEPLOYMENTS_COLLECTION]
+    assert (deployments["dep-2"]["queue_position"], deployments["dep-3"]["queue_position"]) == (1, 2)
+
+    assert DashboardDeploymentService.cancel_deployment("dep-2")["status"] == "cancelled"
+    assert deployments["dep-2"]["deployment_status"] == "cancelled"
+    assert deployments["dep-3"]["queue_position"] == 1
+    assert not (tmp_path / "dep-2.zip").exists()
+
+    fake_firestore.update_document(DEPLOYMENTS_COLLECTION, "dep-1", {'deployment_status': 'running'})
+    assert DashboardDeploymentService.cancel_deployment("dep-1")["status"] == "cancelling"
+    assert runner._running["dep-1"].cancel_event.is_set()
+    release.set()
+    runner.shutdown()
+
+
+def test_build_command_is_killed_at_time_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(dashboard_deployment_service, "BUILD_POLL_SECONDS", 0.05)
+    job = DeploymentJob("dep-1")
+    job.deadline = time.monotonic() + 0.2
+
+    started = time.monotonic()
+    with pytest.raises(Exception, match="time limit"):
+        DashboardDeploymentService._run_build_command(["sleep", "10"], str(tmp_path), job)
+    assert time.monotonic() - started < 5
+
+
+
+def test_build_command_runs_under_an_os_memory_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DEPLOY_BUILD_PROCESS_MEMORY_MB", 128)
+    job = DeploymentJob("dep-1")
+
+    with pytest.raises(subprocess.CalledProcessError):
+        DashboardDeploymentService._run_build_command(
+            [sys.executable, "-c", "bytearray(512 * 1024 * 1024)"], str(tmp_path), job
+        )
+    assert "MemoryError" in job.logs
+    DashboardDeploymentService._run_build_command([sys.executable, "-c", "bytearray(1024)"], str(tmp_path), job)
+
+
+def test_jobs_running_at_shutdown_still_count_toward_the_limit():
+    runner = DeploymentJobRunner(max_parallel=1)
+    started, release = threading.Event(), threading.Event()
+    running, peak = [], []
+
+    async def blocking(job):
+        running.append(job.deployment_id)
+        peak.append(len(running))
+        started.set()
+        release.wait(5)
+        running.remove(job.deployment_id)
+
+    runner.submit("dep-1", blocking)
+    assert started.wait(5)
+    runner.shutdown()
+    started.clear()
+    runner.submit("dep-2", blocking)
+    assert not started.wait(0.2)
+
+    release.set()
+    assert started.wait(5)
+    assert max(peak) == 1
+    runner.shutdown()
+
+def write_zip(path, entries):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in entries.items():
+            zip_file.writestr(name, content)
+    return str(path)
+
+
+def test_extract_keeps_only_project_directory(tmp_path):
+    zip_path = write_zip(tmp_path / "dashboard.zip", {
+        "bundle/README.md": "outside the project",
+        "bundle/sales/package.json": "{}",
+        "bundle/sales/src/App.tsx": "export default App",
+        "bundle/sales/node_modules/react/index.js": "module.exports = {}",
+        "bundle/sales/.git/HEAD": "ref: refs/heads/main",
+        "__MACOSX/bundle/sales/._package.json": "",
+    })
+
+    DashboardDeploymentService._extract_project(zip_path, str(tmp_path / "out"))
+
+    extracted = sorted(
+        os.path.relpath(os.path.join(root, name), tmp_path / "out")
+        for root, _, files in os.walk(tmp_path / "out") for name in files
+    )
+    assert extracted == ["package.json", os.path.join("src", "App.tsx")]
+
+
+@pytest.mark.parametrize("entries, message", [
+    ({"package.json": "{}", "../escape.js": "x"}, "Unsafe path"),
+    ({"/etc/cron.d/job": "x", "package.json": "{}"}, "Unsafe path"),
+    ({"src/index.js": "x"}, "No package.json"),
+    ({"package.json": "{}", "big.bin": "0" * 5000}, "expands beyond"),
+    ({"package.json": "{}", **{f"node_modules/{i}.js": "x" for i in range(5)}}, "more than the limit"),
+])
+def test_invalid_archives_are_rejected(tmp_path, monkeypatch, entries, message):
+    monkeypatch.setattr(settings, "DEPLOY_ZIP_MAX_UNCOMPRESSED_BYTES", 4096)
+    monkeypatch.setattr(settings, "DEPLOY_ZIP_MAX_ENTRIES", 5)
+    zip_path = write_zip(tmp_path / "dashboard.zip", entries)
+
+    with pytest.raises(InvalidDashboardArchive, match=message):
+        DashboardDeploymentService.validate_archive(zip_path)
+
+
+def test_prebuilt_bundle_is_detected_without_package_json(tmp_path):
+    zip_path = write_zip(tmp_path / "dist.zip", {
+        "dist/index.html": '<script src="/assets/index-B3kP9xQe.js"></script>',
+        "dist/assets/index-B3kP9xQe.js": "x",
+    })
+    assert DashboardDeploymentService.validate_archive(zip_path) == "prebuilt"
+
+    source_zip = write_zip(tmp_path / "source.zip", {"index.html": "", "package.json": "{}"})
+    assert DashboardDeploymentService.validate_archive(source_zip) == "source"
+    assert DashboardDeploymentService.validate_archive(source_zip, "prebuilt") == "prebuilt"
+
+
+def test_instance_id_is_written_into_prebuilt_bundle(tmp_path):
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    (tmp_path / "index.html").write_text('<script type="module" src="/assets/index-B3kP9xQe.js"></script>')
+    (assets / "index-B3kP9xQe.js").write_text(
+        'const e="dashboard-0123456789ab";import("./chart-Xy12ab34.js")\n//# sourceMappingURL=index-B3kP9xQe.js.map'
+    )
+    (assets / "index-B3kP9xQe.js.map").write_text('{"version":3,"file":"index-B3kP9xQe.js"}')
+    (assets / "chart-Xy12ab34.js").write_text('import{e}from"./index-B3kP9xQe.js"')
+    (assets / "vendor-Qq98zz76.js").write_text('export const react=1')
+
+    changed = DashboardDeploymentService._apply_instance_id_to_build(str(tmp_path), "dashboard-fedcba987654")
+
+    assert changed == 3
+    assert sorted(os.listdir(assets)) == [
+        "chart-Xy12ab34-fedcba98.js", "index-B3kP9xQe-fedcba98.js", "index-B3kP9xQe-fedcba98.js.map",
+        "vendor-Qq98zz76.js"
+    ]
+    entry = (assets / "index-B3kP9xQe-fedcba98.js").read_text()
+    assert '"dashboard-fedcba987654"' in entry and "chart-Xy12ab34-fedcba98.js" in entry
+    assert entry.endswith("//# sourceMappingURL=index-B3kP9xQe-fedcba98.js.map")
+    assert "index-B3kP9xQe-fedcba98.js" in (assets / "chart-Xy12ab34-fedcba98.js").read_text()
+    assert "/assets/index-B3kP9xQe-fedcba98.js" in (tmp_path / "index.html").read_text()
+
+
+def test_delete_files_batches_requests(monkeypatch):
+    batches, deleted = [], []
+
+    class Blob:
+        def __init__(self, name):
+            self.name = name
+
+        def delete(self):
+            deleted.append(self.name)
+
+    class Batch:
+        def __enter__(self):
+            batches.append(len(deleted))
+
+        def __exit__(self, *exc):
+            return False
+
+    service = FirebaseStorageService()
+    service._bucket = SimpleNamespace(blob=Blob, client=SimpleNamespace(batch=Batch))
+    monkeypatch.setattr(firebase_storage_module, "DELETE_BATCH_SIZE", 10)
+
+    assert service.delete_files([f"dashboards/acme/sales/{i}.js" for i in range(25)]) == 25
+    assert len(batches) == 3
+    assert len(set(deleted)) == 25
+
+
+def test_garbage_collection_reports_unreferenced_prefixes(fake_firestore, monkeypatch):
+    seed_deployed_project(fake_firestore)
+    activate('r1')
+    activate('r2')
+    fake_firestore.create_document('projects', 'p-2', {
+        'name': 'Old', 'client_id': 'c-1', 'dashboard_url': '/dashboard/acme-corp/old'
+    })
+
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    files = {
+        'dashboards/': [
+            {'name': 'dashboards/acme-corp/sales-kpis/releases/r1/index.html', 'size': 10, 'updated': old},
+            {'name': 'dashboards/acme-corp/sales-kpis/releases/r2/index.html', 'size': 10, 'updated': old},
+            {'name': 'dashboards/acme-corp/sales-kpis/releases/r0/index.html', 'size': 30, 'updated': old},
+            {'name': 'dashboards/acme-corp/sales-kpis/releases/r0/app.js', 'size': 70, 'updated': old},
+            {'name': 'dashboards/acme-corp/sales-kpis/index.html', 'size': 5, 'updated': old},
+            {'name': 'dashboards/acme-corp/old/index.html', 'size': 7, 'updated': old},
+            {'name': 'dashboards/acme-corp/sales-kpis/releases/r3/index.html', 'size': 9,
+             'updated': datetime.now(timezone.utc)},
+        ],
+        'addins/': [],
+    }
+    monkeypatch.setattr(firebase_storage_service, "list_file_info", lambda prefix: files[prefix])
+    deleted = []
+    monkeypatch.setattr(firebase_storage_service, "delete_files", lambda paths: deleted.extend(paths) or len(paths))
+
+    report = DashboardDeploymentService.collect_garbage(dry_run=True)
+    assert [entry['prefix'] for entry in report['prefixes']] == [
+        'dashboards/acme-corp/sales-kpis',
+        'dashboards/acme-corp/sales-kpis/releases/r0',
+    ]
+    assert (report['files'], report['reclaimable_bytes']) == (3, 105)
+    assert deleted == []
+
+    DashboardDeploymentService.collect_garbage(dry_run=False)
+    assert sorted(deleted) == [
+        'dashboards/acme-corp/sales-kpis/index.html',
+        'dashboards/acme-corp/sales-kpis/releases/r0/app.js',
+        'dashboards/acme-corp/sales-kpis/releases/r0/index.html',
+    ]
+
+
+@pytest.mark.parametrize("failing", ["projects", ROUTES_COLLECTION])
+def test_garbage_collection_deletes_nothing_when_a_read_fails(fake_firestore, monkeypatch, failing):
+    seed_deployed_project(fake_firestore)
+    activate('r1')
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    monkeypatch.setattr(firebase_storage_service, "list_file_info", lambda prefix: [
+        {'name': f'{prefix}acme-corp/sales-kpis/releases/r1/index.html', 'size': 10, 'updated': old}
+    ])
+    deleted = []
+    monkeypatch.setattr(firebase_storage_service, "delete_files", lambda paths: deleted.extend(paths) or len(paths))
+    read = fake_firestore.get_collection
+
+    def get_collection(collection, *args, raise_errors=False, **kwargs):
+        if collection == failing:
+            if raise_errors:
+                raise ServiceUnavailable("Firestore unavailable")
+            return []
+        return read(collection, *args, **kwargs)
+
+    monkeypatch.setattr(firebase_db.service, "get_collection", get_collection)
+
+    with pytest.raises(ServiceUnavailable):
+        DashboardDeploymentService.collect_garbage(dry_run=False)
+    assert deleted == []
+
+
+def test_garbage_collection_refuses_when_deployed_projects_reference_nothing(fake_firestore, monkeypatch):
+    seed_deployed_project(fake_firestore)
+    fake_firestore.create_document(ROUTES_COLLECTION, 'acme-corp__sales-kpis', {'project_id': 'p-1', 'releases': []})
+    monkeypatch.setattr(firebase_storage_service, "list_file_info", lambda prefix: [])
+
+    with pytest.raises(RuntimeError, match="refusing to collect"):
+        DashboardDeploymentService.collect_garbage(dry_run=False)
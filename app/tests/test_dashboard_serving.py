@@ -0,0 +1,162 @@
+import asyncio
+import gzip
+import hashlib
+import pytest
+from fastapi import HTTPException
+from types import SimpleNamespace
+from app.api.v1 import deploy
+from app.services.dashboard_deployment_service import DashboardDeploymentService
+from app.services.dashboard_file_cache import dashboard_file_cache
+from app.services.firebase_storage_service import firebase_storage_service
+
+BUNDLE = b"console.log('dashboard')"
+BUNDLE_MD5 = hashlib.md5(BUNDLE).hexdigest()
+STYLES = b"body { color: #333; }\n" * 40
+STYLES_GZ = gzip.compress(STYLES, mtime=0)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    files = {
+        "dashboards/acme/sales/assets/index-B3kP9xQe.js": BUNDLE,
+        "dashboards/acme/sales/assets/vendor-Xy12ab34.js": b"v" * 5000,
+        "dashboards/acme/sales/assets/index-C9dE8fGh.css": STYLES,
+        "dashboards/acme/sales/assets/index-C9dE8fGh.css.gz": STYLES_GZ
+    }
+    calls = {"get_file": 0, "get_file_info": 0, "iter_file": 0}
+
+    def get_file(path):
+        calls["get_file"] += 1
+        return files.get(path)
+
+    def get_file_info(path):
+        calls["get_file_info"] += 1
+        if path not in files:
+            return None
+        return {"size": len(files[path]), "etag": hashlib.md5(files[path]).hexdigest(), "generation": 7}
+
+    def iter_file(path, start=0, end=None, chunk_size=1024, generation=None):
+        assert generation == 7
+        calls["iter_file"] += 1
+        content = files[path][start:end]
+        for offset in range(0, len(content), chunk_size):
+            yield content[offset:offset + chunk_size]
+
+    async def allow(*args):
+        return True
+
+    monkeypatch.setattr(firebase_storage_service, "get_file", get_file)
+    monkeypatch.setattr(firebase_storage_service, "get_file_info", get_file_info)
+    monkeypatch.setattr(firebase_storage_service, "iter_file", iter_file)
+    monkeypatch.setattr(dashboard_file_cache, "memory_max_file_bytes", 1000)
+    monkeypatch.setattr(DashboardDeploymentService, "validate_dashboard_access", allow)
+    monkeypatch.setattr(
+        DashboardDeploymentService, "get_dashboard_route",
+        lambda client_slug, project_slug: {
+            "dashboard_instance_id": "dashboard-1",
+            "storage_path": "dashboards/acme/sales"
+        }
+    )
+    dashboard_file_cache.clear()
+    yield calls
+    dashboard_file_cache.clear()
+
+
+def serve(file_path, headers=None):
+    request = SimpleNamespace(headers=headers or {})
+    return asyncio.run(deploy.serve_project_file_internal(
+        "acme", "sales", file_path, {"user_type": "admin"}, "dashboards", request
+    ))
+
+
+def test_fingerprinted_assets_are_immutable_and_tagged(storage):
+    response = serve("index-B3kP9xQe.js")
+    assert response.status_code == 200
+    assert response.body == BUNDLE
+    assert response.headers["etag"] == f'"{BUNDLE_MD5}"'
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_conditional_request_returns_304_without_fetching_body(storage):
+    response = serve("assets/index-B3kP9xQe.js", {"if-none-match": f'"{BUNDLE_MD5}"'})
+    assert response.status_code == 304
+    assert storage["get_file"] == 0
+    assert storage["get_file_info"] == 1
+
+
+def test_range_request_returns_partial_content(storage):
+    response = serve("index-B3kP9xQe.js", {"range": "bytes=0-6"})
+    assert response.status_code == 206
+    assert response.body == BUNDLE[:7]
+    assert response.headers["content-range"] == f"bytes 0-6/{len(BUNDLE)}"
+
+    with pytest.raises(HTTPException) as excinfo:
+        serve("index-B3kP9xQe.js", {"range": f"bytes={len(BUNDLE)}-"})
+    assert excinfo.value.status_code == 416
+
+
+async def read_body(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def test_large_files_stream_and_fill_the_disk_cache(storage, tmp_path, monkeypatch):
+    # The disk tier is off by default; enable it on a scratch directory
+    monkeypatch.setattr(dashboard_file_cache, "cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(dashboard_file_cache, "disk_max_bytes", 1000000)
+    monkeypatch.setattr(dashboard_file_cache, "_disk_ready", False)
+    response = serve("vendor-Xy12ab34.js")
+    assert response.status_code == 200
+    assert response.headers["content-length"] == "5000"
+    assert asyncio.run(read_body(response)) == b"v" * 5000
+    assert storage["get_file"] == 0
+
+    # The second read streams a range from the disk cache, not Storage
+    response = serve("vendor-Xy12ab34.js", {"range": "bytes=-10"})
+    assert response.status_code == 206
+    assert asyncio.run(read_body(response)) == b"v" * 10
+    assert storage["iter_file"] == 1
+
+
+def test_cache_control_only_pins_fingerprinted_files():
+    assert deploy._cache_control_for("assets/index-B3kP9xQe.js", "application/javascript").endswith("immutable")
+    assert deploy._cache_control_for("static/js/main.4f2a9c1b.js", "application/javascript").endswith("immutable")
+    assert deploy._cache_control_for("assets/logo.png", "image/png") == "private, no-cache"
+    assert deploy._cache_control_for("index.html", "text/html") == "private, no-cache"
+
+
+def test_etag_matching_handles_lists_and_weak_validators():
+    assert deploy._etag_matches('"a", W/"b"', '"b"')
+    assert deploy._etag_matches('*', '"b"')
+    assert not deploy._etag_matches('"a"', '"b"')
+    assert not deploy._etag_matches(None, '"b"')
+
+
+def test_html_is_prepared_once_per_instance(storage, monkeypatch):
+    legacy_html = b"<html><head></head><body></body></html>"
+    monkeypatch.setattr(firebase_storage_service, "get_file", lambda path: legacy_html if path.endswith("index.html") else None)
+
+    first = serve("index.html")
+    assert b"oneqlek:mobile" in first.body
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    again = serve("index.html", {"if-none-match": first.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_precompressed_variant_is_served_when_accepted(storage):
+    response = serve("assets/index-C9dE8fGh.css", {"accept-encoding": "gzip, deflate, br"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.body) == STYLES
+
+    identity = serve("assets/index-C9dE8fGh.css", {"accept-encoding": "gzip;q=0"})
+    assert "content-encoding" not in identity.headers
+    assert identity.body == STYLES
+    assert identity.headers["etag"] != response.headers["etag"]
+
+
+def test_accepted_encodings_prefers_brotli_and_honours_q():
+    assert deploy._accepted_encodings("gzip, deflate, br") == ["br", "gzip"]
+    assert deploy._accepted_encodings("br;q=0.5, gzip") == ["gzip", "br"]
+    assert deploy._accepted_encodings("identity") == []
+    assert deploy._accepted_encodings("*") == ["br", "gzip"]
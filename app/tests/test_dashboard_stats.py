@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from app.core.firebase_db import firebase_db
+from app.services.dashboard_stats_service import DashboardStatsService, invoice_total, stats_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_stats_cache():
+    stats_cache.clear()
+    yield
+    stats_cache.clear()
+
+
+def seed(fake_firestore):
+    fake_firestore.create_document('projects', 'p-1', {'name': 'A'})
+    fake_firestore.create_document('projects', 'p-2', {'name': 'B'})
+    fake_firestore.create_document('clients', 'c-1', {'company': 'Acme'})
+    invoices = [
+        ('inv-1', 'Paid', 'USD', 1200.0), ('inv-2', 'Paid', 'USD', 300.0), ('inv-3', 'Paid', 'EUR', 50.0),
+        ('inv-4', 'Paid', 'JPY', 9000.0), ('inv-5', 'Pending', 'USD', 700.0),
+    ]
+    for invoice_id, status, currency, total in invoices:
+        fake_firestore.create_document('invoices', invoice_id, {'status': status, 'currency': currency, 'total': total})
+
+
+def test_stats_come_from_aggregations(fake_firestore):
+    seed(fake_firestore)
+
+    stats = asyncio.run(DashboardStatsService.get_stats())
+
+    assert stats == {
+        'total_projects': 2,
+        'total_clients': 1,
+        'pending_invoices': 1,
+        'paid_invoices': 4,
+        'total_revenue': 1500.0,
+        'revenue_by_currency': {'USD': 1500.0, 'EUR': 50.0, 'GBP': 0},
+        'unsummed_paid_invoices': 1
+    }
+    assert fake_firestore.reads == 0
+
+
+def test_stats_are_cached_until_a_counted_collection_changes(fake_firestore):
+    seed(fake_firestore)
+    asyncio.run(DashboardStatsService.get_stats())
+    aggregations = fake_firestore.aggregations
+
+    asyncio.run(DashboardStatsService.get_stats())
+    assert fake_firestore.aggregations == aggregations
+
+    firebase_db.create('clients', {'company': 'Globex'})
+    assert asyncio.run(DashboardStatsService.get_stats())['total_clients'] == 2
+
+
+def test_invoice_total_multiplies_price_and_quantity():
+    assert invoice_total([{'price': 100, 'quantity': 2}, {'price': '2.5', 'quantity': 4}, {'price': None}]) == 210.0
+    assert invoice_total(None) == 0.0
@@ -0,0 +1,329 @@
+import asyncio
+import json
+import os
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from google.api_core.exceptions import FailedPrecondition
+from app.api.v1.firebase_clients import ORDER_FIELDS as CLIENT_ORDER_FIELDS, update_client
+from app.api.v1.firebase_projects import ORDER_FIELDS as PROJECT_ORDER_FIELDS
+from app.api.v1.firebase_users import ORDER_FIELDS as USER_ORDER_FIELDS, USER_FIELDS, create_user, update_user
+from app.core import firebase_db as firebase_db_module
+from app.core.firebase_db import TransactionConflict, firebase_db
+from app.core.search_keys import SEARCH_FIELDS, prefixes_key
+from app.services.dashboard_deployment_service import DashboardDeploymentService
+from app.services.firebase_admin_service import FirebaseAdminService
+from app.services.firebase_project_service import FirebaseProjectService
+from app.services.firebase_storage_service import firebase_storage_service
+from app.utils.dependencies import parse_fields
+
+INDEXES_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'firestore.indexes.json')
+
+
+def test_update_returns_merged_document_with_one_read(fake_firestore):
+    fake_firestore.create_document('clients', 'c-1', {'company': 'Acme', 'email': 'a@acme.test'})
+
+    client = firebase_db.update('clients', 'c-1', {'email': 'b@acme.test'})
+
+    assert fake_firestore.reads == 1
+    assert client['id'] == 'c-1'
+    assert (client['company'], client['email']) == ('Acme', 'b@acme.test')
+    assert fake_firestore.collections['clients']['c-1']['email'] == 'b@acme.test'
+
+
+def test_update_merges_into_current_without_reading(fake_firestore):
+    fake_firestore.create_document('clients', 'c-1', {'company': 'Acme', 'email': 'a@acme.test'})
+    current = firebase_db.get_by_id('clients', 'c-1')
+    fake_firestore.reads = 0
+
+    client = firebase_db.update('clients', 'c-1', {'company': 'Acme Corp'}, current=current)
+
+    assert fake_firestore.reads == 0
+    assert (client['company'], client['email']) == ('Acme Corp', 'a@acme.test')
+
+
+def test_update_without_returning_document_only_writes(fake_firestore):
+    fake_firestore.create_document('clients', 'c-1', {'company': 'Acme'})
+
+    result = firebase_db.update('clients', 'c-1', {'company': 'Acme Corp'}, return_document=False)
+
+    assert fake_firestore.reads == 0
+    assert result['company'] == 'Acme Corp' and 'updated_at' in result
+    assert firebase_db.update('clients', 'missing', {'company': 'x'}, return_document=False) is None
+    assert firebase_db.update('clients', 'missing', {'company': 'x'}) is None
+
+
+def test_project_type_change_reads_the_project_once(fake_firestore, monkeypatch):
+    fake_firestore.create_document('projects', 'p-1', {'name': 'Sales', 'project_type': 'Dashboard'})
+
+    async def handle_type_change(project_id, old_type, new_type):
+        return {'message': 'ok'}
+
+    monkeypatch.setattr(DashboardDeploymentService, 'handle_project_type_change', staticmethod(handle_type_change))
+    project = asyncio.run(FirebaseProjectService.update_project('p-1', {'project_type': 'Add-ins'}))
+
+    assert fake_firestore.reads == 1
+    assert (project['name'], project['project_type']) == ('Sales', 'Add-ins')
+
+
+def test_put_routes_return_the_full_document(fake_firestore):
+    fake_firestore.create_document('clients', 'c-1', {'company': 'Acme', 'email': 'a@acme.test'})
+
+    response = asyncio.run(update_client('c-1', {'company': 'Acme Corp'}, current_admin=None))
+
+    assert (fake_firestore.reads, fake_firestore.commits) == (1, 1)
+    assert (response.data['company'], response.data['email']) == ('Acme Corp', 'a@acme.test')
+    with pytest.raises(HTTPException):
+        asyncio.run(update_client('missing', {'company': 'Nobody'}, current_admin=None))
+
+
+def test_update_rereads_when_the_document_changes_before_the_write(fake_firestore, monkeypatch):
+    fake_firestore.create_document('clients', 'c-1', {'company': 'Acme', 'email': 'a@acme.test'})
+    read = fake_firestore.get_document_version
+    raced = []
+
+    def get_document_version(collection, doc_id):
+        doc, version = read(collection, doc_id)
+        if not raced:
+            raced.append(True)
+            fake_firestore.update_document(collection, doc_id, {'email': 'b@acme.test'})
+        return doc, version
+
+    monkeypatch.setattr(firebase_db.service, 'get_document_version', get_document_version)
+    client = firebase_db.update('clients', 'c-1', {'company': 'Acme Corp'})
+
+    assert (client['company'], client['email']) == ('Acme Corp', 'b@acme.test')
+
+
+def test_batch_commits_in_chunks_with_per_write_results(fake_firestore, monkeypatch):
+    monkeypatch.setattr(firebase_db_module, 'MAX_BATCH_WRITES', 2)
+    fake_firestore.create_document('clients', 'c-1', {'company': 'Acme'})
+
+    with firebase_db.batch() as batch:
+        batch.create('clients', {'company': 'Beta'}, 'c-2')
+        batch.update('clients', 'c-1', {'company': 'Acme Corp'})
+        batch.update('clients', 'missing', {'company': 'x'})
+
+    assert fake_firestore.commits == 2
+    assert batch.results == [True, True, False]
+    assert fake_firestore.collections['clients']['c-1']['company'] == 'Acme Corp'
+    assert 'created_at' in fake_firestore.collections['clients']['c-2']
+
+
+def test_batch_is_discarded_when_block_raises(fake_firestore):
+    with pytest.raises(RuntimeError):
+        with firebase_db.batch() as batch:
+            batch.create('clients', {'company': 'Beta'}, 'c-2')
+            raise RuntimeError
+
+    assert fake_firestore.commits == 0
+
+
+def test_transaction_rejects_writes_when_a_read_document_changed(fake_firestore):
+    fake_firestore.create_document('counters', 'visits', {'value': 1})
+
+    with firebase_db.transaction() as transaction:
+        counter = transaction.get_by_id('counters', 'visits')
+        transaction.update('counters', 'visits', {'value': counter['value'] + 1})
+        transaction.create('audit', {'event': 'visit'}, 'a-1')
+    assert fake_firestore.collections['counters']['visits']['value'] == 2
+
+    with pytest.raises(TransactionConflict):
+        with firebase_db.transaction() as transaction:
+            counter = transaction.get_by_id('counters', 'visits')
+            fake_firestore.update_document('counters', 'visits', {'value': 10})
+            transaction.update('counters', 'visits', {'value': counter['value'] + 1})
+            transaction.create('audit', {'event': 'visit'}, 'a-2')
+
+    assert fake_firestore.collections['counters']['visits']['value'] == 10
+    assert 'a-2' not in fake_firestore.collections['audit']
+
+
+def test_second_of_two_read_then_set_transactions_conflicts(fake_firestore):
+    fake_firestore.create_document('routes', 'r-1', {'releases': ['a']})
+
+    with pytest.raises(TransactionConflict):
+        with firebase_db.transaction() as second:
+            with firebase_db.transaction() as first:
+                route = first.get_by_id('routes', 'r-1')
+                stale = second.get_by_id('routes', 'r-1')
+                first.create('routes', {'releases': route['releases'] + ['b']}, 'r-1')
+            second.create('routes', {'releases': stale['releases'] + ['c']}, 'r-1')
+
+    assert fake_firestore.collections['routes']['r-1']['releases'] == ['a', 'b']
+
+
+def test_get_many_dedupes_and_preserves_order(fake_firestore, monkeypatch):
+    monkeypatch.setattr(firebase_db_module, 'GET_MANY_CHUNK_SIZE', 2)
+    for doc_id in ('p-1', 'p-2', 'p-3'):
+        fake_firestore.create_document('projects', doc_id, {'name': doc_id})
+
+    docs = firebase_db.get_many('projects', ['p-3', 'p-1', 'p-3', 'missing', None, 'p-2'])
+
+    assert [doc['id'] for doc in docs] == ['p-3', 'p-1', 'p-2']
+    assert fake_firestore.reads == 2
+
+
+def test_user_projects_are_loaded_with_two_batched_reads(fake_firestore):
+    fake_firestore.create_document('clients', 'c-1', {'company': 'Acme', 'email': 'a@acme.test'})
+    for doc_id in ('p-1', 'p-2', 'p-3'):
+        fake_firestore.create_document('projects', doc_id, {'name': doc_id, 'client_id': 'c-1'})
+    fake_firestore.create_document('users', 'u-1', {'project_ids': ['p-2', 'p-1', 'p-3']})
+    fake_firestore.reads = 0
+
+    projects = asyncio.run(FirebaseProjectService.get_user_projects('u-1'))
+
+    assert [project['id'] for project in projects] == ['p-2', 'p-1', 'p-3']
+    assert all(project['client']['company'] == 'Acme' for project in projects)
+    assert fake_firestore.reads == 3
+
+
+def seed_clients(fake_firestore, count):
+    for i in range(count):
+        fake_firestore.create_document('clients', f'c-{i:02d}', {'company': f'Company {count - i:02d}'})
+
+
+def test_get_page_walks_collection_with_cursors(fake_firestore):
+    seed_clients(fake_firestore, 5)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = firebase_db.get_page('clients', limit=2, cursor=cursor)
+        seen.extend(doc['id'] for doc in page)
+        if cursor is None:
+            break
+
+    assert seen == ['c-00', 'c-01', 'c-02', 'c-03', 'c-04']
+    assert fake_firestore.reads == 3
+
+
+def test_get_page_orders_by_field_and_rejects_foreign_cursors(fake_firestore):
+    seed_clients(fake_firestore, 3)
+
+    page, cursor = firebase_db.get_page('clients', limit=2, order_by='-company')
+    assert [doc['company'] for doc in page] == ['Company 03', 'Company 02']
+    page, _ = firebase_db.get_page('clients', limit=2, order_by='-company', cursor=cursor)
+    assert [doc['company'] for doc in page] == ['Company 01']
+
+    with pytest.raises(ValueError):
+        firebase_db.get_page('clients', cursor=cursor)
+    with pytest.raises(ValueError):
+        firebase_db.get_page('clients', cursor='not-a-cursor')
+
+
+def test_queries_missing_an_index_raise_instead_of_returning_nothing(monkeypatch):
+    service = object.__new__(FirebaseAdminService)
+    service._db = object()
+
+    def stream():
+        raise FailedPrecondition("The query requires an index")
+
+    monkeypatch.setattr(service, "_build_query", lambda *args: SimpleNamespace(stream=stream))
+    with pytest.raises(FailedPrecondition):
+        service.get_collection('projects', [('client_id', '==', 'c-1')], order_by='name')
+
+
+def indexed(collection, *fields):
+    """Whether firestore.indexes.json has a composite index on exactly these (field, order) pairs"""
+    with open(INDEXES_PATH) as f:
+        indexes = json.load(f)['indexes']
+    return any(
+        index['collectionGroup'] == collection
+        and [(field['fieldPath'], field.get('order') or field.get('arrayConfig')) for field in index['fields']] == list(fields)
+        for index in indexes
+    )
+
+
+def test_filtered_project_orderings_have_composite_indexes():
+    for field in PROJECT_ORDER_FIELDS:
+        for order in ('ASCENDING', 'DESCENDING'):
+            assert indexed('projects', ('client_id', 'ASCENDING'), (field, order))
+
+
+def test_search_orderings_have_composite_indexes():
+    order_fields = {'projects': PROJECT_ORDER_FIELDS, 'clients': CLIENT_ORDER_FIELDS, 'users': USER_ORDER_FIELDS}
+    for collection, search_fields in SEARCH_FIELDS.items():
+        for search_field in search_fields:
+            contains = (prefixes_key(search_field), 'CONTAINS')
+            for field in order_fields[collection]:
+                for order in ('ASCENDING', 'DESCENDING'):
+                    assert indexed(collection, contains, (field, order))
+
+    project_contains = ('name_prefixes', 'CONTAINS')
+    assert indexed('projects', ('client_id', 'ASCENDING'), project_contains)
+    for field in PROJECT_ORDER_FIELDS:
+        for order in ('ASCENDING', 'DESCENDING'):
+            assert indexed('projects', ('client_id', 'ASCENDING'), project_contains, (field, order))
+
+
+def test_project_search_pages_through_indexed_matches(fake_firestore):
+    for i in range(10):
+        firebase_db.create('projects', {'name': 'Sales Board' if i % 3 == 0 else 'Other'}, f'p-{i}')
+
+    projects, cursor = asyncio.run(FirebaseProjectService.get_projects(search='sal', limit=2))
+    assert [p['id'] for p in projects] == ['p-0', 'p-3']
+    assert 'name_prefixes' not in projects[0]
+
+    projects, cursor = asyncio.run(FirebaseProjectService.get_projects(search='sal', limit=2, cursor=cursor))
+    assert [p['id'] for p in projects] == ['p-6', 'p-9']
+    assert cursor is None
+    assert fake_firestore.reads == 2
+
+
+def test_search_keys_follow_updates(fake_firestore):
+    firebase_db.create('clients', {'company': 'Acme Corp'}, 'c-1')
+    firebase_db.update('clients', 'c-1', {'company': 'Globex'}, return_document=False)
+
+    assert firebase_db.search_page('clients', 'acme')[0] == []
+    assert [c['id'] for c in firebase_db.search_page('clients', 'GLO')[0]] == ['c-1']
+
+
+def test_user_search_merges_name_and_email_matches(fake_firestore):
+    firebase_db.create('users', {'name': 'Dana Smith', 'email': 'dana@acme.io'}, 'u-1')
+    firebase_db.create('users', {'name': 'Lee Acme', 'email': 'lee@globex.io'}, 'u-2')
+    firebase_db.create('users', {'name': 'Acme Bot', 'email': 'bot@acme.io'}, 'u-3')
+    firebase_db.create('users', {'name': 'Kim', 'email': 'kim@initech.io'}, 'u-4')
+
+    users, cursor = firebase_db.search_page('users', 'acme', limit=2)
+    assert [u['id'] for u in users] == ['u-1', 'u-2']
+    users, cursor = firebase_db.search_page('users', 'acme', limit=2, cursor=cursor)
+    assert [u['id'] for u in users] == ['u-3']
+    assert cursor is None
+
+
+def test_projected_reads_return_only_requested_fields(fake_firestore):
+    fake_firestore.create_document('users', 'u-1', {'name': 'Ann', 'email': 'a@x.io', 'password_hash': 'secret'})
+
+    assert firebase_db.get_by_id('users', 'u-1', fields=['name']) == {'id': 'u-1', 'name': 'Ann'}
+    assert firebase_db.get_many('users', ['u-1'], fields=['email']) == [{'id': 'u-1', 'email': 'a@x.io'}]
+
+
+def test_projected_pages_keep_the_ordering_field_for_cursors(fake_firestore):
+    seed_clients(fake_firestore, 3)
+
+    page, cursor = firebase_db.get_page('clients', limit=2, order_by='company', fields=[])
+    assert page == [{'id': 'c-02', 'company': 'Company 01'}, {'id': 'c-01', 'company': 'Company 02'}]
+    page, _ = firebase_db.get_page('clients', limit=2, order_by='company', cursor=cursor, fields=[])
+    assert [doc['id'] for doc in page] == ['c-00']
+
+
+def test_user_writes_never_return_password_hashes(fake_firestore, monkeypatch):
+    monkeypatch.setattr(firebase_storage_service, 'get_default_avatar', lambda user_id: 'https://avatars.test/a.jpg')
+
+    created = asyncio.run(create_user({'name': 'Ann', 'email': 'a@x.io', 'password': 'pw'}, current_admin=None)).data
+    updated = asyncio.run(update_user(created['id'], {'name': 'Anne', 'password': 'new'}, current_admin=None)).data
+
+    assert 'password_hash' in fake_firestore.collections['users'][created['id']]
+    assert set(created) <= {'id', *USER_FIELDS} and created['name'] == 'Ann'
+    assert set(updated) <= {'id', *USER_FIELDS} and updated['name'] == 'Anne'
+
+
+def test_fields_param_is_limited_to_allowed_fields():
+    assert parse_fields(None) is None
+    assert parse_fields('id, name,name') == ['name']
+    assert 'password_hash' not in parse_fields(None, USER_FIELDS)
+
+    with pytest.raises(HTTPException):
+        parse_fields('name,password_hash', USER_FIELDS)
+    with pytest.raises(HTTPException):
+        parse_fields('name;drop')
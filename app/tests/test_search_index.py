@@ -0,0 +1,68 @@
+import time
+from app.core.firebase_db import firebase_db
+from app.services import search_index
+from app.services.search_index import typeahead_index
+
+
+def seed(fake_firestore):
+    fake_firestore.create_document('clients', 'c-1', {'company': 'Acme Corp', 'email': 'ops@acme.io'})
+    fake_firestore.create_document('projects', 'p-1', {'name': 'Sales Acme Board', 'status': 'Active'})
+    fake_firestore.create_document('users', 'u-1', {'name': 'Dana Lee', 'email': 'dana@acme.io', 'password_hash': 'x'})
+    fake_firestore.create_document('invoices', 'i-1', {'invoice_number': 'INV-A1B2C', 'status': 'Paid'})
+    typeahead_index.rebuild()
+
+
+def test_search_ranks_whole_value_prefixes_first(fake_firestore):
+    seed(fake_firestore)
+
+    hits = typeahead_index.search('acme')
+
+    assert [(hit['type'], hit['id']) for hit in hits] == [('client', 'c-1'), ('project', 'p-1'), ('user', 'u-1')]
+    assert hits[0] == {'type': 'client', 'id': 'c-1', 'label': 'Acme Corp', 'detail': 'ops@acme.io'}
+    assert [hit['id'] for hit in typeahead_index.search('inv-a1', types=['invoice'])] == ['i-1']
+    assert typeahead_index.search('acme', types=['user']) == [
+        {'type': 'user', 'id': 'u-1', 'label': 'Dana Lee', 'detail': 'dana@acme.io'}
+    ]
+
+
+def test_writes_update_the_index_without_a_rebuild(fake_firestore):
+    seed(fake_firestore)
+    reads = fake_firestore.reads
+
+    firebase_db.create('clients', {'company': 'Globex', 'email': 'hi@globex.io'}, 'c-2')
+    firebase_db.update('projects', 'p-1', {'name': 'Forecast'}, return_document=False)
+    firebase_db.update('users', 'u-1', {'position': 'CFO'}, return_document=False)
+    firebase_db.delete('invoices', 'i-1')
+
+    assert [hit['id'] for hit in typeahead_index.search('glob')] == ['c-2']
+    assert [hit['id'] for hit in typeahead_index.search('sales')] == []
+    assert [hit['id'] for hit in typeahead_index.search('fore')] == ['p-1']
+    assert [hit['id'] for hit in typeahead_index.search('dana')] == ['u-1']
+    assert typeahead_index.search('inv') == []
+    assert fake_firestore.reads == reads
+
+
+def test_search_is_fast_on_a_large_index(fake_firestore):
+    for i in range(10000):
+        fake_firestore.create_document('projects', f'p-{i:05d}', {'name': f'Project {i} Revenue Board'})
+    typeahead_index.rebuild()
+
+    start = time.perf_counter()
+    for _ in range(100):
+        hits = typeahead_index.search('project 12', limit=10)
+    elapsed = (time.perf_counter() - start) / 100
+
+    assert hits[0]['label'] == 'Project 12 Revenue Board'
+    # A generous bound: a scan of the whole index takes far longer than this
+    assert elapsed < 0.05
+
+
+def test_type_filter_is_applied_before_the_scan_window(fake_firestore, monkeypatch):
+    monkeypatch.setattr(search_index, 'MAX_SCAN', 5)
+    for i in range(20):
+        fake_firestore.create_document('projects', f'p-{i:02d}', {'name': f'Acme Project {i}'})
+    fake_firestore.create_document('users', 'u-1', {'name': 'Acme Zed', 'email': 'zed@acme.io'})
+    typeahead_index.rebuild()
+
+    assert [hit['id'] for hit in typeahead_index.search('acme', types=['user'])] == ['u-1']
+    assert len(typeahead_index.search('acme', limit=50)) == 6
@@ -0,0 +1,19 @@
+from app.core.search_keys import prefixes, search_keys, search_term
+
+
+def test_prefixes_start_at_every_word():
+    keys = prefixes('Acme  Sales-Dashboard')
+
+    assert {'a', 'acme', 'acme sales', 'sal', 'sales-d', 'dash'} <= set(keys)
+    assert 'cme' not in keys
+
+
+def test_search_keys_only_cover_written_fields():
+    assert search_keys('users', {'email': 'a.b@x.io'}) == {'email_prefixes': prefixes('a.b@x.io')}
+    assert search_keys('users', {'name': None}) == {'name_prefixes': []}
+    assert search_keys('invoices', {'name': 'x'}) == {}
+
+
+def test_search_term_is_normalized_like_the_keys():
+    assert search_term('  Acme   SA ') == 'acme sa'
+    assert search_term('   ') is None
@@ -1,12 +1,54 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from app.core.config import settings
-from app.core.firebase_db import firebase_db
-from typing import Dict, Any
+from app.core.cache import TTLCache
+from app.core.firebase_db import firebase_db, register_write_listener
+from app.core.pagination import decode_cursor
+from typing import Dict, Any, List, Optional, Tuple
+import copy
+import re
 
 security = HTTPBearer()
 
+# Authenticated principals keyed by (user_type, user_id), so repeated requests
+# with the same token (e.g. every asset of a dashboard page) skip Firestore
+principal_cache = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+PRINCIPAL_COLLECTIONS = {'admin': 'admins', 'user': 'users'}
+
+FIELD_PATH = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+def _invalidate_principal(collection: str, doc_id: str, data: Optional[Dict]) -> None:
+    user_type = 'admin' if collection == 'admins' else 'user'
+    principal_cache.invalidate((user_type, doc_id))
+
+register_write_listener(list(PRINCIPAL_COLLECTIONS.values()), _invalidate_principal)
+
+def load_principal(user_id: str, user_type: str) -> Optional[Dict[str, Any]]:
+    """Load an admin or active user by ID, using the principal cache"""
+    collection = PRINCIPAL_COLLECTIONS.get(user_type)
+    if collection is None:
+        return None
+    
+    key = (user_type, user_id)
+    principal = principal_cache.get(key)
+    if principal is None:
+        user = firebase_db.get_by_id(collection, user_id)
+        if not user:
+            return None
+        if user_type == 'user' and not user.get('is_active', True):
+            return None
+        user['user_type'] = user_type
+        principal_cache.set(key, user)
+        principal = user
+    
+    # Callers may mutate the principal, so hand out a private copy
+    return copy.deepcopy(principal)
+
 def get_current_admin_or_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> Dict[str, Any]:
@@ -30,19 +72,10 @@ def get_current_admin_or_user(
     except JWTError:
         raise credentials_exception
     
-    if user_type == "admin":
-        user = firebase_db.get_by_id('admins', user_id)
-        if user:
-            user['user_type'] = 'admin'
-    elif user_type == "user":
-        user = firebase_db.get_by_id('users', user_id)
-        if user and user.get('is_active', True):
-            user['user_type'] = 'user'
-        else:
-            user = None
-    else:
+    if user_type not in PRINCIPAL_COLLECTIONS:
         raise credentials_exception
     
+    user = load_principal(user_id, user_type)
     if user is None:
         raise credentials_exception
     
@@ -66,4 +99,61 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User access required"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def parse_fields(fields: Optional[str], allowed: Optional[Tuple[str, ...]] = None) -> Optional[List[str]]:
+    """Field list for a projection from a comma-separated fields= parameter.
+    
+    With allowed set, only those fields may be requested and they are also the
+    default, so anything else in the documents is never read or returned.
+    """
+    if not fields:
+        return list(allowed) if allowed else None
+    
+    # The ID comes with every document, so it is never part of the projection
+    selected = list(dict.fromkeys(field.strip() for field in fields.split(',') if field.strip() not in ('', 'id')))
+    invalid = [
+        field for field in selected
+        if not FIELD_PATH.match(field) or (allowed and field.split('.')[0] not in allowed)
+    ]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(invalid)}")
+    return selected
+
+class PageParams:
+    """limit, cursor, order_by and fields query parameters shared by list endpoints"""
+    
+    def __init__(
+        self,
+        limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+        cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+        order_by: Optional[str] = Query(None, description="Field to sort by, prefixed with '-' for descending"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return; the ID is always included")
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.order_by = order_by
+        self.fields = fields
+    
+    def query(
+        self,
+        order_fields: Tuple[str, ...] = (),
+        allowed_fields: Optional[Tuple[str, ...]] = None
+    ) -> Dict[str, Any]:
+        """get_page arguments, rejecting unsupported orderings or fields and malformed cursors with a 400"""
+        if self.order_by and self.order_by.lstrip('-') not in order_fields:
+            raise HTTPException(
+                status_code=400,
+                detail=f"order_by must be one of: {', '.join(order_fields) or 'none'}"
+            )
+        if self.cursor:
+            try:
+                decode_cursor(self.cursor, self.order_by)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        return {
+            'limit': self.limit,
+            'order_by': self.order_by,
+            'cursor': self.cursor,
+            'fields': parse_fields(self.fields, allowed_fields)
+        }
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Invoice Total Backfill Script
+Writes the total field that dashboard revenue is summed from on invoices created before it existed
+"""
+
+import sys
+import os
+
+# Add the app directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.core.firebase_db import firebase_db, MAX_BATCH_WRITES
+from app.services.dashboard_stats_service import invoice_total
+
+def main():
+    """Recompute the total of every invoice from its items"""
+    print("🚀 Backfilling invoice totals...")
+
+    updated_count = 0
+    cursor = None
+    while True:
+        invoices, cursor = firebase_db.get_page('invoices', limit=MAX_BATCH_WRITES, cursor=cursor, fields=['items', 'total'])
+        # Written straight to the service so updated_at is left alone
+        writes = [
+            {'op': 'update', 'collection': 'invoices', 'doc_id': invoice['id'], 'data': {'total': invoice_total(invoice.get('items'))}}
+            for invoice in invoices
+            if invoice.get('total') != invoice_total(invoice.get('items'))
+        ]
+        if writes and firebase_db.service.commit_writes(writes):
+            updated_count += len(writes)
+        elif writes:
+            print(f"  ❌ Failed to update a batch of {len(writes)} invoices")
+        if cursor is None:
+            break
+
+    print(f"\n🎉 Updated the total of {updated_count} invoices")
+
+if __name__ == "__main__":
+    main()
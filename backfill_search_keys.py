@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Search Key Backfill Script
+Writes the {field}_prefixes search arrays on documents created before they existed
+"""
+
+import sys
+import os
+
+# Add the app directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.core.firebase_db import firebase_db, MAX_BATCH_WRITES
+from app.core.search_keys import SEARCH_FIELDS, search_keys
+
+def backfill_collection(collection_name, fields):
+    """Recompute search keys for every document in a collection"""
+    print(f"\n🔎 Backfilling {collection_name} ({', '.join(fields)})...")
+
+    updated_count = 0
+    cursor = None
+    while True:
+        docs, cursor = firebase_db.get_page(
+            collection_name, limit=MAX_BATCH_WRITES, cursor=cursor, fields=list(fields)
+        )
+        # Written straight to the service so updated_at is left alone
+        writes = [
+            {'op': 'update', 'collection': collection_name, 'doc_id': doc['id'], 'data': search_keys(collection_name, doc)}
+            for doc in docs
+        ]
+        writes = [write for write in writes if write['data']]
+        if writes and firebase_db.service.commit_writes(writes):
+            updated_count += len(writes)
+        elif writes:
+            print(f"  ❌ Failed to update a batch of {len(writes)} documents")
+        if cursor is None:
+            break
+
+    print(f"  ✅ Updated {updated_count} documents in {collection_name}")
+
+def main():
+    """Backfill every searchable collection"""
+    print("🚀 Backfilling Firestore search keys...")
+    for collection_name, fields in SEARCH_FIELDS.items():
+        backfill_collection(collection_name, fields)
+    print("\n🎉 Search key backfill completed!")
+
+if __name__ == "__main__":
+    main()
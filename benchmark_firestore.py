@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Firestore latency benchmark
+
+Measures request latency percentiles under concurrency for the blocking
+FirebaseDB layer versus the async AsyncFirebaseDB layer.
+
+Usage:
+    # In-process: runs both data layers on one event loop, the way uvicorn does
+    python benchmark_firestore.py inprocess --collection clients --concurrency 80 --requests 800
+
+    # HTTP: hits a running server (run once against the old build, once against the new)
+    python benchmark_firestore.py http --url http://localhost:8000/api/admin/clients/ --token <JWT>
+
+    # Search: seeds a synthetic collection, then compares a full scan with substring
+    # filtering in Python against the indexed prefix-array search
+    python benchmark_firestore.py search --docs 10000 --seed --term "sales" --cleanup
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(label: str, latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """Print and return latency statistics in milliseconds"""
+    stats = {
+        'requests': len(latencies),
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'mean_ms': (statistics.mean(latencies) * 1000) if latencies else 0.0,
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+    }
+    print(
+        f"{label:<10} n={stats['requests']:<6} "
+        f"p50={stats['p50_ms']:8.1f}ms p95={stats['p95_ms']:8.1f}ms "
+        f"p99={stats['p99_ms']:8.1f}ms mean={stats['mean_ms']:8.1f}ms "
+        f"rps={stats['throughput_rps']:7.1f}"
+    )
+    return stats
+
+
+async def run_load(call: Callable[[], Awaitable[None]], concurrency: int, total: int) -> List[float]:
+    """Run `total` calls with at most `concurrency` in flight, returning per-call latencies"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+
+async def bench_inprocess(args) -> None:
+    from app.core.firebase_db import firebase_db, async_firebase_db
+
+    async def blocking_call():
+        # What `async def` routes did before: a synchronous round trip on the loop
+        firebase_db.get_all(args.collection, limit=args.limit)
+
+    async def async_call():
+        await async_firebase_db.get_all(args.collection, limit=args.limit)
+
+    # Warm up both clients so channel setup is not measured
+    await blocking_call()
+    await async_call()
+
+    for label, call in (('blocking', blocking_call), ('async', async_call)):
+        start = time.perf_counter()
+        latencies = await run_load(call, args.concurrency, args.requests)
+        summarize(label, latencies, time.perf_counter() - start)
+
+
+SEARCH_WORDS = [
+    'sales', 'revenue', 'pipeline', 'marketing', 'inventory', 'finance', 'customer', 'churn',
+    'forecast', 'operations', 'support', 'growth', 'retention', 'logistics', 'quarterly', 'regional',
+]
+
+
+def synthetic_name(rng: random.Random) -> str:
+    return ' '.join(rng.choice(SEARCH_WORDS).capitalize() for _ in range(rng.randint(2, 4))) + ' Dashboard'
+
+
+async def bench_search(args) -> None:
+    from app.core.firebase_db import firebase_db, async_firebase_db
+    from app.core.search_keys import SEARCH_FIELDS, search_term
+
+    # Index the scratch collection the way projects are indexed
+    SEARCH_FIELDS[args.collection] = ('name',)
+
+    if args.seed:
+        rng = random.Random(42)
+        start = time.perf_counter()
+        with firebase_db.batch() as batch:
+            for i in range(args.docs):
+                batch.create(args.collection, {'name': synthetic_name(rng)}, f"bench-{i:06d}")
+        print(f"seeded {sum(batch.results)} documents in {time.perf_counter() - start:.1f}s")
+
+    needle = search_term(args.term)
+    docs_read = {'scan': 0, 'indexed': 0}
+
+    async def scan_call():
+        # What project search did before: read everything, filter in Python
+        docs = await async_firebase_db.get_all(args.collection)
+        docs_read['scan'] += len(docs)
+        [doc for doc in docs if needle in doc.get('name', '').lower()][:args.limit]
+
+    async def indexed_call():
+        docs, _ = await async_firebase_db.search_page(args.collection, args.term, limit=args.limit)
+        docs_read['indexed'] += len(docs)
+
+    await scan_call()
+    await indexed_call()
+    docs_read.update(scan=0, indexed=0)
+
+    for label, call in (('scan', scan_call), ('indexed', indexed_call)):
+        start = time.perf_counter()
+        latencies = await run_load(call, args.concurrency, args.requests)
+        summarize(label, latencies, time.perf_counter() - start)
+        print(f"{'':<10} documents read per request: {docs_read[label] / max(1, args.requests):.0f}")
+
+    if args.cleanup:
+        with firebase_db.batch() as batch:
+            for i in range(args.docs):
+                batch.delete(args.collection, f"bench-{i:06d}")
+        print(f"deleted {sum(batch.results)} documents")
+
+
+async def bench_http(args) -> None:
+    import httpx
+
+    headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=60) as client:
+        errors = 0
+
+        async def call():
+            nonlocal errors
+            response = await client.get(args.url)
+            if response.status_code >= 400:
+                errors += 1
+
+        await call()
+        start = time.perf_counter()
+        latencies = await run_load(call, args.concurrency, args.requests)
+        summarize('http', latencies, time.perf_counter() - start)
+        if errors:
+            print(f"warning: {errors} requests returned an error status")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Firestore latency benchmark")
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    inprocess = subparsers.add_parser('inprocess', help='Compare FirebaseDB and AsyncFirebaseDB on one event loop')
+    inprocess.add_argument('--collection', default='clients')
+    inprocess.add_argument('--limit', type=int, default=50)
+
+    http = subparsers.add_parser('http', help='Load a running server endpoint')
+    http.add_argument('--url', required=True)
+    http.add_argument('--token', default=None)
+
+    search = subparsers.add_parser('search', help='Compare scan-and-filter with indexed prefix search')
+    search.add_argument('--collection', default='bench_search_projects')
+    search.add_argument('--docs', type=int, default=10000)
+    search.add_argument('--term', default='sales')
+    search.add_argument('--limit', type=int, default=50)
+    search.add_argument('--seed', action='store_true', help='Write the synthetic documents first')
+    search.add_argument('--cleanup', action='store_true', help='Delete the synthetic documents afterwards')
+
+    for sub in (inprocess, http):
+        sub.add_argument('--concurrency', type=int, default=80)
+        sub.add_argument('--requests', type=int, default=800)
+    # Every scan request reads the whole collection, so keep the defaults modest
+    search.add_argument('--concurrency', type=int, default=5)
+    search.add_argument('--requests', type=int, default=50)
+
+    args = parser.parse_args()
+    print(f"mode={args.mode} concurrency={args.concurrency} requests={args.requests}")
+    if args.mode == 'inprocess':
+        asyncio.run(bench_inprocess(args))
+    elif args.mode == 'search':
+        asyncio.run(bench_search(args))
+    else:
+        asyncio.run(bench_http(args))
+
+
+if __name__ == "__main__":
+    main()
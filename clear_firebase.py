@@ -24,10 +24,14 @@ def clear_collection(collection_name):
             print(f"  ✅ {collection_name} is already empty")
             return
         
-        # Delete each document
+        # Delete in batched commits rather than one request per document
+        with firebase_db.batch() as batch:
+            for doc in docs:
+                batch.delete(collection_name, doc['id'])
+        
         deleted_count = 0
-        for doc in docs:
-            if firebase_db.delete(collection_name, doc['id']):
+        for doc, deleted in zip(docs, batch.results):
+            if deleted:
                 deleted_count += 1
                 print(f"  🗑️  Deleted {collection_name}/{doc['id']}")
             else:
@@ -240,6 +240,7 @@ INVOICES_DATA = [
         'issue_date': '2024-06-15', 
         'due_date': '2024-07-15', 
         'items': [{'description': 'Initial Project Setup', 'quantity': 1, 'price': 12000}], 
+        'total': 12000, 
         'status': 'Paid', 
         'type': 'manual', 
         'currency': 'USD'
@@ -252,6 +253,7 @@ INVOICES_DATA = [
         'issue_date': '2024-05-30', 
         'due_date': '2024-06-30', 
         'items': [{'description': 'Phase 1 Development', 'quantity': 1, 'price': 25000}], 
+        'total': 25000, 
         'status': 'Pending', 
         'type': 'manual', 
         'currency': 'USD'
@@ -264,6 +266,7 @@ INVOICES_DATA = [
         'issue_date': '2024-05-01', 
         'due_date': '2024-06-01', 
         'items': [{'description': 'Social Media Assets', 'quantity': 1, 'price': 5000}], 
+        'total': 5000, 
         'status': 'Overdue', 
         'type': 'manual', 
         'currency': 'USD'
@@ -311,17 +314,18 @@ def seed_collection(collection_name, data_list):
     """Seed a Firebase collection with data"""
     print(f"\n🌱 Seeding {collection_name}...")
     
-    for item in data_list:
-        item_id = item.pop('id')  # Remove id from data, use as document ID
+    try:
+        # One batched commit per collection rather than one request per document
+        with firebase_db.batch() as batch:
+            item_ids = [batch.create(collection_name, item, item.pop('id')) for item in data_list]
         
-        try:
-            result = firebase_db.create(collection_name, item, item_id)
-            if result:
+        for item_id, created in zip(item_ids, batch.results):
+            if created:
                 print(f"  ✅ Created {collection_name}/{item_id}")
             else:
                 print(f"  ❌ Failed to create {collection_name}/{item_id}")
-        except Exception as e:
-            print(f"  ❌ Error creating {collection_name}/{item_id}: {e}")
+    except Exception as e:
+        print(f"  ❌ Error seeding {collection_name}: {e}")
 
 def main():
     """Main seeding function"""
@@ -265,6 +265,7 @@ INVOICES_DATA = [
         'issue_date': '2024-06-15', 
         'due_date': '2024-07-15', 
         'items': [{'description': 'Initial Project Setup', 'quantity': 1, 'price': 12000}], 
+        'total': 12000, 
         'status': 'Paid', 
         'type': 'manual', 
         'currency': 'USD'
@@ -277,6 +278,7 @@ INVOICES_DATA = [
         'issue_date': '2024-05-30', 
         'due_date': '2024-06-30', 
         'items': [{'description': 'Phase 1 Development', 'quantity': 1, 'price': 25000}], 
+        'total': 25000, 
         'status': 'Pending', 
         'type': 'manual', 
         'currency': 'USD'
@@ -289,6 +291,7 @@ INVOICES_DATA = [
         'issue_date': '2024-05-01', 
         'due_date': '2024-06-01', 
         'items': [{'description': 'Social Media Assets', 'quantity': 1, 'price': 5000}], 
+        'total': 5000, 
         'status': 'Overdue', 
         'type': 'manual', 
         'currency': 'USD'